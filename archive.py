@@ -0,0 +1,152 @@
+import os
+import struct
+import threading
+import time
+import zipfile
+from typing import Optional
+
+
+# Signatures of image formats that are compressed already.
+COMPRESSED_SIGNATURES = (
+    b"\xff\xd8\xff",  # JPEG
+    b"\x89PNG",
+    b"GIF8",
+    b"RIFF",  # WEBP
+    b"\x00\x00\x00\x1cftypavif",
+)
+
+
+def is_compressed(content: bytes) -> bool:
+    return content.startswith(COMPRESSED_SIGNATURES)
+
+
+class ZipArchiveSink:
+    """Writes the downloaded images straight into the output zip archive.
+
+    Compressed image formats are stored as they are, anything else is deflated.
+    The images are appended to the archive in place, each one is written once.
+    Every `checkpoint_every` images the archive is closed, which writes its
+    central directory, and a copy of the directory is kept next to it in a
+    ".checkpoint" file until the run completes. Appending overwrites the
+    directory, so the archive a failed or killed run left is cut back to its last
+    checkpoint when it is opened again.
+    """
+
+    def __init__(self, path: str, append: bool = False, checkpoint_every: int = 25) -> None:
+        """Opens the archive.
+            Args:
+                path (str): Path of the zip archive.
+                append (bool): Keep the images of the archive a failed or killed run left, up to
+                    its last checkpoint, instead of starting a new one.
+                checkpoint_every (int): Number of images between two checkpoints of the archive.
+            Returns:
+                None.
+        """
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        self.checkpoint_every = checkpoint_every
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._zip: Optional[zipfile.ZipFile] = None
+        self._closed = False
+        self.names = set()
+        self.stored_size = 0
+
+        if append and os.path.exists(self.checkpoint_path):
+            self._restore()
+        elif os.path.exists(path):
+            os.remove(path)
+        if os.path.exists(path):
+            with zipfile.ZipFile(path) as archive:
+                for info in archive.infolist():
+                    self.names.add(info.filename)
+                    self.stored_size += info.file_size
+        self._save_checkpoint()
+
+    def _restore(self) -> None:
+        with open(self.checkpoint_path, "rb") as file:
+            offset, = struct.unpack("<Q", file.read(8))
+            directory = file.read()
+        if not directory:
+            # Nothing was checkpointed before the run was interrupted.
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        with open(self.path, "r+b") as file:
+            file.seek(offset)
+            file.write(directory)
+            file.truncate()
+
+    def _save_checkpoint(self) -> None:
+        offset, directory = 0, b""
+        if os.path.exists(self.path):
+            with zipfile.ZipFile(self.path) as archive:
+                offset = archive.start_dir
+            with open(self.path, "rb") as file:
+                file.seek(offset)
+                directory = file.read()
+        # Written aside, the checkpoint is replaced only once it is complete.
+        with open(self.checkpoint_path + ".partial", "wb") as file:
+            file.write(struct.pack("<Q", offset) + directory)
+        os.replace(self.checkpoint_path + ".partial", self.checkpoint_path)
+
+    def write(self, name: str, content: bytes) -> None:
+        """Adds an image to the archive, unless one with the same name is in it already.
+            Args:
+                name (str): The file name of the image in the archive.
+                content (bytes): The image.
+            Returns:
+                None.
+        """
+        info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+        info.compress_type = zipfile.ZIP_STORED if is_compressed(
+            content) else zipfile.ZIP_DEFLATED
+        with self._lock:
+            if name in self.names:
+                return
+            if self._zip is None:
+                self._zip = zipfile.ZipFile(self.path, "a")
+            self._zip.writestr(info, content)
+            self.names.add(name)
+            self.stored_size += len(content)
+            self._pending += 1
+            if self._pending >= self.checkpoint_every:
+                self._flush()
+
+    def checkpoint(self) -> None:
+        """Closes the archive so the images written so far are in a valid archive.
+        """
+        with self._lock:
+            if self._pending:
+                self._flush()
+
+    def _flush(self) -> None:
+        self._zip.close()
+        self._zip = None
+        self._pending = 0
+        self._save_checkpoint()
+
+    def size(self) -> int:
+        """Returns the total size of the images in the archive.
+        """
+        with self._lock:
+            return self.stored_size
+
+    def close(self, complete: bool = True) -> None:
+        """Finalizes the archive.
+            Args:
+                complete (bool): Whether the run is complete, the checkpoint of a failed run
+                    is kept for the run that resumes it.
+            Returns:
+                None.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            if self._pending:
+                self._flush()
+            if not os.path.exists(self.path):
+                zipfile.ZipFile(self.path, "w").close()
+            if complete:
+                os.remove(self.checkpoint_path)
+            self._closed = True
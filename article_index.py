@@ -0,0 +1,132 @@
+import hashlib
+import os
+import sqlite3
+from datetime import date
+from typing import List, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    scope TEXT NOT NULL,
+    url TEXT NOT NULL,
+    published TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    first_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (scope, url)
+);
+CREATE TABLE IF NOT EXISTS high_water_marks (
+    scope TEXT NOT NULL,
+    window_start TEXT NOT NULL,
+    published TEXT NOT NULL,
+    PRIMARY KEY (scope, window_start)
+);
+"""
+
+
+def content_hash(*parts: str) -> str:
+    """Hashes the scraped content of an article to notice when it changes.
+    """
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class ArticleIndex:
+    """On-disk index of the articles collected by previous runs of a phrase and section.
+
+    The articles of a run are kept in memory and written by finish() in a single
+    short transaction, so a run that fails leaves the index as the last
+    successful run left it, and concurrent shards never wait on each other's
+    crawl. A successful run collected everything from the start of its window to
+    its newest article, which it records as the high-water mark of that window
+    start. A mark is valid for any later window starting on the same day or
+    after.
+    """
+
+    NEW = "new"
+    CHANGED = "changed"
+    SEEN = "seen"
+
+    def __init__(self, path: str, phrase: str, section) -> None:
+        """Opens the index.
+            Args:
+                path (str): Path of the SQLite database.
+                phrase (str): The search phrase.
+                section: The section work item value.
+            Returns:
+                None.
+        """
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.scope = f"{phrase.strip().lower()}|{str(section or '').strip().lower()}"
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.window_start: Optional[date] = None
+        self.high_water: Optional[date] = None
+        self.newest: Optional[date] = None
+        self.pending: List[Tuple[str, str, str, str]] = []
+
+    def open_window(self, start: date) -> Optional[date]:
+        """Loads the high-water mark of the previous runs that covered a window starting on `start`.
+            Args:
+                start (date): The first day of the window of this run.
+            Returns:
+                date: The newest article of those runs, None if no run covered the window.
+        """
+        self.window_start = start
+        row = self.connection.execute(
+            "SELECT MAX(published) FROM high_water_marks WHERE scope = ? AND window_start <= ?",
+            (self.scope, start.isoformat())).fetchone()
+        self.high_water = date.fromisoformat(row[0]) if row[0] else None
+        return self.high_water
+
+    def is_below_high_water(self, published: date) -> bool:
+        """Returns True if the article is older than the newest one of the previous run,
+        so everything from there on was already collected.
+        """
+        return self.high_water is not None and published < self.high_water
+
+    def status(self, url: str, digest: str) -> str:
+        """Tells whether an article is new, changed or already collected.
+            Args:
+                url (str): The article URL.
+                digest (str): The content hash of the article.
+            Returns:
+                str: NEW, CHANGED or SEEN.
+        """
+        row = self.connection.execute(
+            "SELECT content_hash FROM articles WHERE scope = ? AND url = ?",
+            (self.scope, url)).fetchone()
+        if row is None:
+            return self.NEW
+        return self.SEEN if row[0] == digest else self.CHANGED
+
+    def record(self, url: str, published: date, digest: str) -> None:
+        """Records an article of this run, written by finish().
+        """
+        self.pending.append((self.scope, url, published.isoformat(), digest))
+        if self.newest is None or published > self.newest:
+            self.newest = published
+
+    def finish(self) -> None:
+        """Writes the articles of this successful run and moves the high-water mark of its window.
+        """
+        with self.connection:
+            self.connection.executemany(
+                """INSERT INTO articles (scope, url, published, content_hash) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (scope, url) DO UPDATE SET
+                       published = excluded.published,
+                       content_hash = excluded.content_hash,
+                       last_seen = CURRENT_TIMESTAMP""",
+                self.pending)
+            # Up to the mark the run stopped at, the runs before it covered the window.
+            newest = max(filter(None, (self.newest, self.high_water)), default=None)
+            if newest is not None and self.window_start is not None:
+                self.connection.execute(
+                    """INSERT INTO high_water_marks (scope, window_start, published) VALUES (?, ?, ?)
+                       ON CONFLICT (scope, window_start) DO UPDATE SET
+                           published = MAX(published, excluded.published)""",
+                    (self.scope, self.window_start.isoformat(), newest.isoformat()))
+        self.pending = []
+
+    def close(self) -> None:
+        self.connection.close()
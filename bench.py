@@ -0,0 +1,549 @@
+"""Offline throughput benchmark of the robot against recordings made with replay.py.
+
+    python bench.py fixtures --engine http --output bench.json
+    python bench.py fixtures --startup --repeat 5
+    python bench.py fixtures --parser --repeat 50
+    python bench.py fixtures/trump-1page --browser --repeat 3
+    python bench.py --dates
+    python bench.py --workbook
+    python bench.py --headlines
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Optional
+
+from date_window import DateWindow
+from directories import OutputDirs
+from excel import Excel
+from http_engine import HttpNyPosts
+from nyposts import NyPosts, story_date
+from news_model import NewsRecord
+from replay import CASE, Recording, ReplayServer
+from story_parser import parse_results
+from text_analytics import TextAnalyzer
+
+
+class TimedExcel(Excel):
+    """Excel workbook that keeps track of the time spent writing it.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.seconds = 0.0
+        self.rows = 0
+
+    def append(self, records: list, index) -> None:
+        started = time.perf_counter()
+        super().append(records, index)
+        self.seconds += time.perf_counter() - started
+        self.rows += len(records)
+
+    def close(self) -> None:
+        started = time.perf_counter()
+        super().close()
+        self.seconds += time.perf_counter() - started
+
+
+def peak_rss_mb() -> dict:
+    """Returns the peak resident set size of this process and of its children, like Chrome.
+    """
+    try:
+        import resource
+    except ImportError:
+        return {"self": None, "children": None}
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def process_tree_rss_mb(pid: Optional[int] = None) -> Optional[float]:
+    """Returns the resident set size of a process and all its descendants, like chromedriver and Chrome.
+        Read from /proc, None where there is none.
+    """
+    pid = pid or os.getpid()
+    if not os.path.isdir("/proc"):
+        return None
+    parents, rss = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", encoding="utf-8") as file:
+                status = dict(line.split(":", 1) for line in file if ":" in line)
+        except OSError:
+            continue
+        parents[int(entry)] = int(status["PPid"])
+        # Kernel threads have no memory of their own.
+        rss[int(entry)] = int(status.get("VmRSS", "0 kB").split()[0])
+    tree, total = {pid}, 0
+    for process in sorted(parents):
+        ancestor = process
+        while ancestor in parents and ancestor not in tree and ancestor > 1:
+            ancestor = parents[ancestor]
+        if ancestor in tree:
+            tree.add(process)
+    return round(sum(rss.get(process, 0) for process in tree) / 1024, 1)
+
+
+def run_case(directory: str, engine: str, months: int) -> dict:
+    """Runs the robot against one recording.
+        Returns:
+            dict: The metrics of the run.
+    """
+    with open(os.path.join(directory, CASE), encoding="utf-8") as file:
+        case = json.load(file)
+
+    dirs = OutputDirs(tempfile.mkdtemp(prefix="bench-"))
+    with ReplayServer(directory) as replay:
+        workitem = dict(case, months=months, engine=engine,
+                        base_url=replay.base_url, http_cache=False, resume=False, news_archive=False)
+        excel = TimedExcel(dirs.File_Path)
+        engine_class = HttpNyPosts if engine == "http" else NyPosts
+        posts = engine_class(workitem, dirs, excel=excel)
+
+        started = time.perf_counter()
+        try:
+            posts.open_website()
+            news_available, _ = posts.phrase_search()
+            if news_available:
+                posts.set_dates()
+                posts.sort_by()
+                posts.select_sections()
+                posts.get_required_data()
+            images_started = time.perf_counter()
+            posts.images.join()
+            images_seconds = time.perf_counter() - images_started
+            image_bytes = posts.images.archive.size()
+        finally:
+            posts.close()
+        seconds = time.perf_counter() - started
+
+    return {
+        "case": os.path.basename(os.path.normpath(directory)),
+        "engine": engine,
+        "seconds": round(seconds, 4),
+        "stories": excel.rows,
+        "pages": excel.pages,
+        "stories_per_sec": round(excel.rows / seconds, 2),
+        "pages_per_sec": round(excel.pages / seconds, 2),
+        "image_mb": round(image_bytes / 2 ** 20, 3),
+        "image_mb_per_sec": round(image_bytes / 2 ** 20 / seconds, 3),
+        "image_join_seconds": round(images_seconds, 4),
+        "excel_seconds": round(excel.seconds, 4),
+        "requests": replay.requests,
+    }
+
+
+# What the task module imported at startup before the RPA libraries were loaded on first use.
+EAGER_IMPORTS = "import RPA.Browser.Selenium, RPA.HTTP, RPA.Excel.Files"
+
+
+def time_import(statement: str) -> Optional[float]:
+    """Runs an import statement in a fresh interpreter.
+        Args:
+            statement (str): The import statement.
+        Returns:
+            float: The seconds the interpreter took, None if a module is not installed.
+    """
+    started = time.time()
+    result = subprocess.run([sys.executable, "-c", statement], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    seconds = time.time() - started
+    if result.returncode and re.search(r"^(ImportError|ModuleNotFoundError):", result.stderr, re.M):
+        return None
+    if result.returncode:
+        raise RuntimeError(f"{statement} failed:\n{result.stderr}")
+    return seconds
+
+
+def run_startup(directory: str, months: int, repeat: int) -> dict:
+    """Starts the robot as a fresh process, the way a run starts, against one recording.
+        Returns:
+            dict: The median time to import the task module, next to the time the RPA
+            libraries took to import eagerly (None if they are not installed), to the
+            first network request and to the end of the run.
+    """
+    with open(os.path.join(directory, CASE), encoding="utf-8") as file:
+        case = json.load(file)
+    task_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "task.py")
+
+    imports, eager_imports, first_requests, totals = [], [], [], []
+    for _ in range(repeat):
+        imports.append(time_import("import task"))
+        eager_imports.append(time_import(f"{EAGER_IMPORTS}; import task"))
+
+        cwd = tempfile.mkdtemp(prefix="bench-")
+        with ReplayServer(directory) as replay:
+            items = os.path.join(cwd, "items.json")
+            with open(items, "w", encoding="utf-8") as file:
+                json.dump([dict(case, months=months, engine="http",
+                                base_url=replay.base_url, http_cache=False, resume=False, news_archive=False)], file)
+            env = dict(os.environ, LOCAL_WORKITEMS=items)
+            started = time.time()
+            subprocess.run([sys.executable, task_path], check=True, cwd=cwd, env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            totals.append(time.time() - started)
+            first_requests.append(replay.first_request_at - started)
+
+    return {
+        "case": os.path.basename(os.path.normpath(directory)),
+        "runs": repeat,
+        "import_seconds": round(statistics.median(imports), 4),
+        "eager_import_seconds": None if None in eager_imports else round(
+            statistics.median(eager_imports), 4),
+        "first_request_seconds": round(statistics.median(first_requests), 4),
+        "total_seconds": round(statistics.median(totals), 4),
+    }
+
+
+def run_browser(directory: str, repeat: int, profiles=("full", "lean")) -> List[dict]:
+    """Opens the first results page of one recording in Chrome with every browser profile, the way
+    open_website launches it.
+        Returns:
+            List[dict]: Per profile, the median time until the stories are on the page, the median memory
+            of the robot with its browser processes once they are, and the bytes the browser downloaded.
+    """
+    with open(os.path.join(directory, CASE), encoding="utf-8") as file:
+        case = json.load(file)
+
+    results = []
+    with ReplayServer(directory) as replay:
+        for profile in profiles:
+            ready, rss = [], []
+            served = replay.bytes_served
+            for _ in range(repeat):
+                dirs = OutputDirs(tempfile.mkdtemp(prefix="bench-"))
+                posts = NyPosts(dict(case, base_url=replay.base_url, browser_profile=profile,
+                                     http_cache=False, resume=False, news_archive=False), dirs)
+                try:
+                    posts.orderby = "date"
+                    started = time.perf_counter()
+                    posts.launch_browser(posts.results_url())
+                    posts.waiter.until("stories", "//div[@class='search-results__story']", timeout=60)
+                    ready.append(time.perf_counter() - started)
+                    rss.append(process_tree_rss_mb())
+                finally:
+                    posts.close()
+            results.append({
+                "case": os.path.basename(os.path.normpath(directory)),
+                "profile": profile,
+                "runs": repeat,
+                "page_ready_seconds": round(statistics.median(ready), 4),
+                "rss_mb": statistics.median(rss) if None not in rss else None,
+                "served_kb_per_run": round((replay.bytes_served - served) / 1024 / repeat, 1),
+            })
+    return results
+
+
+def run_parser(directory: str, repeat: int) -> dict:
+    """Parses the recorded results pages of one recording over and over.
+        Returns:
+            dict: The pages and stories parsed per second.
+    """
+    recording = Recording(directory)
+    pages = [recording.get(key)[0].decode("utf-8") for key, entry in sorted(recording.manifest.items())
+             if key.startswith("/search/") and entry["type"].startswith("text/html")]
+    stories = 0
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages:
+            stories += len(parse_results(html).stories)
+    seconds = time.perf_counter() - started
+
+    return {
+        "case": os.path.basename(os.path.normpath(directory)),
+        "pages": len(pages),
+        "runs": repeat,
+        "seconds": round(seconds, 4),
+        "pages_per_sec": round(len(pages) * repeat / seconds, 1),
+        "stories_per_sec": round(stories / seconds, 1),
+    }
+
+
+def legacy_dates(months: int, today: date) -> List[str]:
+    """The day strings set_dates() built for every story before DateWindow, current month twice included.
+    """
+    date_ranges = []
+    for i in range(months + 1):
+        target_month = today.month if i == 0 else today.month - (i - 1)
+        target_year = today.year
+        while target_month <= 0:
+            target_month += 12
+            target_year -= 1
+        first_day = datetime(target_year, target_month, 1)
+        if target_month == 12:
+            last_day = datetime(target_year + 1, 1, 1) - timedelta(days=1)
+        else:
+            last_day = datetime(target_year, target_month + 1, 1) - timedelta(days=1)
+        date_ranges.append((first_day, last_day))
+
+    all_dates = []
+    for start_date, end_date in date_ranges:
+        current_date = start_date
+        while current_date <= end_date:
+            all_dates.append(current_date)
+            current_date += timedelta(days=1)
+    return [day.strftime('%B %d, %Y') for day in all_dates]
+
+
+def run_dates(stories: int = 100, today: Optional[date] = None) -> List[dict]:
+    """Checks the dates of a page of stories against the date window, the way set_dates() did and with
+    DateWindow, for the months values 0 to 24.
+        Args:
+            stories (int): Number of stories checked per months value, spread from the end of the window
+                to a month before its start.
+            today (date): The reference day, defaults to today.
+        Returns:
+            List[dict]: The time of both checks per months value and whether they agree.
+    """
+    today = today or date.today()
+    results = []
+    for months in range(25):
+        window = DateWindow.from_months(months, today)
+        span = (window.end - window.start).days + 31
+        dates = [(window.end - timedelta(days=i * span // stories)).strftime('%B %d, %Y')
+                 for i in range(stories)]
+
+        started = time.perf_counter()
+        # set_dates() ran once in news_stories and once more in send_to_excel, for every story.
+        legacy = [date_text in legacy_dates(months, today) and date_text in legacy_dates(months, today)
+                  for date_text in dates]
+        legacy_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        window = DateWindow.from_months(months, today)
+        current = [story_date(date_text) in window for date_text in dates]
+        window_seconds = time.perf_counter() - started
+
+        results.append({
+            "months": months,
+            "stories": stories,
+            "legacy_ms": round(legacy_seconds * 1000, 3),
+            "window_ms": round(window_seconds * 1000, 3),
+            "speedup": round(legacy_seconds / window_seconds, 1),
+            "same_result": legacy == current,
+        })
+    return results
+
+
+def legacy_workbook(filepath: str, pages: int, records: List[NewsRecord]) -> None:
+    """Writes the workbook the way Excel.create_excel did, reopening it and saving it again for every page.
+    """
+    from openpyxl import Workbook, load_workbook
+
+    for index in range(1, pages + 1):
+        workbook = load_workbook(filepath) if os.path.exists(filepath) else Workbook()
+        sheet = workbook.create_sheet(title=f"Page-{index}")
+        sheet.append(Excel.COLUMNS)
+        for record in records:
+            sheet.append(record.row())
+        if "Sheet" in workbook.sheetnames:
+            workbook.remove(workbook["Sheet"])
+        workbook.save(filepath)
+
+
+def run_workbook(page_counts=(10, 100, 1000), stories: int = 10, legacy_pages: int = 100,
+                 directory: Optional[str] = None) -> List[dict]:
+    """Writes workbooks of synthetic news pages the old way and with the streaming writer.
+        Args:
+            page_counts: The numbers of results pages written.
+            stories (int): Number of stories per page.
+            legacy_pages (int): The most pages written the old way, its time grows with the square of the pages.
+            directory (str): Where the workbooks are written, "<writer>-<pages>.xlsx", a temporary one by default.
+        Returns:
+            List[dict]: The time and file size of every writer and page count.
+    """
+    records = [NewsRecord(f"Headline {i} about the search phrase", "A teaser of the story. " * 8,
+                          "October 17, 2025", f"https://nypost.com/2025/10/17/story-{i}/",
+                          f"https://nypost.com/image-{i}.jpg", f"page(1)_image-news({i}).png")
+               for i in range(stories)]
+    writers = {
+        "pages": dict(layout="pages"),
+        "single": dict(layout="single"),
+        "pages_checkpoint_10": dict(layout="pages", checkpoint_every=10),
+    }
+    directory = directory or tempfile.mkdtemp(prefix="bench-")
+    results = []
+    for pages in page_counts:
+        if pages <= legacy_pages:
+            filepath = os.path.join(directory, f"legacy-{pages}.xlsx")
+            started = time.perf_counter()
+            legacy_workbook(filepath, pages, records)
+            results.append({"writer": "legacy", "pages": pages,
+                            "seconds": round(time.perf_counter() - started, 4),
+                            "file_kb": round(os.path.getsize(filepath) / 1024, 1)})
+        for writer, options in writers.items():
+            filepath = os.path.join(directory, f"{writer}-{pages}.xlsx")
+            started = time.perf_counter()
+            excel = Excel(filepath, **options)
+            for index in range(1, pages + 1):
+                excel.append(records, index)
+            excel.close()
+            results.append({"writer": writer, "pages": pages,
+                            "seconds": round(time.perf_counter() - started, 4),
+                            "file_kb": round(os.path.getsize(filepath) / 1024, 1)})
+    return results
+
+
+def legacy_money_status(input_text: str) -> bool:
+    """The money check of NyPosts.money_status before TextAnalyzer.
+    """
+    pattern_of_money = r'\$\d+(?:,\d+)*(?:\.\d+)?(?:\s*(?:dollars|USD))?\b|\b\d+\s*(?:dollars|USD)\b'
+    return bool(re.findall(pattern_of_money, input_text))
+
+
+def legacy_search_string_count(input_string: str, search_string: str) -> int:
+    """The phrase count of NyPosts.search_string_count before TextAnalyzer, only at multiples of the phrase length.
+    """
+    for char in ".,;?!‘’":
+        input_string = input_string.lower().replace(char, "")
+    words = input_string.split()
+    result = []
+    for i in range(0, len(words), len(search_string.split())):
+        result.append(' '.join(words[i:i + len(search_string.split())]))
+    return result.count(search_string.lower())
+
+
+def synthetic_headlines(count: int, seed: int = 13) -> List[str]:
+    """Builds headlines of 6 to 14 words, some of them with the phrases "Trump", "White House" and
+    "New York" in any position, or an amount of money.
+    """
+    words = ("the", "says", "after", "over", "new", "deal", "city", "mayor", "plan", "report",
+             "house", "court", "police", "state", "white", "year", "tax", "budget", "fans", "win")
+    inserts = ("Trump", "White House", "New York", "New York's", "$1,200", "$3.5 million",
+               "40 dollars", "Trump,", "white house")
+    generator = random.Random(seed)
+    headlines = []
+    for _ in range(count):
+        headline = [generator.choice(words) for _ in range(generator.randint(6, 14))]
+        for _ in range(generator.randint(0, 2)):
+            headline.insert(generator.randint(0, len(headline)), generator.choice(inserts))
+        headlines.append(" ".join(headline).capitalize() + generator.choice(("", ".", "?", "!")))
+    return headlines
+
+
+def run_headlines(count: int = 100_000, phrases=("trump", "white house", "new york")) -> dict:
+    """Counts phrases and money mentions in synthetic headlines, the way the scraper did per story before
+    TextAnalyzer and with it.
+        Args:
+            count (int): Number of headlines.
+            phrases: The search phrases counted.
+        Returns:
+            dict: The time of both ways and their totals per phrase.
+    """
+    headlines = synthetic_headlines(count)
+
+    started = time.perf_counter()
+    legacy_counts = {phrase: 0 for phrase in phrases}
+    legacy_money = 0
+    for headline in headlines:
+        for phrase in phrases:
+            legacy_counts[phrase] += legacy_search_string_count(headline, phrase)
+        legacy_money += legacy_money_status(headline)
+    legacy_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    analyzer = TextAnalyzer(phrases)
+    counts = {phrase: 0 for phrase in phrases}
+    money = 0
+    for headline in headlines:
+        stats = analyzer.analyze(headline)
+        for phrase in phrases:
+            counts[phrase] += stats.phrase_counts[phrase]
+        money += stats.money
+    analyzer_seconds = time.perf_counter() - started
+
+    return {
+        "headlines": count,
+        "phrases": list(phrases),
+        "legacy_seconds": round(legacy_seconds, 4),
+        "analyzer_seconds": round(analyzer_seconds, 4),
+        "speedup": round(legacy_seconds / analyzer_seconds, 2),
+        "headlines_per_sec": round(count / analyzer_seconds),
+        "legacy_counts": legacy_counts,
+        "counts": counts,
+        "legacy_money": legacy_money,
+        "money": money,
+    }
+
+
+def find_cases(root: str) -> list:
+    if os.path.exists(os.path.join(root, CASE)):
+        return [root]
+    return sorted(entry.path for entry in os.scandir(root)
+                  if os.path.exists(os.path.join(entry.path, CASE)))
+
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="?", help="a recording or a directory of recordings")
+    parser.add_argument("--engine", choices=("http", "browser"), default="http")
+    parser.add_argument("--months", type=int, default=600,
+                        help="months work item value of the recordings without a date window")
+    parser.add_argument("--output", help="file to write the JSON results to")
+    parser.add_argument("--startup", action="store_true",
+                        help="measure the start of a fresh robot process instead of the throughput")
+    parser.add_argument("--parser", action="store_true",
+                        help="measure the results page parser on the recorded pages instead")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="number of runs the startup and browser times are the median of, or of parser passes")
+    parser.add_argument("--browser", action="store_true",
+                        help="compare the page-ready time and memory of the full and lean Chrome profiles")
+    parser.add_argument("--dates", action="store_true",
+                        help="compare the date window checks with the set_dates() lists, no recording needed")
+    parser.add_argument("--headlines", action="store_true",
+                        help="compare the phrase counts and money checks on 100k synthetic headlines")
+    parser.add_argument("--workbook", action="store_true",
+                        help="compare the workbook writers at 10, 100 and 1000 pages, no recording needed")
+    args = parser.parse_args()
+
+    results = {
+        "commit": current_commit(),
+        "python": platform.python_version(),
+    }
+    if not (args.dates or args.workbook or args.headlines) and not args.fixtures:
+        parser.error("the fixtures argument is required")
+    cases = find_cases(args.fixtures) if args.fixtures else []
+    if args.dates:
+        results["dates"] = run_dates()
+    elif args.workbook:
+        results["workbook"] = run_workbook()
+    elif args.headlines:
+        results["headlines"] = run_headlines()
+    elif args.browser:
+        results["browser"] = [result for case in cases for result in run_browser(case, args.repeat)]
+    elif args.parser:
+        results["parser"] = [run_parser(case, args.repeat) for case in cases]
+    elif args.startup:
+        results["startup"] = [run_startup(case, args.months, args.repeat)
+                              for case in cases]
+    else:
+        results["cases"] = [run_case(case, args.engine, args.months)
+                            for case in cases]
+        results["peak_rss_mb"] = peak_rss_mb()
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(report)
+    print(report)
@@ -0,0 +1,76 @@
+import multiprocessing
+import os
+
+from directories import STATE_DIR
+
+
+# Ads, analytics and heavy resources the scraping never looks at.
+BLOCKED_URL_PATTERNS = [
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*adservice.google.com*",
+    "*amazon-adsystem.com*",
+    "*facebook.net*",
+    "*scorecardresearch.com*",
+    "*chartbeat.com*",
+    "*taboola.com*",
+    "*outbrain.com*",
+    "*permutive.com*",
+    "*jwplayer.com*",
+    "*jwpcdn.com*",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.mp4",
+    "*.m3u8",
+    "*.webm",
+]
+
+
+def lean_profile_dir(shard: str = "") -> str:
+    """Returns the user data dir of the lean profile.
+        Chrome locks its user data dir, so every process and shard keeps its own,
+        named so that the next run of the robot finds it again.
+    """
+    name = multiprocessing.current_process().name
+    return os.path.join(STATE_DIR, "chrome-profile", f"{name}-{shard or 'main'}")
+
+
+def lean_chrome_options(user_data_dir: str) -> "ChromeOptions":
+    """Builds the options of a headless Chrome that does not load images, and
+    does not wait for every subresource before a page counts as loaded.
+        Args:
+            user_data_dir (str): The profile directory, reused so the cookie consent is remembered.
+        Returns:
+            ChromeOptions: The browser options.
+    """
+    from selenium.webdriver import ChromeOptions
+
+    options = ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--mute-audio")
+    options.add_argument(f"--user-data-dir={user_data_dir}")
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+        "profile.default_content_setting_values.notifications": 2,
+    })
+    options.page_load_strategy = "eager"
+    return options
+
+
+def block_resources(driver) -> None:
+    """Blocks the ad, analytics, font and video requests of the browser.
+        Args:
+            driver: The Chrome WebDriver.
+        Returns:
+            None.
+    """
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd(
+        "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
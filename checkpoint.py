@@ -0,0 +1,122 @@
+import hashlib
+import json
+import os
+from datetime import date
+from itertools import groupby
+from typing import Iterator, List, Optional, Tuple
+
+from news_model import NewsRecord, batched
+
+
+def checkpoint_key(*parts) -> str:
+    """Names the checkpoint of a work item, from the values that define its crawl
+    and the current day, so a checkpoint is never resumed on another day.
+    """
+    text = "\x1f".join(str(part) for part in (*parts, date.today().isoformat()))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class Checkpoint:
+    """Progress of a crawl kept on disk, to resume it after a failure.
+
+    The records are journaled one JSON line each next to a state file holding
+    the last completed page. Records are buffered until save() and written
+    before the state, so the journal holds at least every record of the pages
+    up to the saved one; records of later pages, and a last line cut short by a
+    kill, are dropped when it is loaded.
+    """
+
+    FIELDS = NewsRecord.__slots__
+
+    def __init__(self, directory: str, key: str) -> None:
+        """Initializes the checkpoint.
+            Args:
+                directory (str): Directory of the checkpoints.
+                key (str): Name of the checkpoint, see checkpoint_key().
+            Returns:
+                None.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.state_path = os.path.join(directory, f"{key}.json")
+        self.journal_path = os.path.join(directory, f"{key}.jsonl")
+        self._buffer: List[str] = []
+
+    def load(self) -> Optional[dict]:
+        """Reads the saved state and drops the journaled records of pages after it.
+            Returns:
+                dict: The state, None if there is no checkpoint.
+        """
+        if not os.path.exists(self.state_path):
+            return None
+        with open(self.state_path, encoding="utf-8") as file:
+            state = json.load(file)
+
+        lines = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as file:
+                # Like a state file that was never renamed, a line without its newline was
+                # never completely written: the run was killed while journaling it.
+                lines = [line for line in file
+                         if line.endswith("\n") and line.strip()
+                         and json.loads(line)["page"] <= state["page"]]
+        self._replace(self.journal_path, "".join(lines))
+        return state
+
+    def records(self) -> Iterator[Tuple[int, NewsRecord]]:
+        """Returns the journaled records with the number of their results page.
+        """
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, encoding="utf-8") as file:
+            for line in file:
+                entry = json.loads(line)
+                record = NewsRecord(entry["title"], entry["description"], entry["date"])
+                for field in self.FIELDS:
+                    setattr(record, field, entry[field])
+                yield entry["page"], record
+
+    def batches(self, size: int) -> Iterator[Tuple[int, List[NewsRecord]]]:
+        """Returns the journaled records in batches of at most `size` records of the same page.
+        """
+        for page, entries in groupby(self.records(), key=lambda entry: entry[0]):
+            for batch in batched((record for _, record in entries), size):
+                yield page, batch
+
+    def add(self, records: List[NewsRecord], page: int) -> None:
+        """Buffers the records of a page until the next save().
+        """
+        for record in records:
+            entry = {field: getattr(record, field) for field in self.FIELDS}
+            entry["page"] = page
+            self._buffer.append(json.dumps(entry) + "\n")
+
+    def save(self, state: dict) -> None:
+        """Journals the buffered records, then saves the state.
+            Args:
+                state (dict): The progress of the crawl, with the last completed page under "page".
+            Returns:
+                None.
+        """
+        if self._buffer:
+            with open(self.journal_path, "a", encoding="utf-8") as file:
+                file.writelines(self._buffer)
+                file.flush()
+                os.fsync(file.fileno())
+            self._buffer = []
+        self._replace(self.state_path, json.dumps(state, indent=2))
+
+    def clear(self) -> None:
+        """Removes the checkpoint once the crawl is complete.
+        """
+        self._buffer = []
+        for path in (self.state_path, self.journal_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    @staticmethod
+    def _replace(path: str, content: str) -> None:
+        # Written aside and renamed, so the file is never left half written.
+        temporary = f"{path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(temporary, path)
@@ -0,0 +1,120 @@
+from typing import NamedTuple, Optional, Union
+
+from workitems import workitems
+
+
+CHOICES = {
+    "engine": ("browser", "http"),
+    "extraction": ("bulk", "xpath"),
+    "browser_profile": ("full", "lean"),
+    "excel_layout": ("pages", "single"),
+}
+
+
+def convert(value, default):
+    """Converts a work item value to the type of the setting's default.
+    """
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return bool(value)
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    if isinstance(default, str) and not isinstance(value, list):
+        return str(value)
+    return value
+
+
+class RunConfig(NamedTuple):
+    """The work item payload of a run, validated and converted to typed settings.
+    """
+
+    phrase: str
+    section: Union[str, list] = ""
+    months: int = 0
+    engine: str = "browser"
+    extraction: str = "bulk"
+    browser_profile: str = "full"
+    base_url: str = ""
+    shard: str = ""
+    window_start: str = ""
+    window_end: str = ""
+    shard_workers: int = 1
+    page_workers: int = 4
+    record_batch_size: int = 50
+    excel_layout: str = "pages"
+    excel_checkpoint_pages: int = 0
+    image_workers: int = 8
+    image_workers_per_host: int = 4
+    image_checkpoint_every: int = 25
+    http_cache: bool = True
+    http_cache_ttl: int = 900
+    http_cache_mb: int = 256
+    resume: bool = True
+    checkpoint_pages: int = 1
+    story_retries: int = 3
+    enrich_articles: bool = False
+    enrich_workers: int = 8
+    enrich_budget: int = 120
+    enrich_timeout: int = 10
+    news_archive: bool = True
+    retry_delay: float = 0.5
+    incremental: bool = False
+    metrics: bool = False
+    workitem: dict = {}
+
+    @classmethod
+    def from_workitem(cls, workitem: dict) -> "RunConfig":
+        """Validates a work item payload.
+            Args:
+                workitem (dict): The work item data.
+            Returns:
+                RunConfig: The settings of the run, the payload itself is kept in `workitem`.
+        """
+        phrase = workitem.get("phrase")
+        if not isinstance(phrase, str) or not phrase.strip():
+            raise ValueError("The work item has no search phrase")
+
+        values = {"phrase": phrase, "workitem": workitem}
+        for name, default in cls._field_defaults.items():
+            value = workitem.get(name)
+            if name in values or value in (None, ""):
+                continue
+            try:
+                values[name] = convert(value, default)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid work item value {name}={value!r}") from None
+
+        config = cls(**values)
+        for name, allowed in CHOICES.items():
+            if getattr(config, name) not in allowed:
+                raise ValueError(f"Invalid work item value {name}={getattr(config, name)!r}")
+        if config.months < 0:
+            raise ValueError("The months work item value must not be negative")
+        return config._replace(base_url=config.base_url.rstrip("/"))
+
+    @classmethod
+    def of(cls, workitem: Union[None, dict, "RunConfig"]) -> "RunConfig":
+        """Returns the config of a work item payload, the one of the input work item if None.
+        """
+        if workitem is None:
+            return load_config()
+        if isinstance(workitem, RunConfig):
+            return workitem
+        return cls.from_workitem(workitem)
+
+
+_loaded: Optional[RunConfig] = None
+
+
+def load_config() -> RunConfig:
+    """Reads and validates the input work item, only the first time it is called.
+        Returns:
+            RunConfig: The settings of the run.
+    """
+    global _loaded
+    if _loaded is None:
+        _loaded = RunConfig.from_workitem(workitems())
+    return _loaded
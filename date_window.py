@@ -0,0 +1,71 @@
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Union
+
+
+class DateWindow:
+    """Inclusive range of calendar days the news has to be published in.
+    """
+
+    __slots__ = ("start", "end")
+
+    def __init__(self, start: date, end: date) -> None:
+        self.start = start
+        self.end = end
+
+    @classmethod
+    def from_months(cls, months: int, today: Optional[date] = None) -> "DateWindow":
+        """Builds the window for the `months` work item value.
+            Args:
+                months (int): Number of months to receive news for, 0 and 1 both mean the current month only.
+                today (date): The reference day, defaults to today.
+            Returns:
+                DateWindow: From the first day of the oldest month to the last day of the current month.
+        """
+        if months < 0:
+            raise ValueError(f"months must be a non-negative integer, got {months}")
+
+        today = today or date.today()
+        target_month = today.month - max(months - 1, 0)
+        target_year = today.year
+        while target_month <= 0:
+            target_month += 12
+            target_year -= 1
+
+        start = date(target_year, target_month, 1)
+        if today.month == 12:
+            end = date(today.year + 1, 1, 1) - timedelta(days=1)
+        else:
+            end = date(today.year, today.month + 1, 1) - timedelta(days=1)
+        return cls(start, end)
+
+    @classmethod
+    def from_isoformat(cls, start: str, end: str) -> "DateWindow":
+        """Builds the window from ISO formatted first and last days.
+        """
+        return cls(date.fromisoformat(start), date.fromisoformat(end))
+
+    def split_months(self) -> List["DateWindow"]:
+        """Splits the window into one window per calendar month, newest first.
+        """
+        windows = []
+        end = self.end
+        while end >= self.start:
+            start = max(end.replace(day=1), self.start)
+            windows.append(DateWindow(start, end))
+            end = start - timedelta(days=1)
+        return windows
+
+    @staticmethod
+    def _day(value: Union[date, datetime]) -> date:
+        return value.date() if isinstance(value, datetime) else value
+
+    def __contains__(self, value: Union[date, datetime]) -> bool:
+        return self.start <= self._day(value) <= self.end
+
+    def is_newer(self, value: Union[date, datetime]) -> bool:
+        """Returns True if the day is after the end of the window.
+        """
+        return self._day(value) > self.end
+
+    def __repr__(self) -> str:
+        return f"DateWindow({self.start.isoformat()}, {self.end.isoformat()})"
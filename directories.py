@@ -1,9 +1,25 @@
 import os
 
 
-class DIRS:
-    OUTPUT = os.path.join(os.getcwd(), "output")
-    File_Path = os.path.join(OUTPUT, "Fresh News.xlsx")
-    IMAGE_DIR = os.path.join(OUTPUT, "images")
-    ERROR_SCREENSHOT_PATH = os.path.join(OUTPUT, "error.png")
-    ARCH_Path = IMAGE_DIR
+class OutputDirs:
+    def __init__(self, output: str) -> None:
+        self.OUTPUT = output
+        self.File_Path = os.path.join(output, "Fresh News.xlsx")
+        self.ERROR_SCREENSHOT_PATH = os.path.join(output, "error.png")
+        self.ERROR_PAGE_PATH = os.path.join(output, "error.html")
+        self.STATUS_PATH = os.path.join(output, "status.json")
+        self.ARCH_Path = os.path.join(output, "images.zip")
+
+    def for_item(self, name: str) -> "OutputDirs":
+        """
+        Returns the output directories of a work item run in batch mode.
+        """
+        return OutputDirs(os.path.join(self.OUTPUT, name))
+
+
+DIRS = OutputDirs(os.path.join(os.getcwd(), "output"))
+# Kept between runs of the robot, unlike the output artifacts.
+STATE_DIR = os.path.join(os.getcwd(), "state")
+HTTP_CACHE_DIR = os.path.join(STATE_DIR, "http-cache")
+CHECKPOINT_DIR = os.path.join(STATE_DIR, "checkpoints")
+NEWS_ARCHIVE_PATH = os.path.join(STATE_DIR, "news.sqlite3")
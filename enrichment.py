@@ -0,0 +1,127 @@
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from typing import Iterator, Optional
+
+import requests
+
+from http_cache import HttpCache, pooled_session
+from logger import logger
+from metrics import metrics
+from news_model import NewsRecord
+from story_parser import parse_article_text
+from text_analytics import TextAnalyzer, TextStats
+
+
+class ArticleEnricher:
+    """Fetches the full article of every record and runs the analytics on its body.
+
+    The articles are fetched by a bounded thread pool sharing one keep-alive
+    connection pool, a few records ahead of the one handed on, so the records
+    keep their order. Once the time budget of the run is spent, or an article
+    takes longer than its timeout, the record gets the analytics of its title
+    and teaser instead.
+    """
+
+    ARTICLE = "article"
+    TEASER = "teaser"
+
+    def __init__(self, analyzer: TextAnalyzer, phrase: str, workers: int = 8, budget: float = 120,
+                 timeout: float = 10, cache: Optional[HttpCache] = None) -> None:
+        """Initializes the enricher.
+            Args:
+                analyzer (TextAnalyzer): The analyzer of the search phrase.
+                phrase (str): The search phrase.
+                workers (int): Number of articles fetched at the same time.
+                budget (float): Seconds the enrichment may take over the whole run.
+                timeout (float): Seconds a single article may take.
+                cache (HttpCache): The HTTP cache the articles are fetched through, if any.
+            Returns:
+                None.
+        """
+        self.analyzer = analyzer
+        self.phrase = phrase
+        self.workers = workers
+        self.budget = budget
+        self.timeout = timeout
+        self.cache = cache
+        self.session = pooled_session(workers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="article")
+        self.deadline: Optional[float] = None
+        self.stats: Counter = Counter()
+
+    @metrics.timed("article.fetch")
+    def analyze_article(self, url: str) -> TextStats:
+        """Fetches an article and analyzes its body.
+            Args:
+                url (str): The URL of the article.
+            Returns:
+                TextStats: The analytics of the body.
+        """
+        if self.cache is not None:
+            response, _ = self.cache.get(self.session, url, timeout=self.timeout)
+        else:
+            response = self.session.get(url, timeout=self.timeout)
+        response.raise_for_status()
+        text = parse_article_text(response.text)
+        if not text:
+            raise ValueError("no article body")
+        return self.analyzer.analyze(text)
+
+    def enrich(self, records: Iterator[NewsRecord]) -> Iterator[NewsRecord]:
+        """Pipeline stage filling in the article columns of the records, in order.
+        """
+        if self.deadline is None:
+            self.deadline = time.monotonic() + self.budget
+        window = deque()
+        for record in records:
+            future = None
+            if record.url and time.monotonic() < self.deadline:
+                future = self.executor.submit(self.analyze_article, record.url)
+            window.append((record, future))
+            if len(window) >= 2 * self.workers:
+                yield self._complete(*window.popleft())
+        while window:
+            yield self._complete(*window.popleft())
+
+    def _complete(self, record: NewsRecord, future) -> NewsRecord:
+        stats = None
+        if future is not None:
+            try:
+                stats = future.result(timeout=max(
+                    0, min(self.timeout, self.deadline - time.monotonic())))
+            except TimeoutError:
+                future.cancel()
+                self.stats["timeouts"] += 1
+            except requests.Timeout:
+                # The request gave up before the wait for it did.
+                self.stats["timeouts"] += 1
+            except Exception as e:
+                logger.info(f"Could not enrich {record.url}: {e}")
+                self.stats["failures"] += 1
+
+        if stats is not None:
+            record.article_source = self.ARTICLE
+            self.stats["articles"] += 1
+        else:
+            # The title and the teaser are all there is.
+            stats = self.analyzer.analyze(f"{record.title}\n{record.description}")
+            record.article_source = self.TEASER
+            self.stats["teasers"] += 1
+        metrics.count(f"enrichment.{record.article_source}")
+        record.article_words = stats.words
+        record.article_phrase_count = stats.phrase_counts[self.phrase]
+        record.article_money = stats.money
+        return record
+
+    def close(self) -> None:
+        """Drops the articles still queued and releases the connection pool.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
+        if self.stats:
+            logger.info(
+                f"Article enrichment: {self.stats['articles']} articles, "
+                f"{self.stats['teasers']} teaser only ({self.stats['timeouts']} timed out, "
+                f"{self.stats['failures']} failed)")
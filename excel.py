@@ -1,34 +1,97 @@
-from RPA.Excel.Files import Files
-import os
+from typing import List
+
+from metrics import metrics
+from news_model import NewsRecord
 
 
 class Excel:
-    def __init__(self) -> None:
-        self.files = Files()
+    """Writes the news into a single workbook that stays open for the whole run.
+
+    The rows are appended as the pages come in and the workbook is saved once when
+    it is closed. Without checkpoints the workbook is built in openpyxl's
+    write-only mode, which streams the rows out in constant memory.
+    """
 
-    def create_excel(self, worksheet_data: dict, filepath: str, index) -> None:
-        """Creates an Excel file with the given news data.
+    LAYOUTS = ("pages", "single")
+    COLUMNS = ("Title", "Description", "Date", "Image FileName",
+               "Count of Search Phrase", "Money Present")
+    # Added by the article enrichment.
+    ARTICLE_COLUMNS = ("Article Words", "Article Count of Search Phrase",
+                       "Article Money Present", "Article Source")
+
+    def __init__(self, filepath: str, layout: str = "pages", checkpoint_every: int = 0, articles: bool = False) -> None:
+        """Initializes the writer.
             Args:
-                worksheet_data: Dictionary having all news data.
                 filepath: Path of the Excel file.
+                layout: "pages" for one worksheet per results page, "single" for one consolidated worksheet.
+                checkpoint_every: Save the workbook every that many pages, 0 saves it only when closed.
+                articles: Also write the ARTICLE_COLUMNS of the article enrichment.
+            Returns:
+                None.
+        """
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown workbook layout {layout}")
+        self.filepath = filepath
+        self.layout = layout
+        self.checkpoint_every = checkpoint_every
+        self.articles = articles
+        self.workbook = None
+        self.sheet = None
+        self.sheet_index = None
+        self.pages = 0
+
+    def open(self) -> None:
+        """Creates the workbook the news will be appended to.
+        """
+        # openpyxl takes a while to import, leave it out of the startup.
+        from openpyxl import Workbook
+
+        self.workbook = Workbook(write_only=not self.checkpoint_every)
+        if not self.checkpoint_every:
+            return
+        # Only a regular workbook comes with a default sheet.
+        self.workbook.remove(self.workbook.active)
+
+    @metrics.timed("excel.append")
+    def append(self, records: List[NewsRecord], index) -> None:
+        """Appends a batch of news records of a results page to the workbook.
+            Args:
+                records: The news records, a page may come in several batches.
+                index: Number of the results page.
             Returns:
                 None.
         """
-        # try:
-        if os.path.exists(filepath):
-            self.files.open_workbook(filepath)
-            self.files.create_worksheet(
-                name=f"Page-{index}", content=worksheet_data, header=True)
-            if self.files.worksheet_exists(name="Sheet"):
-                self.files.remove_worksheet(name="Sheet")
-            self.files.save_workbook(filepath)
-        else:
-            self.files.create_workbook()
-            self.files.create_worksheet(
-                name=f"Page-{index}", content=worksheet_data, header=True)
-            if self.files.worksheet_exists(name="Sheet"):
-                self.files.remove_worksheet(name="Sheet")
-            self.files.save_workbook(filepath)
-
-        # except Exception as e:
-        #    print(f"Error in creating excel---{e}")
+        if self.workbook is None:
+            self.open()
+
+        if self.sheet is None or index != self.sheet_index:
+            self.new_page()
+            if self.layout == "pages" or self.sheet is None:
+                name = f"Page-{index}" if self.layout == "pages" else "News"
+                self.sheet = self.workbook.create_sheet(title=name)
+                self.sheet.append(list(self.COLUMNS) + (
+                    list(self.ARTICLE_COLUMNS) if self.articles else []))
+            self.sheet_index = index
+
+        for record in records:
+            if self.articles:
+                self.sheet.append(record.row() + record.article_row())
+            else:
+                self.sheet.append(record.row())
+
+    def new_page(self) -> None:
+        # The pages before this one are complete, save them every checkpoint_every pages.
+        if self.checkpoint_every and self.pages and self.pages % self.checkpoint_every == 0:
+            self.workbook.save(self.filepath)
+        self.pages += 1
+
+    @metrics.timed("excel.save")
+    def close(self) -> None:
+        """Saves the workbook if any news was appended to it.
+        """
+        if self.workbook is None:
+            return
+        self.workbook.save(self.filepath)
+        self.workbook = None
+        self.sheet = None
+        self.sheet_index = None
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Callable, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from logger import logger
+from metrics import metrics
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    url TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    stored_at REAL NOT NULL,
+    used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_used_at ON entries (used_at);
+"""
+# Response headers kept with a cached body.
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def pooled_session(connections: int, hosts: Optional[int] = None) -> requests.Session:
+    """Creates a session whose keep-alive connections are shared by several threads.
+        Args:
+            connections (int): Connections kept open per host, the threads using the session.
+            hosts (int): Hosts connections are kept open to, as many as connections by default.
+        Returns:
+            requests.Session: The session.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=hosts or connections, pool_maxsize=connections)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class HttpCache:
+    """On-disk cache of the search pages and images fetched over HTTP.
+
+    The bodies are stored once per content hash under blobs/ and an SQLite index
+    maps every URL to its body and validators. A fresh entry is served without a
+    request, a stale one is revalidated with If-None-Match / If-Modified-Since.
+    Once the bodies take more than `max_bytes` the least recently used entries
+    are evicted. Blobs are written to a temporary file and renamed into place,
+    so several threads and processes can share the same directory.
+    """
+
+    def __init__(self, directory: str, ttl: float = 900, max_bytes: int = 256 * 2 ** 20) -> None:
+        """Opens the cache.
+            Args:
+                directory (str): Directory of the cache.
+                ttl (float): Seconds an entry is used without revalidation.
+                max_bytes (int): Size the stored bodies are kept under.
+            Returns:
+                None.
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.blob_dir = os.path.join(directory, "blobs")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite3"), timeout=30,
+            isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.stats: Counter = Counter()
+        # The size limit may have been lowered since the last run.
+        self.evict()
+
+    def get(self, session: requests.Session, url: str, timeout: float = 30,
+            cacheable: Optional[Callable[[requests.Response], bool]] = None,
+            **kwargs) -> Tuple[requests.Response, bool]:
+        """Gets a URL through the cache.
+            Args:
+                session (requests.Session): The session to send the request with.
+                url (str): The URL.
+                timeout (float): Timeout of the request in seconds.
+                cacheable (Callable): Tells whether a 200 response may be stored, all of them may by default.
+            Returns:
+                Tuple[requests.Response, bool]: The response and whether it was served without a request.
+        """
+        entry = self._lookup(url)
+        if entry is not None and time.time() - entry["stored_at"] < self.ttl:
+            response = self._response(url, entry)
+            if response is not None:
+                self._count("hit")
+                self._touch(url, refresh=False)
+                return response, True
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+        response = session.get(url, timeout=timeout, headers=headers, **kwargs)
+
+        if response.status_code == 304 and entry is not None:
+            cached = self._response(url, entry)
+            if cached is not None:
+                self._count("revalidated")
+                self._touch(url, refresh=True)
+                return cached, False
+            # The body was evicted meanwhile, fetch it again.
+            headers.pop("If-None-Match", None)
+            headers.pop("If-Modified-Since", None)
+            response = session.get(url, timeout=timeout, headers=headers, **kwargs)
+
+        self._count("miss")
+        if response.status_code == 200 and "no-store" not in response.headers.get("Cache-Control", "") \
+                and (cacheable is None or cacheable(response)):
+            self._store(url, response)
+        return response, False
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self.stats[name] += 1
+        metrics.count(f"http_cache.{name}")
+
+    def _lookup(self, url: str) -> Optional[dict]:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT digest, headers, etag, last_modified, stored_at FROM entries WHERE url = ?",
+                (url,)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("digest", "headers", "etag", "last_modified", "stored_at"), row))
+
+    def _touch(self, url: str, refresh: bool) -> None:
+        now = time.time()
+        with self._lock:
+            if refresh:
+                self.connection.execute(
+                    "UPDATE entries SET used_at = ?, stored_at = ? WHERE url = ?", (now, now, url))
+            else:
+                self.connection.execute(
+                    "UPDATE entries SET used_at = ? WHERE url = ?", (now, url))
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def _response(self, url: str, entry: dict) -> Optional[requests.Response]:
+        try:
+            with open(self._blob_path(entry["digest"]), "rb") as file:
+                content = file.read()
+        except FileNotFoundError:
+            return None
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = "OK"
+        response.url = url
+        response.headers = CaseInsensitiveDict(json.loads(entry["headers"]))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        return response
+
+    def _store(self, url: str, response: requests.Response) -> None:
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handle, temporary = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(handle, "wb") as file:
+                file.write(content)
+            os.replace(temporary, path)
+
+        headers = {name: response.headers[name]
+                   for name in KEPT_HEADERS if name in response.headers}
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, digest, len(content), json.dumps(headers), headers.get("ETag"),
+                 headers.get("Last-Modified"), now, now))
+        self.evict()
+
+    def size(self) -> int:
+        """Returns the size of the stored bodies in bytes.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT SUM(size) FROM (SELECT DISTINCT digest, size FROM entries)").fetchone()
+        return row[0] or 0
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the bodies fit in max_bytes.
+        """
+        excess = self.size() - self.max_bytes
+        if excess <= 0:
+            return
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT url, digest, size FROM entries ORDER BY used_at").fetchall()
+            for url, digest, size in rows:
+                if excess <= 0:
+                    break
+                self.connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self.stats["evicted"] += 1
+                shared = self.connection.execute(
+                    "SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+                if shared is None:
+                    excess -= size
+                    try:
+                        os.remove(self._blob_path(digest))
+                    except FileNotFoundError:
+                        pass
+
+    def report(self) -> None:
+        """Logs the hit and miss counts of the run.
+        """
+        requests_served = self.stats["hit"] + self.stats["revalidated"] + self.stats["miss"]
+        if not requests_served or self.connection is None:
+            return
+        logger.info(
+            f"HTTP cache: {self.stats['hit']} hits, {self.stats['revalidated']} revalidated, "
+            f"{self.stats['miss']} misses, {self.stats['evicted']} evicted, "
+            f"{self.size() / 2 ** 20:.1f} MB stored")
+
+    def close(self) -> None:
+        # Closing twice is harmless, the owner may close it on several paths.
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
@@ -0,0 +1,242 @@
+import math
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional, Tuple, Union
+
+import requests
+from retry.api import retry_call
+
+from config import RunConfig
+from directories import DIRS, OutputDirs
+from http_cache import pooled_session
+from logger import logger
+from metrics import metrics
+from nyposts import NyPosts
+from story_parser import ResultsPage, StoryCard, parse_results
+
+
+BLOCKED_STATUSES = (401, 403, 429, 503)
+BLOCKED_MARKERS = (
+    "px-captcha",
+    "cf-challenge",
+    "Access to this page has been denied",
+    "Please verify you are a human",
+)
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+)
+
+
+class BlockedError(Exception):
+    """Raised when the site answers with an anti-bot page instead of the content.
+    """
+
+
+def is_blocked(response: requests.Response) -> bool:
+    """Tells whether the site answered with an anti-bot page, which may come with a 200 status.
+    """
+    return response.status_code in BLOCKED_STATUSES or any(
+        marker in response.text for marker in BLOCKED_MARKERS)
+
+
+class HttpNyPosts(NyPosts):
+    """Scrapes the server rendered search results over plain HTTP, without a browser.
+
+    The filters the browser engine clicks through are turned into the query of
+    the results URLs and the pages are fetched with a pooled session.
+    """
+
+    def __init__(self, workitem: Union[None, dict, RunConfig] = None, dirs: OutputDirs = DIRS, browser=None,
+                 excel=None, images=None, cache=None, page_index=None) -> None:
+        """Initializes the object.
+            Args:
+                workitem: The run config or the work item data, read from the input work item if not given.
+                dirs: The output directories.
+                browser: Unused, accepted for the same signature as NyPosts.
+                excel: The sink the news is appended to, an Excel workbook in the output directory by default.
+                images: A shared image downloader to queue the images on, it is left running on close.
+                cache: A shared HTTP cache, it is left open on close.
+                page_index: The PageIndex shared by the month shards of the search, if any.
+            Returns:
+                None.
+        """
+        super().__init__(workitem, dirs, browser, excel, images, cache, page_index)
+        self.session = pooled_session(8, hosts=4)
+        self.session.headers["User-Agent"] = USER_AGENT
+        self.page_workers = self.config.page_workers
+        self.results = None
+        self.html = ""
+
+    def new_browser(self):
+        # The pages are fetched over HTTP, the browser library is not even imported.
+        return None
+
+    @metrics.timed("http.fetch")
+    def fetch(self, url: str) -> str:
+        """Fetches a page of the website.
+            Args:
+                url (str): The URL of the page.
+            Returns:
+                str: The HTML of the page.
+            Raises:
+                BlockedError: If an anti-bot page is served instead.
+        """
+        response, cached = retry_call(
+            self.get, fargs=[url], exceptions=(requests.ConnectionError, requests.Timeout),
+            tries=self.config.story_retries, delay=self.config.retry_delay, backoff=2, logger=logger)
+        if not cached:
+            metrics.count("http_requests")
+            metrics.count("bytes_downloaded", len(response.content))
+        if is_blocked(response):
+            raise BlockedError(f"{url} answered with an anti-bot page")
+        if response.status_code == 404:
+            # Past the last results page.
+            return ""
+        response.raise_for_status()
+        return response.text
+
+    def get(self, url: str) -> Tuple[requests.Response, bool]:
+        """Gets a URL through the HTTP cache, if there is one.
+            Returns:
+                Tuple[requests.Response, bool]: The response and whether it came from the cache.
+        """
+        if self.cache is not None:
+            # An anti-bot page must not be served from the cache to the next runs.
+            return self.cache.get(self.session, url, timeout=30,
+                                  cacheable=lambda response: not is_blocked(response))
+        return self.session.get(url, timeout=30), False
+
+    def load(self, url: str) -> ResultsPage:
+        """Fetches and parses a search results page.
+            Args:
+                url (str): The URL of the results page.
+            Returns:
+                ResultsPage: The parsed page.
+        """
+        self.html = self.fetch(url)
+        self.results = parse_results(self.html, url)
+        return self.results
+
+    def fetch_page(self, page: int) -> Tuple[str, ResultsPage]:
+        """Fetches and parses a results page without making it the current one.
+
+        A page a month shard of the search already probed is not fetched again.
+            Args:
+                page (int): Number of the results page.
+            Returns:
+                Tuple[str, ResultsPage]: The HTML and the parsed page.
+        """
+        if self.page_index is not None:
+            probed = self.page_index.get(page)
+            if probed is not None:
+                return probed
+        return self.probe_page(page)
+
+    def probe_page(self, page: int) -> Tuple[str, ResultsPage]:
+        """Fetches and parses a results page by its URL.
+        """
+        url = self.results_url(page)
+        html = self.fetch(url)
+        return html, parse_results(html, url)
+
+    def number_of_pages(self) -> Optional[int]:
+        """Gets the number of results pages from the result count of the first page.
+        Returns:
+            int: The number of pages, None if the first page does not tell.
+        """
+        if not self.results or not self.results.total or not self.results.stories:
+            return None
+        return math.ceil(self.results.total / len(self.results.stories))
+
+    @metrics.timed("open_website")
+    def open_website(self) -> None:
+        """Opens the home page to start the session with the site cookies.
+        """
+        self.html = self.fetch(f"{self.base_url}/")
+
+    @metrics.timed("phrase_search")
+    def phrase_search(self) -> Tuple[bool, str]:
+        """Searches the website for the phrase and returns a msg indicating whether the news for the phrase is available or not.
+            Returns:
+                str: A msg indicating whether the news for the phrase is available or not.
+        """
+        msg = ''
+        results = self.load(self.results_url())
+        logger.info("Search phrase done.")
+
+        available_news = bool(results.stories) and not results.no_results
+        if not available_news:
+            msg = f"No news found for the phrase {self.phrase}"
+        return available_news, msg
+
+    def sort_by(self):
+        """Sorts the news by the newest first.
+        """
+        logger.info("sorting...")
+        self.orderby = "date"
+        self.results = None
+
+    def select_sections(self):
+        """Selects the specified sections.
+        """
+        logger.info("selecting sections..")
+        self.sections = [sec.lower().replace(" ", "-")
+                         for sec in self.section_names()]
+        self.results = None
+        logger.info("done selecting sections..")
+
+    @metrics.timed("get_required_data")
+    def get_required_data(self):
+        """Gets the required news data.
+
+        The results pages are addressed directly by their number and fetched
+        `page_workers` at a time, then processed in page order so that the news
+        stays in "Newest" order. No further page is processed once one crosses
+        the date window.
+        """
+        start = self.first_page()
+        if start is None:
+            return
+        if self.results is None or start > 1:
+            self.html, self.results = self.fetch_page(start)
+        limit = self.number_of_pages()
+
+        with ThreadPoolExecutor(max_workers=self.page_workers) as pool:
+            pending = {}
+            page = start
+            while limit is None or page <= limit:
+                for ahead in range(page, page + self.page_workers):
+                    if ahead == start or ahead in pending or (limit and ahead > limit):
+                        continue
+                    pending[ahead] = pool.submit(self.fetch_page, ahead)
+
+                logger.info("getting required data...")
+                if page > start:
+                    self.html, self.results = pending.pop(page).result()
+                if self.results.no_results or not self.results.stories:
+                    break
+                if not self.send_to_excel(page):
+                    break
+                logger.info(f"page {page} done..")
+                page += 1
+
+            for future in pending.values():
+                future.cancel()
+
+    def extract_stories(self) -> Iterator[StoryCard]:
+        """Extracts the stories of the last fetched results page.
+        """
+        return iter(self.results.stories if self.results else [])
+
+    def release_stories(self, count: int) -> None:
+        # Every fetched page is a fresh document, there is nothing to detach.
+        self.consumed_stories = 0
+
+    def save_error_evidence(self) -> None:
+        """Saves the HTML of the page the process failed on.
+        """
+        with open(self.dirs.ERROR_PAGE_PATH, "w", encoding="utf-8") as file:
+            file.write(self.html)
+
+    def _close_transport(self):
+        self.session.close()
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from archive import ZipArchiveSink
+from http_cache import HttpCache, pooled_session
+from logger import logger
+from metrics import metrics
+
+
+class ImageDownloader:
+    """Downloads the story images in the background while the scraping goes on.
+
+    Images are fetched by a bounded thread pool sharing one keep-alive connection
+    pool, with a concurrency limit per host, and written straight into the output
+    zip archive. A URL is only fetched once and an image already downloaded under
+    another URL is stored once: zip entries cannot be linked, so the name map
+    written next to the archive points the later file names at the first one.
+    """
+
+    def __init__(self, archive_path: str, workers: int = 8, per_host: int = 4, timeout: int = 30, checkpoint_every: int = 25,
+                 cache: Optional[HttpCache] = None, append: bool = False) -> None:
+        """Initializes the downloader.
+            Args:
+                archive_path (str): The zip archive the images are stored in.
+                workers (int): Number of download threads.
+                per_host (int): Maximum number of concurrent downloads from the same host.
+                timeout (int): Timeout of a single download in seconds.
+                checkpoint_every (int): Number of images between two checkpoints of the archive.
+                cache (HttpCache): The HTTP cache the images are fetched through, if any.
+                append (bool): Keep the images a failed or killed run stored in the archive.
+            Returns:
+                None.
+        """
+        self.archive = ZipArchiveSink(
+            archive_path, append=append, checkpoint_every=checkpoint_every)
+        self.names_path = os.path.splitext(archive_path)[0] + ".names.json"
+        self.duplicates: Dict[str, str] = {}
+        if os.path.exists(self.names_path):
+            if append and self.archive.names:
+                with open(self.names_path, encoding="utf-8") as file:
+                    self.duplicates = json.load(file)
+            else:
+                os.remove(self.names_path)
+        self.per_host = per_host
+        self.timeout = timeout
+        self.cache = cache
+        self.session = pooled_session(workers)
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="image")
+        self._lock = threading.Lock()
+        self._host_limits: Dict[str, threading.BoundedSemaphore] = {}
+        self._by_url: Dict[str, str] = {}
+        self._by_hash: Dict[str, str] = {}
+        self._futures: List[Future] = []
+
+    def queue(self, url: str, filename: str) -> str:
+        """Queues an image for download.
+            Args:
+                url (str): The URL of the image.
+                filename (str): The file name the image should be stored under.
+            Returns:
+                str: The file name the image will be available under.
+        """
+        with self._lock:
+            if url in self._by_url:
+                return self._by_url[url]
+            self._by_url[url] = filename
+            if filename in self.archive.names or filename in self.duplicates:
+                # Stored by the failed run this one resumes.
+                return filename
+            self._futures.append(
+                self.executor.submit(self._download, url, filename))
+        return filename
+
+    def _host_limit(self, url: str) -> threading.BoundedSemaphore:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(
+                    self.per_host)
+            return self._host_limits[host]
+
+    @metrics.timed("image.download")
+    def _download(self, url: str, filename: str) -> None:
+        with self._host_limit(url):
+            if self.cache is not None:
+                response, cached = self.cache.get(
+                    self.session, url, timeout=self.timeout)
+            else:
+                response, cached = self.session.get(
+                    url, timeout=self.timeout), False
+            response.raise_for_status()
+            content = response.content
+        metrics.count("images_downloaded")
+        if not cached:
+            metrics.count("bytes_downloaded", len(content))
+
+        digest = hashlib.sha256(content).hexdigest()
+        with self._lock:
+            stored = self._by_hash.setdefault(digest, filename)
+            if stored != filename:
+                self.duplicates[filename] = stored
+        if stored != filename:
+            metrics.count("images_duplicate")
+            return
+        self.archive.write(filename, content)
+
+    def write_names(self) -> None:
+        """Writes the name map of the duplicate images, from their file name to the one they are stored under.
+        """
+        with self._lock:
+            if not self.duplicates:
+                return
+            names = dict(self.duplicates)
+        with open(self.names_path + ".partial", "w", encoding="utf-8") as file:
+            json.dump(names, file, indent=1, sort_keys=True)
+        os.replace(self.names_path + ".partial", self.names_path)
+
+    @metrics.timed("images.join")
+    def join(self) -> int:
+        """Waits until all the queued images are downloaded.
+            Returns:
+                int: Number of images that could not be downloaded.
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+        wait(futures)
+        failed = 0
+        for future in futures:
+            error = future.exception()
+            if error is not None:
+                failed += 1
+                logger.info(f"Image download failed: {error}")
+        self.archive.checkpoint()
+        self.write_names()
+        return failed
+
+    def close(self, complete: bool = True) -> None:
+        """Stops the worker threads, releases the connection pool and finalizes the archive.
+            Args:
+                complete (bool): Whether the run is complete, see ZipArchiveSink.close.
+            Returns:
+                None.
+        """
+        self.executor.shutdown(wait=True)
+        self.session.close()
+        self.archive.close(complete)
+        self.write_names()
@@ -0,0 +1,205 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List
+
+from logger import logger
+
+
+# Upper bounds of the latency histogram buckets, in milliseconds.
+BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+# Percentiles of the spans in the report.
+PERCENTILES = (50, 95, 99)
+_DISABLED = nullcontext()
+
+
+class SpanStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        milliseconds = seconds * 1000
+        for index, bound in enumerate(BUCKETS_MS):
+            if milliseconds <= bound:
+                self.buckets[index] += 1
+                return
+        self.buckets[-1] += 1
+
+    def percentile(self, percent: float) -> float:
+        """Returns the upper bound of the bucket the percentile falls in, in milliseconds,
+        or the longest span if that is shorter.
+        """
+        rank = self.count * percent / 100
+        seen = 0
+        for bound, n in zip(BUCKETS_MS, self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(bound, round(self.max * 1000, 3))
+        return round(self.max * 1000, 3)
+
+    def report(self) -> dict:
+        labels = [f"<={bound}ms" for bound in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "total_s": round(self.total, 6),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0,
+            "max_ms": round(self.max * 1000, 3),
+            **{f"p{percent}_ms": self.percentile(percent) if self.count else 0
+               for percent in PERCENTILES},
+            "histogram": {label: n for label, n in zip(labels, self.buckets) if n},
+        }
+
+
+class Metrics:
+    """Collects timing spans, counters and latency histograms of a run.
+
+    Spans nest per thread, so every span is recorded under the path of the spans
+    it runs in, e.g. "run;get_required_data;driver.get_source". Until enable() is
+    called, span() returns a shared no-op context manager and nothing is recorded.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.counters: Counter = Counter()
+        self.spans: Dict[str, SpanStats] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.spans.clear()
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def span(self, name: str):
+        """Times the enclosed block.
+            Args:
+                name (str): Name of the stage.
+            Returns:
+                A context manager.
+        """
+        if not self.enabled:
+            return _DISABLED
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name: str):
+        stack = self._stack()
+        stack.append(name)
+        path = ";".join(stack)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(path, time.perf_counter() - started)
+            stack.pop()
+
+    def timed(self, name: str):
+        """Decorator timing every call of the function as a span.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._span(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def observe(self, path: str, seconds: float) -> None:
+        with self._lock:
+            stats = self.spans.get(path)
+            if stats is None:
+                stats = self.spans[path] = SpanStats()
+            stats.add(seconds)
+
+    def count(self, name: str, value: int = 1) -> None:
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += value
+
+    def report(self) -> dict:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "spans": {path: stats.report() for path, stats in sorted(self.spans.items())},
+            }
+
+    def folded(self) -> List[str]:
+        """Returns the spans in the folded stack format of flame graph tools,
+        with the self time of every path in microseconds.
+        """
+        with self._lock:
+            totals = {path: stats.total for path, stats in self.spans.items()}
+        self_times = dict(totals)
+        for path, total in totals.items():
+            parent = path.rpartition(";")[0]
+            if parent in self_times:
+                self_times[parent] -= total
+        return [f"{path} {max(0, round(seconds * 1e6))}"
+                for path, seconds in sorted(self_times.items())]
+
+    def write(self, directory: str) -> None:
+        """Writes metrics.json and the flame graph input metrics.folded into the directory.
+        """
+        if not self.enabled:
+            return
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, "metrics.json"), "w", encoding="utf-8") as file:
+            json.dump(self.report(), file, indent=2)
+        with open(os.path.join(directory, "metrics.folded"), "w", encoding="utf-8") as file:
+            file.write("\n".join(self.folded()) + "\n")
+
+        top = sorted(self.spans.items(), key=lambda item: item[1].total, reverse=True)
+        for path, stats in top[:10]:
+            logger.info(f"{stats.total:9.3f}s {stats.count:6d}x  {path}")
+
+
+class TracedBrowser:
+    """Proxy of the Selenium library that times every keyword call as a driver span.
+    """
+
+    def __init__(self, browser, metrics: Metrics) -> None:
+        self._browser = browser
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        attribute = getattr(self._browser, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            self._metrics.count("driver_calls")
+            with self._metrics.span(f"driver.{name}"):
+                return attribute(*args, **kwargs)
+        return call
+
+
+metrics = Metrics()
+
+
+def traced(browser):
+    """Wraps the browser in a TracedBrowser when the metrics are enabled.
+    """
+    return TracedBrowser(browser, metrics) if metrics.enabled and browser is not None else browser
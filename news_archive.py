@@ -0,0 +1,282 @@
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional
+
+from logger import logger
+from metrics import metrics
+from news_model import NewsRecord, batched
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS news (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    published TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    date TEXT NOT NULL,
+    image_src TEXT NOT NULL,
+    image_filename TEXT NOT NULL,
+    phrase_count TEXT NOT NULL,
+    money_present INTEGER NOT NULL,
+    article_words INTEGER,
+    article_phrase_count INTEGER,
+    article_money INTEGER,
+    article_source TEXT,
+    first_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_seen TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (url, published)
+);
+CREATE INDEX IF NOT EXISTS news_published ON news (published);
+CREATE TABLE IF NOT EXISTS hits (
+    phrase TEXT NOT NULL COLLATE NOCASE,
+    section TEXT NOT NULL COLLATE NOCASE,
+    news_id INTEGER NOT NULL REFERENCES news (id),
+    PRIMARY KEY (phrase, section, news_id)
+) WITHOUT ROWID;
+"""
+# Left out by SQLite builds without FTS5.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS news_fts USING fts5(
+    title, description, content='news', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS news_fts_insert AFTER INSERT ON news BEGIN
+    INSERT INTO news_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+CREATE TRIGGER IF NOT EXISTS news_fts_update AFTER UPDATE OF title, description ON news BEGIN
+    INSERT INTO news_fts (news_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO news_fts (rowid, title, description) VALUES (new.id, new.title, new.description);
+END;
+"""
+UPSERT = """
+INSERT INTO news (url, published, title, description, date, image_src, image_filename,
+                  phrase_count, money_present, article_words, article_phrase_count,
+                  article_money, article_source)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (url, published) DO UPDATE SET
+    title = excluded.title,
+    description = excluded.description,
+    date = excluded.date,
+    image_src = excluded.image_src,
+    image_filename = excluded.image_filename,
+    phrase_count = excluded.phrase_count,
+    money_present = excluded.money_present,
+    article_words = COALESCE(excluded.article_words, article_words),
+    article_phrase_count = COALESCE(excluded.article_phrase_count, article_phrase_count),
+    article_money = COALESCE(excluded.article_money, article_money),
+    article_source = COALESCE(excluded.article_source, article_source),
+    last_seen = CURRENT_TIMESTAMP
+"""
+# Columns read back into a NewsRecord, in the order of its constructor and then its analytics.
+RECORD_COLUMNS = ("title", "description", "date", "url", "image_src", "image_filename",
+                  "phrase_count", "money_present", "article_words", "article_phrase_count",
+                  "article_money", "article_source")
+
+
+def published_on(record: NewsRecord) -> str:
+    """Returns the ISO day a record was published on, from its "Month D, YYYY" date.
+    """
+    return datetime.strptime(record.date, '%B %d, %Y').date().isoformat()
+
+
+def section_key(section: str) -> str:
+    """Normalizes a section name the way the search URL spells it.
+    """
+    return section.strip().lower().replace(" ", "-")
+
+
+class NewsArchive:
+    """Local store of the news of every run, searchable across runs.
+
+    A sink like the Excel workbook: every batch of records is upserted by article
+    URL and publication day and committed right away, so the news of a failed
+    run is kept as well. The phrase and sections a record was found for are kept
+    aside, and the titles and descriptions are indexed with SQLite FTS5. Where
+    FTS5 is not available the text searches scan the news instead.
+    """
+
+    def __init__(self, path: str, phrase: str = "", sections: Iterable[str] = ()) -> None:
+        """Opens the archive.
+            Args:
+                path (str): Path of the SQLite database.
+                phrase (str): The search phrase the appended records were found for.
+                sections (Iterable[str]): The sections they were found in, none for all sections.
+            Returns:
+                None.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.phrase = phrase.strip()
+        self.sections = [section_key(section) for section in sections] or [""]
+        self._lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        try:
+            self.connection.executescript(FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError as e:
+            logger.info(f"News archive without full-text search: {e}")
+            self.full_text = False
+
+    @metrics.timed("archive.append")
+    def append(self, records: List[NewsRecord], index=None) -> None:
+        """Upserts a batch of news records.
+            Args:
+                records: The news records.
+                index: Number of the results page, unused.
+            Returns:
+                None.
+        """
+        with self._lock, self.connection:
+            for record in records:
+                url = record.url or f'{record.title}|{record.date}'
+                published = published_on(record)
+                enriched = bool(record.article_source)
+                self.connection.execute(UPSERT, (
+                    url, published, record.title, record.description, record.date,
+                    record.image_src, record.image_filename, str(record.phrase_count),
+                    int(record.money_present),
+                    record.article_words if enriched else None,
+                    record.article_phrase_count if enriched else None,
+                    int(record.article_money) if enriched else None,
+                    record.article_source or None))
+                if not self.phrase:
+                    continue
+                news_id = self.connection.execute(
+                    "SELECT id FROM news WHERE url = ? AND published = ?",
+                    (url, published)).fetchone()[0]
+                self.connection.executemany(
+                    "INSERT OR IGNORE INTO hits (phrase, section, news_id) VALUES (?, ?, ?)",
+                    [(self.phrase, section, news_id) for section in self.sections])
+
+    def search(self, text: str = "", phrase: str = "", section: Optional[str] = None,
+               since: Optional[date] = None, until: Optional[date] = None,
+               limit: int = 0) -> Iterator[NewsRecord]:
+        """Searches the archived news, newest first.
+            Args:
+                text (str): FTS5 query matched against the titles and descriptions, without FTS5
+                    a text they contain.
+                phrase (str): Only the news found for this search phrase.
+                section (str): Only the news found in this section, "" for the searches of all sections.
+                since (date): Only the news published on this day or later.
+                until (date): Only the news published on this day or earlier.
+                limit (int): The most news returned, 0 for all of them.
+            Returns:
+                Iterator[NewsRecord]: The matching news.
+        """
+        query = f"SELECT {', '.join(f'news.{column}' for column in RECORD_COLUMNS)} FROM news"
+        conditions, params = [], []
+        if text and self.full_text:
+            query += " JOIN news_fts ON news_fts.rowid = news.id"
+            conditions.append("news_fts MATCH ?")
+            params.append(text)
+        elif text:
+            conditions.append("(news.title LIKE ? OR news.description LIKE ?)")
+            params += [f"%{text}%"] * 2
+        if phrase or section is not None:
+            hit = ["hits.news_id = news.id"]
+            if phrase:
+                hit.append("hits.phrase = ?")
+                params.append(phrase.strip())
+            if section is not None:
+                hit.append("hits.section = ?")
+                params.append(section_key(section))
+            conditions.append(f"EXISTS (SELECT 1 FROM hits WHERE {' AND '.join(hit)})")
+        if since is not None:
+            conditions.append("news.published >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            conditions.append("news.published <= ?")
+            params.append(until.isoformat())
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY news.published DESC, news.id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        with self._lock:
+            rows = self.connection.execute(query, params).fetchall()
+        for row in rows:
+            values = dict(zip(RECORD_COLUMNS, row))
+            record = NewsRecord(*row[:6])
+            record.phrase_count = values["phrase_count"]
+            record.money_present = bool(values["money_present"])
+            if values["article_source"] is not None:
+                record.article_words = values["article_words"]
+                record.article_phrase_count = values["article_phrase_count"]
+                record.article_money = bool(values["article_money"])
+                record.article_source = values["article_source"]
+            yield record
+
+    def write_report(self, records: Iterable[NewsRecord], filepath: str, articles: bool = False,
+                     batch_size: int = 50) -> int:
+        """Writes news into a single worksheet Excel report, without scraping them again.
+            Args:
+                records: The news, as returned by search().
+                filepath: Path of the Excel file.
+                articles: Also write the columns of the article enrichment.
+                batch_size: Number of records appended at a time.
+            Returns:
+                int: Number of news written.
+        """
+        from excel import Excel
+
+        excel = Excel(filepath, layout="single", articles=articles)
+        written = 0
+        for batch in batched(records, batch_size):
+            excel.append(batch, 1)
+            written += len(batch)
+        excel.close()
+        return written
+
+    def close(self) -> None:
+        self.connection.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    from directories import NEWS_ARCHIVE_PATH
+
+    parser = argparse.ArgumentParser(description="Searches the news archived by the runs.")
+    parser.add_argument("text", nargs="?", default="",
+                        help="FTS5 query on the titles and descriptions, e.g. 'tariff OR trade'")
+    parser.add_argument("--phrase", default="", help="search phrase the news was found for")
+    parser.add_argument("--section", help="section the news was found in, '' for all sections")
+    parser.add_argument("--since", type=date.fromisoformat, help="first publication day, YYYY-MM-DD")
+    parser.add_argument("--until", type=date.fromisoformat, help="last publication day, YYYY-MM-DD")
+    parser.add_argument("--limit", type=int, default=0, help="most news listed, 0 for all")
+    parser.add_argument("--excel", help="write the news into this Excel report instead of listing them")
+    parser.add_argument("--articles", action="store_true",
+                        help="add the article enrichment columns to the Excel report")
+    parser.add_argument("--db", default=NEWS_ARCHIVE_PATH, help="path of the archive")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.db):
+        parser.error(f"No news archive at {args.db}")
+    archive = NewsArchive(args.db)
+    try:
+        started = time.perf_counter()
+        records = archive.search(args.text, args.phrase, args.section, args.since,
+                                 args.until, args.limit)
+        if args.excel:
+            written = archive.write_report(records, args.excel, articles=args.articles)
+            print(f"{written} news written to {args.excel}")
+        else:
+            written = 0
+            for record in records:
+                print(f"{published_on(record)}  {record.title}  {record.url}")
+                written += 1
+        print(f"{written} news found in {(time.perf_counter() - started) * 1000:.1f} ms")
+    except sqlite3.OperationalError as e:
+        parser.error(f"Invalid search: {e}")
+    finally:
+        archive.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,55 @@
-class NewsData:
-    def __init__(self, data: tuple) -> None:
-        """Initializes the model and stores the tuple in its variables.
+from itertools import islice
+from typing import Iterable, Iterator, List
+
+
+class NewsRecord:
+    """A single news story as it goes through the pipeline and into the sinks.
+    """
+
+    __slots__ = ("title", "description", "date", "url", "image_src",
+                 "image_filename", "phrase_count", "money_present",
+                 "article_words", "article_phrase_count", "article_money", "article_source")
+
+    def __init__(self, title: str, description: str, date: str, url: str = "", image_src: str = "",
+                 image_filename: str = "") -> None:
+        """Initializes the record with the scraped fields, the analytics are filled in later.
         """
-        self.title_list = data[0]
-        self.date_list = data[1]
-        self.description_list = data[2]
-        self.image_file_list = data[3]
-        self.money_present_list = data[4]
-        self.count_phrase_list = data[5]
+        self.title = title
+        self.description = description
+        self.date = date
+        self.url = url
+        self.image_src = image_src
+        self.image_filename = image_filename
+        self.phrase_count = ""
+        self.money_present = False
+        self.article_words = 0
+        self.article_phrase_count = 0
+        self.article_money = False
+        self.article_source = ""
+
+    def row(self) -> tuple:
+        """Returns the values of the Excel columns, in the order of Excel.COLUMNS.
+        """
+        return (self.title, self.description, self.date, self.image_filename,
+                self.phrase_count, self.money_present)
+
+    def article_row(self) -> tuple:
+        """Returns the values of the article columns, in the order of Excel.ARTICLE_COLUMNS.
+        """
+        return (self.article_words, self.article_phrase_count, self.article_money,
+                self.article_source)
+
+
+def batched(records: Iterable[NewsRecord], size: int) -> Iterator[List[NewsRecord]]:
+    """Groups the records into lists of at most `size` records.
+        Args:
+            records (Iterable[NewsRecord]): The records.
+            size (int): Maximum number of records in a batch.
+        Returns:
+            Iterator[List[NewsRecord]]: The batches, in order.
+    """
+    records = iter(records)
+    batch = list(islice(records, size))
+    while batch:
+        yield batch
+        batch = list(islice(records, size))
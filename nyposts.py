@@ -1,34 +1,173 @@
-from datetime import datetime, timedelta
-from RPA.Browser.Selenium import Selenium
-from RPA.HTTP import HTTP
+from datetime import datetime
 import os
 import re
-from typing import Tuple
-from selenium.common.exceptions import NoSuchElementException
+from typing import Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, urlencode
+from retry.api import retry_call
+from article_index import ArticleIndex, content_hash
+from checkpoint import Checkpoint, checkpoint_key
+from config import RunConfig
+from enrichment import ArticleEnricher
 from excel import Excel
-from directories import DIRS
+from http_cache import HttpCache
+from images import ImageDownloader
+from browser_profile import block_resources, lean_chrome_options, lean_profile_dir
+from date_window import DateWindow
+from directories import CHECKPOINT_DIR, DIRS, HTTP_CACHE_DIR, NEWS_ARCHIVE_PATH, STATE_DIR, OutputDirs
 from logger import logger
-from news_model import NewsData
-from workitems import workitems
+from metrics import metrics, traced
+from news_archive import NewsArchive
+from news_model import NewsRecord, batched
+from story_parser import ResultsPage, StoryCard, parse_results, parse_stories
+from text_analytics import MONEY_PATTERN, PhraseMatcher, TextAnalyzer, tokenize
+from waits import DomWaiter
+
+
+DETACH_STORIES_SCRIPT = """
+var nodes = document.querySelectorAll("div[class='search-results__story']");
+var count = Math.min(arguments[0], nodes.length);
+for (var i = 0; i < count; i++) {
+    nodes[i].remove();
+}
+return count;
+"""
+
+
+def split_sections(section) -> List[str]:
+    """Splits the section work item value into section names.
+    Returns:
+        List[str]: The section names, empty for all sections.
+    """
+    if section == '' or section is None:
+        return []
+
+    elif type(section) == list:
+        return section
+
+    elif type(section) == str:
+        # Split the string by commas
+        return [sec.strip() for sec in section.split(",")]
+
+    else:
+        logger.info(f"Section {section} is not available.")
+        raise AssertionError
+
+
+def story_date(date_text: str) -> Optional[datetime]:
+    """Reads the day out of the date line of a story.
+    Returns:
+        datetime: The day, None if the line has no "Month D, YYYY" date.
+    """
+    date_string = re.findall(r"[A-Za-z]+\s\d{1,2},\s\d{4}", date_text)
+    try:
+        return datetime.strptime(date_string[0], '%B %d, %Y')
+    except (IndexError, ValueError):
+        return None
 
 
 class NyPosts:
 
-    def __init__(self) -> None:
+    BASE_URL = "https://nypost.com"
+
+    def __init__(self, workitem: Union[None, dict, RunConfig] = None, dirs: OutputDirs = DIRS, browser=None,
+                 excel=None, images: Optional[ImageDownloader] = None, cache: Optional[HttpCache] = None,
+                 page_index=None) -> None:
         """Initializes the object.
             Args:
-                workitem: A dictionary containing the work item data.
+                workitem: The run config or the work item data, read from the input work item if not given.
+                dirs: The output directories.
+                browser: An already started browser to reuse, it is left open on close.
+                excel: The sink the news is appended to, an Excel workbook in the output directory by default.
+                images: A shared image downloader to queue the images on, it is left running on close.
+                cache: A shared HTTP cache, it is left open on close.
+                page_index: The PageIndex shared by the month shards of the search, if any.
             Returns:
                 None.
             """
-        self.workitem = workitems()
-        self.browser = Selenium()
-        self.phrase: str = self.workitem["phrase"]
-        self.section: str = self.workitem["section"]
-        self.months = self.workitem["months"]
-        self.excel = Excel()
-        self.http = HTTP()
+        self.config = RunConfig.of(workitem)
+        self.workitem = self.config.workitem
+        self.dirs = dirs
+        self.owns_browser = browser is None
+        self.browser = traced(self.new_browser() if browser is None else browser)
+        self.waiter = DomWaiter(self.browser)
+        self.phrase: str = self.config.phrase
+        self.section: str = self.config.section
+        self.months = self.config.months
+        self.extraction: str = self.config.extraction
+        self.shard: str = self.config.shard
+        self.base_url: str = self.config.base_url or self.BASE_URL
+        self.browser_profile: str = self.config.browser_profile
+        self.orderby = "relevance"
+        self.sections: List[str] = []
+        self.date_window: Optional[DateWindow] = None
+        self.window_passed = False
+        self.newer_skipped = 0
+        self.consumed_stories = 0
+        self.seen_urls = set()
+        self.page_index = page_index
+        self.checkpoint: Optional[Checkpoint] = None
+        self.completed_page = 0
+        self.last_record: Optional[NewsRecord] = None
+        self.finished = False
+        self.batch_size = self.config.record_batch_size
+        self.analyzer = TextAnalyzer([self.phrase])
+        self.excel = excel if excel is not None else Excel(
+            dirs.File_Path,
+            layout=self.config.excel_layout,
+            checkpoint_every=self.config.excel_checkpoint_pages,
+            articles=self.config.enrich_articles)
+        self.index = ArticleIndex(
+            os.path.join(STATE_DIR, "articles.sqlite3"), self.phrase, self.section
+        ) if self.config.incremental else None
+        self.archive = NewsArchive(
+            NEWS_ARCHIVE_PATH, self.phrase, split_sections(self.section)
+        ) if self.config.news_archive else None
+        self.owns_cache = cache is None and self.config.http_cache
+        self.cache = cache if cache is not None else HttpCache(
+            HTTP_CACHE_DIR, self.config.http_cache_ttl, self.config.http_cache_mb * 2 ** 20
+        ) if self.config.http_cache else None
+        self.owns_images = images is None
+        self.images = images if images is not None else ImageDownloader(
+            dirs.ARCH_Path,
+            workers=self.config.image_workers,
+            per_host=self.config.image_workers_per_host,
+            checkpoint_every=self.config.image_checkpoint_every,
+            cache=self.cache,
+            append=self.config.resume)
+        self.enricher = ArticleEnricher(
+            self.analyzer, self.phrase,
+            workers=self.config.enrich_workers,
+            budget=self.config.enrich_budget,
+            timeout=self.config.enrich_timeout,
+            cache=self.cache) if self.config.enrich_articles else None
+
+    def new_browser(self):
+        """Creates the browser library, imported only once an engine needs it since it is slow to load.
+        """
+        from RPA.Browser.Selenium import Selenium
 
+        return Selenium()
+
+    def launch_browser(self, url: str) -> None:
+        """Starts Chrome with the browser profile of the work item, unless a warm browser is reused, and opens a page.
+            Args:
+                url (str): The URL of the page.
+            Returns:
+                None.
+        """
+        if not self.owns_browser and self.browser.get_browser_ids():
+            self.browser.go_to(url)
+        elif self.browser_profile == "lean":
+            options = lean_chrome_options(lean_profile_dir(self.shard))
+            self.browser.open_available_browser(
+                browser_selection="chrome", headless=True, options=options)
+            block_resources(self.browser.driver)
+            self.browser.go_to(url)
+        else:
+            self.browser.open_chrome_browser(url)
+            self.browser.maximize_browser_window()
+
+    @metrics.timed("open_website")
     def open_website(self) -> None:
         """Opens the web browser and clicks on the Continue button if a pop-up window shows up.
             Parameters:
@@ -36,17 +175,17 @@ class NyPosts:
             Returns:
                 None.
         """
-        self.browser.open_chrome_browser('https://nypost.com/')
-        self.browser.maximize_browser_window()
+        self.launch_browser(f'{self.base_url}/')
         continue_bt = self.browser.is_element_enabled(
             '//button[text()="Allow All"]')
 
         if continue_bt:
             self.browser.click_element('//button[text()="Allow All"]')
 
-        self.browser.wait_until_element_is_visible(
-            "//button[@class='site-header__search-toggle']", timeout=20)
+        self.waiter.until(
+            "search_toggle", "//button[@class='site-header__search-toggle']", timeout=20)
 
+    @metrics.timed("phrase_search")
     def phrase_search(self) -> Tuple[str]:
         """Searches the website for the phrase and returns a msg indicating whether the news for the phrase is available or not.
             Parameters:
@@ -55,9 +194,10 @@ class NyPosts:
                 str: A msg indicating whether the news for the phrase is available or not.
         """
         msg = ''
+        available_news = False
 
-        self.browser.wait_until_element_is_visible(
-            "//button[@class='site-header__search-toggle']", timeout=3)
+        self.waiter.until(
+            "search_toggle", "//button[@class='site-header__search-toggle']", timeout=3)
         self.browser.click_element(
             "//button[@class='site-header__search-toggle']")
         self.browser.input_text(
@@ -66,162 +206,112 @@ class NyPosts:
             "//span[contains(@class, 'search__submit-text') and text()='Search']")
         logger.info("Search phrase done.")
 
-        try:
-            self.browser.wait_until_element_is_visible(
-                "//div[@class='search-results__stories']", 20)
+        # Whichever shows up first, the stories or the "No Articles Found" heading.
+        found = self.waiter.until("search_results", [
+            "//div[@class='search-results__stories']",
+            "//h2[contains(text(), 'No Articles Found')]",
+        ], timeout=20, required=False)
+        if found == 0:
             available_news = True
-        except AssertionError:
-            msg = f"No news found for the phrase {self.phrase}"
-
-        if self.browser.is_element_visible("//h2[contains(text(), 'No Articles Found')]"):
+        else:
             msg = f"No news found for the phrase {self.phrase}"
 
         return available_news, msg
 
-    def set_dates(self) -> None:
-        """Sets the date ranges for the search.
+    def set_dates(self) -> DateWindow:
+        """Sets the date window for the search.
         Returns:
-            None.
+            DateWindow: The window the news has to be published in.
         """
-        if self.months >= 0:
-            date_ranges = self.get_date_ranges(self.months)
-            all_dates = self.get_all_dates_in_ranges(date_ranges)
-
-            formatted_dates = [self.format_date(date) for date in all_dates]
-            return formatted_dates
-
-        else:
-            logger.info("Invalid input. Please enter a non-negative integer.")
-
-    def get_date_ranges(self, months_back):
-        """Gets date ranges for the specified number of months back.
-        Parameters:
-            months_back (int): Number of months back.
-        Returns:
-            List of tuples: Date ranges.
-        """
-        current_month = datetime.now().month
-        current_year = datetime.now().year
-
-        date_ranges = []
-
-        for i in range(months_back + 1):
-            if i == 0:
-                target_month = current_month
-            else:
-                target_month = current_month - (i - 1)
-
-            target_year = current_year
-
-            while target_month <= 0:
-                target_month += 12
-                target_year -= 1
-
-            first_day = datetime(target_year, target_month, 1)
-
-            # Calculate the last day of the month
-            if target_month == 12:
-                last_day = datetime(target_year + 1, 1, 1) - timedelta(days=1)
+        try:
+            if self.config.window_start:
+                self.date_window = DateWindow.from_isoformat(
+                    self.config.window_start, self.config.window_end)
             else:
-                last_day = datetime(
-                    target_year, target_month + 1, 1) - timedelta(days=1)
-
-            date_ranges.append((first_day, last_day))
-
-        return date_ranges
-
-    def get_all_dates_in_ranges(self, date_ranges):
-        """Gets all dates within the specified date ranges.
-        Parameters:
-            date_ranges (List of tuples): Date ranges.
-        Returns:
-            List of datetime objects: All dates in the ranges.
-        """
-        all_dates = []
-
-        for start_date, end_date in date_ranges:
-            current_date = start_date
-            while current_date <= end_date:
-                all_dates.append(current_date)
-                current_date += timedelta(days=1)
-
-        return all_dates
-
-    def format_date(self, date):
-        """Formats a date as 'Month Day, Year'.
-        Parameters:
-            date (datetime): The date to format.
-        Returns:
-            str: The formatted date.
-        """
-        return date.strftime('%B %d, %Y')
+                self.date_window = DateWindow.from_months(self.months)
+        except ValueError:
+            logger.info("Invalid input. Please enter a non-negative integer.")
+            raise
+        if self.index is not None:
+            self.index.open_window(self.date_window.start)
+        self.window_passed = False
+        return self.date_window
 
+    @metrics.timed("sort_by")
     def sort_by(self):
         """Sorts the news by the newest first.
         Returns:
             None.
         """
         logger.info("sorting...")
-        self.browser.scroll_element_into_view(
-            "//ul/li/a[normalize-space()='Newest']")
-        self.browser.wait_until_element_is_enabled(
-            "//ul/li/a[normalize-space()='Newest']", timeout=10)
-        self.browser.click_element_when_visible(
-            "//ul/li/a[normalize-space()='Newest']")
+        newest = "//ul/li/a[normalize-space()='Newest']"
+        self.waiter.until("sort_newest", newest, timeout=10)
+        self.browser.scroll_element_into_view(newest)
+        self.browser.click_element(newest)
+        self.orderby = "date"
+
+    def section_names(self) -> List[str]:
+        """Gets the names of the sections to filter by.
+        Returns:
+            List[str]: The section names, empty for all sections.
+        """
+        return split_sections(self.section)
 
+    @metrics.timed("select_sections")
     def select_sections(self):
         """Selects the specified sections.
         Returns:
             None.
         """
         logger.info("selecting sections..")
-        self.browser.wait_until_element_is_enabled(
-            "//div/nav/h3[normalize-space()='Sections']")
+        sections = self.section_names()
+        self.sections = [sec.lower().replace(" ", "-") for sec in sections]
+        self.waiter.until(
+            "sections_menu", "//div/nav/h3[normalize-space()='Sections']", mode="enabled")
         self.browser.scroll_element_into_view(
             "//div/nav/h3[normalize-space()='Sections']")
-        self.browser.wait_until_element_is_enabled(
-            "//ul/li/a[normalize-space()='All']", timeout=10)
-
-        if self.section == '' or self.section is None:
-            self.browser.click_element_when_visible(
-                "//ul/li/a[normalize-space()='All']")
-
-        elif type(self.section) == list:
-            for sec in self.section:
-                self.click_section(sec)
-
-        elif type(self.section) == str:
-            if ',' in self.section:
-                # Split the string by commas
-                sections = self.section.split(",")
-                for sec in sections:
-                    self.click_section(sec.strip())
-            else:
-                self.click_section(self.section)
+        self.waiter.until(
+            "section_all", "//ul/li/a[normalize-space()='All']", timeout=10)
 
-        else:
-            logger.info(f"Section {self.section} is not available.")
-            raise AssertionError
+        if not sections:
+            self.browser.click_element("//ul/li/a[normalize-space()='All']")
+
+        for sec in sections:
+            self.click_section(sec)
 
         logger.info("done selecting sections..")
 
     def click_section(self, sec):
         ele = f"//ul[@class='interior-menu__nav']/li/a[normalize-space()='{sec}']"
-        if self.browser.is_element_visible(ele) or self.browser.is_element_enabled(ele):
+        if self.waiter.until("section", ele, mode="enabled", timeout=5, required=False) >= 0:
             self.browser.scroll_element_into_view(
                 "//div/nav/h3[normalize-space()='Sections']")
-            self.browser.wait_until_element_is_enabled(ele)
-            self.browser.click_element_when_visible(ele)
+            self.browser.click_element(ele)
         else:
             logger.info(f"Section {sec} is not available.")
 
+    def results_url(self, page: int = 1) -> str:
+        """Builds the URL of a search results page for the current phrase, sort order and sections.
+            Parameters:
+                page (int): Number of the results page.
+            Returns:
+                str: The URL of the page.
+        """
+        query = {"orderby": self.orderby}
+        if self.sections:
+            query["section"] = ",".join(self.sections)
+        path = f"/search/{quote(self.phrase)}/"
+        if page > 1:
+            path += f"page/{page}/"
+        return f"{self.base_url}{path}?{urlencode(query)}"
+
     def number_of_pages(self):
         """ Gets Number of pages.
         Returns:
             int 
         """
-        self.browser.wait_until_element_is_visible(
-            "//h2[@class='search-results__heading']/em")
+        self.waiter.until(
+            "results_count", "//h2[@class='search-results__heading']/em")
         page_str = self.browser.get_text(
             "//h2[@class='search-results__heading']/em")
         if ',' in page_str:
@@ -231,113 +321,312 @@ class NyPosts:
             page_int = page_int+1
         return page_int
 
+    @metrics.timed("get_required_data")
     def get_required_data(self):
         """Gets the required news data.
         Returns:
             None.
         """
+        from selenium.common.exceptions import NoSuchElementException
+
         if self.browser.is_element_visible("//h2[contains(text(), 'No Articles Found')]"):
             logger.info("No news found.")
 
-        limit = self.number_of_pages()
-        for page in range(1, limit):
+        start = self.first_page()
+        if start is None:
+            return
+        if start > 1 or self.page_index is not None:
+            # Straight to the first page not done yet, instead of clicking through the others.
+            self.browser.go_to(self.results_url(start))
+            self.consumed_stories = 0
 
-            ele = f"//a[normalize-space()='See More Stories']"
+        limit = self.number_of_pages()
+        ele = f"//a[normalize-space()='See More Stories']"
+        stories = "//div[@class='search-results__story']"
+        for page in range(start, limit):
             logger.info("getting required data...")
-            self.browser.wait_until_element_is_enabled(ele)
-
             try:
                 data_fetched = self.send_to_excel(page)
                 if data_fetched == False:
                     break
-                else:
-                    logger.info(f"page {page} done..")
-                    self.browser.scroll_element_into_view(ele)
-                    self.browser.wait_until_element_is_enabled(
-                        ele, timeout=10)
-                    self.browser.click_element_when_visible(ele)
-                    logger.info("Scrapped all data scuessfully ")
+                logger.info(f"page {page} done..")
+                # The last page has no button, so this wait gets its full timeout.
+                if self.waiter.until("see_more", ele, mode="enabled", timeout=10, required=False,
+                                     adaptive=False) < 0:
+                    logger.info("No more stories.")
+                    break
+                # The next page is there once more stories are, not once the button is back.
+                # Stories that never come are a failure, the checkpoint resumes from here.
+                shown = self.waiter.count(stories)
+                self.browser.scroll_element_into_view(ele)
+                self.browser.click_element(ele)
+                self.waiter.until("more_stories", stories, mode="count", count=shown + 1,
+                                  timeout=20, adaptive=False)
+                logger.info("Scrapped all data scuessfully ")
 
             except NoSuchElementException:
                 logger.info(f"No News Found on {self.phrase}")
 
-    def news_stories(self, index):
-        """Fetching news stories.
-        Returns:
-            Tuple of lists: News data lists (titles, dates, descriptions, image filenames, money presence, phrase counts).
+    def first_page(self) -> Optional[int]:
+        """Finds the first results page to scrape.
+
+        A month shard starts on the page its month starts on, instead of reading
+        all the newer news first.
+            Returns:
+                int: The number of the page, None if the crawl was complete.
         """
-        logger.info("Fetching news")
-        title_list = []
-        date_list = []
-        description_list = []
-        image_filename_list = []
-        money_present_list = []
-        phrase_list = []
+        start = self.resume()
+        if start == 1 and self.page_index is not None:
+            if self.date_window is None:
+                self.set_dates()
+            start = self.page_index.first_page(self.date_window.end, self.probe_page)
+            if start > 1:
+                logger.info(f"The news up to {self.date_window.end} starts on page {start}.")
+        return start
+
+    def probe_page(self, page: int) -> Tuple[str, ResultsPage]:
+        """Opens a results page by its URL and parses it.
+            Args:
+                page (int): Number of the results page.
+            Returns:
+                Tuple[str, ResultsPage]: The HTML and the parsed page.
+        """
+        self.browser.go_to(self.results_url(page))
+        html = self.browser.get_source()
+        return html, parse_results(html, self.browser.get_location())
 
+    def resume(self) -> Optional[int]:
+        """Restores the progress of a previous run of the work item that failed, if any.
+
+        The news it collected is written to the sink again and its images are
+        queued again, those the failed run stored in the archive are kept.
+            Returns:
+                int: The first results page left to scrape, None if the crawl was complete.
+        """
+        if not self.config.resume:
+            return 1
+        if self.date_window is None:
+            self.set_dates()
+        self.checkpoint = Checkpoint(CHECKPOINT_DIR, checkpoint_key(
+            self.phrase, self.section, self.date_window.start, self.date_window.end,
+            self.orderby, self.sections, self.shard))
+        state = self.checkpoint.load()
+        if state is None:
+            return 1
+
+        restored = 0
+        for page, batch in self.checkpoint.batches(self.batch_size):
+            for record in batch:
+                self.seen_urls.add(record.url)
+                if record.image_src:
+                    self.download_picture(record.image_src, record.image_filename)
+                if self.index is not None:
+                    # The failed run never committed them, this run does once it finishes.
+                    self.index.record(record.url, story_date(record.date).date(), content_hash(
+                        record.title, record.description, record.image_src))
+            self.excel.append(batch, page)
+            restored += len(batch)
+        self.completed_page = state["page"]
+        logger.info(
+            f"Resuming after page {state['page']} with {restored} articles, "
+            f"the last one from {state['last_date']}: {state['last_url']}")
+        if state["done"]:
+            self.window_passed = True
+            return None
+        return state["page"] + 1
+
+    def save_checkpoint(self) -> None:
+        """Saves the progress up to the last completed page.
+        """
+        if self.checkpoint is None or not self.completed_page:
+            return
+        last = self.last_record
+        self.checkpoint.save({
+            "page": self.completed_page,
+            "done": self.window_passed,
+            "last_date": last.date if last else "",
+            "last_url": last.url if last else "",
+        })
+
+    def extract_stories(self) -> Iterator[StoryCard]:
+        """Extracts the search result stories appended since the last call.
+            Returns:
+                Iterator[StoryCard]: The stories in page order.
+        """
+        if self.extraction == "xpath":
+            return self.extract_stories_xpath()
+        stories = parse_stories(
+            self.browser.get_source(), self.browser.get_location())
+        if len(stories) < self.consumed_stories:
+            # The results were re-rendered from scratch, nothing is left over.
+            self.consumed_stories = 0
+        return iter(stories[self.consumed_stories:])
+
+    def extract_stories_xpath(self) -> Iterator[StoryCard]:
+        """Extracts the stories one positional XPath at a time (several driver calls per story).
+            Returns:
+                Iterator[StoryCard]: The stories in page order.
+        """
         path = f"//div[@class='search-results__story']"
         i = len(self.browser.find_elements(path))
+        if i < self.consumed_stories:
+            self.consumed_stories = 0
 
-        for var in range(1, i+1):
-            self.browser.scroll_element_into_view(
-                f"//div[@class='search-results__story'][{var}]")
-
-            date = self.browser.get_text(
-                f"//div[@class='search-results__story'][{var}]//div/div[2]/span")
-
-            date_string = re.findall(r"[A-Za-z]+\s\d{1,2},\s\d{4}", date)
-            date_str = date_string[0]
-            time_stamped_date = datetime.strptime(date_str, '%B %d, %Y')
-            final_date = datetime.strftime(time_stamped_date, '%B %d, %Y')
-
-            if final_date in self.set_dates():
-
-                title = self.browser.get_text(
-                    f"//div[@class='search-results__story'][{var}]//div/div[2]/h3/a")
-                description = self.browser.get_text(
-                    f"//div[@class='search-results__story'][{var}]//div/div[2]/p")
-                is_image = self.browser.is_element_enabled(
-                    f"//div[@class='search-results__story'][{var}]//div/div/a/img")
-                if is_image:
-                    image_src = self.browser.get_element_attribute(
-                        f"//div[@class='search-results__story'][{var}]//div/div/a/img", 'src')
-
-                    image_filename = f'page({index})_image-news({var}).png'
-                    image_path = os.path.join(DIRS.IMAGE_DIR, image_filename)
-
-                    self.download_picture(image_src, image_path)
-                else:
-                    image_filename = ''
-
-                money_present = self.money_status(
-                    title) or self.money_status(description)
-                title_count = self.search_string_count(title, self.phrase)
-                description_count = self.search_string_count(
-                    description, self.phrase)
-
-                title_list.append(title)
-                date_list.append(final_date)
-                description_list.append(description)
-                image_filename_list.append(image_filename)
-                money_present_list.append(money_present)
-                phrase_list.append(
-                    f'Title: {title_count}; Description: {description_count}')
-            else:
-                logger.info(
-                    "Found a date from the last month. Stopping scraping.")
-                # Stop scraping if the date is out of range
-                break
+        for var in range(self.consumed_stories + 1, i+1):
+            try:
+                yield retry_call(
+                    self.read_story_xpath, fargs=[var], tries=self.config.story_retries,
+                    delay=self.config.retry_delay, backoff=2, logger=logger)
+            except Exception as e:
+                logger.info(f"Skipping story {var}: {e}")
+                metrics.count("stories_failed")
+
+    def read_story_xpath(self, var: int) -> StoryCard:
+        """Reads the fields of the story at the position.
+            Args:
+                var (int): Position of the story in the results, from 1.
+            Returns:
+                StoryCard: The story.
+        """
+        story = f"//div[@class='search-results__story'][{var}]"
+        self.browser.scroll_element_into_view(story)
+
+        date = self.browser.get_text(f"{story}//div/div[2]/span")
+        title = self.browser.get_text(f"{story}//div/div[2]/h3/a")
+        url = self.browser.get_element_attribute(
+            f"{story}//div/div[2]/h3/a", 'href')
+        description = self.browser.get_text(f"{story}//div/div[2]/p")
+        is_image = self.browser.is_element_enabled(
+            f"{story}//div/div/a/img")
+        image_src = ''
+        if is_image:
+            image_src = self.browser.get_element_attribute(
+                f"{story}//div/div/a/img", 'src')
+
+        return StoryCard(title, date, description, image_src, url)
+
+    def news_stories(self, index) -> Iterator[NewsRecord]:
+        """Fetching news stories.
+
+        The records are produced lazily by a pipeline of generators, extract ->
+        enrich -> (full article) -> image queue, so a story is only held until
+        the sink takes it.
+            Args:
+                index: Number of the results page.
+            Returns:
+                Iterator[NewsRecord]: The news of the page that fall in the date window.
+        """
+        logger.info("Fetching news")
+        if self.date_window is None:
+            self.set_dates()
+        records = self.enrich(self.extract_records(index))
+        if self.enricher is not None:
+            records = self.enricher.enrich(records)
+        return self.queue_images(records, index)
+
+    def extract_records(self, index) -> Iterator[NewsRecord]:
+        """Turns the extracted stories into records, stopping at the first one older than the date window.
+            Args:
+                index: Number of the results page.
+            Returns:
+                Iterator[NewsRecord]: The records, without analytics and image file names.
+        """
+        processed = 0
+        newer_skipped = 0
+        try:
+            for var, story in enumerate(self.extract_stories(), start=1):
+                processed += 1
+                if story.url and story.url in self.seen_urls:
+                    continue
+                if story.url:
+                    self.seen_urls.add(story.url)
+
+                time_stamped_date = story_date(story.date)
+                if time_stamped_date is None:
+                    logger.info(f"Skipping story without a date: {story.url}")
+                    metrics.count("stories_failed")
+                    continue
+                final_date = datetime.strftime(time_stamped_date, '%B %d, %Y')
+
+                if self.date_window.is_newer(time_stamped_date):
+                    newer_skipped += 1
+                    continue
+
+                if self.index is not None and self.index.is_below_high_water(time_stamped_date.date()):
+                    logger.info(
+                        "Reached the articles of the previous run. Stopping scraping.")
+                    self.window_passed = True
+                    break
 
-        return title_list, date_list, description_list, image_filename_list, money_present_list, phrase_list
+                if time_stamped_date not in self.date_window:
+                    logger.info(
+                        "Found a date from the last month. Stopping scraping.")
+                    # Stop scraping if the date is out of range
+                    self.window_passed = True
+                    break
 
-    def download_picture(self, image_src: str, image_path: str) -> None:
-        """Downloads the picture from the URL and saves it to the specified path.
+                if self.index is not None:
+                    digest = content_hash(
+                        story.title, story.description, story.image_src)
+                    if self.index.status(story.url, digest) == ArticleIndex.SEEN:
+                        continue
+                    self.index.record(
+                        story.url, time_stamped_date.date(), digest)
+
+                prefix = f'{self.shard}_' if self.shard else ''
+                yield NewsRecord(
+                    story.title, story.description, final_date, story.url, story.image_src,
+                    f'{prefix}page({index})_image-news({var}).png' if story.image_src else '')
+        finally:
+            self.release_stories(self.consumed_stories + processed)
+            self.newer_skipped = newer_skipped
+
+    def enrich(self, records: Iterator[NewsRecord]) -> Iterator[NewsRecord]:
+        """Fills in the phrase counts and the money check of the records.
+        """
+        for record in records:
+            title = self.analyzer.analyze(record.title)
+            description = self.analyzer.analyze(record.description)
+            record.money_present = title.money or description.money
+            record.phrase_count = (
+                f'Title: {title.phrase_counts[self.phrase]}; '
+                f'Description: {description.phrase_counts[self.phrase]}')
+            yield record
+
+    def queue_images(self, records: Iterator[NewsRecord], index) -> Iterator[NewsRecord]:
+        """Queues the image of every record for download and sets the file name it is stored under.
+        """
+        for record in records:
+            if record.image_src:
+                record.image_filename = self.download_picture(
+                    record.image_src, record.image_filename)
+            yield record
+
+    def release_stories(self, count: int) -> None:
+        """Detaches the already processed stories from the live DOM so that the next
+        "See More Stories" page only holds the newly appended ones.
             Args:
-                image_src (str): The URL of the image.
-                image_path (str): The path to the file where the image should be saved.
+                count (int): Number of leading story nodes that have been processed.
             Returns:
                 None.
         """
-        self.http.download(url=image_src, target_file=image_path)
+        try:
+            removed = self.browser.driver.execute_script(
+                DETACH_STORIES_SCRIPT, count)
+        except Exception as e:
+            logger.info(f"Could not detach processed stories: {e}")
+            removed = 0
+        self.consumed_stories = count - (removed or 0)
+
+    def download_picture(self, image_src: str, image_filename: str) -> str:
+        """Queues the picture at the URL for download into the image directory.
+            Args:
+                image_src (str): The URL of the image.
+                image_filename (str): The file name the image should be saved under.
+            Returns:
+                str: The file name the image is saved under, the earlier one if the URL was already queued.
+        """
+        return self.images.queue(image_src, image_filename)
 
     def money_status(self, input_text: str) -> bool:
         """Checks if any money string is present in the given text.
@@ -346,12 +635,7 @@ class NyPosts:
             Returns:
                 bool: True if any money string is present in the given text, False otherwise.
         """
-        pattern_of_money = r'\$\d+(?:,\d+)*(?:\.\d+)?(?:\s*(?:dollars|USD))?\b|\b\d+\s*(?:dollars|USD)\b'
-        match = re.findall(pattern_of_money, input_text)
-        if match:
-            return True
-        else:
-            return False
+        return MONEY_PATTERN.search(input_text) is not None
 
     def search_string_count(self, input_string: str, search_string: str) -> int:
         """Returns the count of the search string in the input string.
@@ -361,42 +645,78 @@ class NyPosts:
             Returns:
                 int: The count of the search string in the input string.
         """
-        for char in ".,;?!‘’":
-            input_string = input_string.lower().replace(char, "")
-        words = input_string.split()
-        result = []
+        if search_string == self.phrase:
+            return self.analyzer.analyze(input_string).phrase_counts[search_string]
+        return PhraseMatcher([search_string]).count(tokenize(input_string))[search_string]
 
-        for i in range(0, len(words), len(search_string.split())):
-            result.append(' '.join(words[i:i+len(search_string.split())]))
-        return result.count(search_string.lower())
-
-    def send_to_excel(self, index) -> None:
+    @metrics.timed("page")
+    def send_to_excel(self, index) -> bool:
         """Fetches all the news applying all the filters and exports them into an Excel sheet.
+
+        The news goes to the sink in batches of at most `record_batch_size` records.
+            Args:
+                index: Number of the results page.
             Returns:
-                None.
+                bool: Whether the next results page may still hold news of the date window.
         """
-
-        news_data = NewsData(self.news_stories(index))
-
-        if news_data.date_list:
-            check = news_data.date_list[-1]
-            if check in self.set_dates():
-                flag = True
-            else:
-                flag = False
-            worksheet_data = {
-                "Title": news_data.title_list,
-                "Description":  news_data.description_list,
-                "Date": news_data.date_list,
-                "Image FileName": news_data.image_file_list,
-                "Count of Search Phrase": news_data.count_phrase_list,
-                "Money Present": news_data.money_present_list
-            }
-            self.excel.create_excel(worksheet_data, DIRS.File_Path, index)
+        written = 0
+        for batch in batched(self.news_stories(index), self.batch_size):
+            self.excel.append(batch, index)
+            if self.archive is not None:
+                self.archive.append(batch, index)
+            if self.checkpoint is not None:
+                self.checkpoint.add(batch, index)
+            self.last_record = batch[-1]
+            written += len(batch)
+        metrics.count("stories_scraped", written)
+
+        if written:
+            flag = not self.window_passed
         else:
-            flag = False
+            # A page newer than the whole window still leads to it.
+            flag = self.newer_skipped > 0 and not self.window_passed
 
+        self.completed_page = index
+        if not flag or index % max(1, self.config.checkpoint_pages) == 0:
+            self.save_checkpoint()
         return flag
 
+    def save_error_evidence(self) -> None:
+        """Saves a screenshot of the page the process failed on.
+        """
+        self.browser.screenshot(filename=self.dirs.ERROR_SCREENSHOT_PATH)
+
+    def finish(self) -> None:
+        """Marks the run as complete, so the next incremental run starts where it ended.
+        """
+        if self.index is not None:
+            self.index.finish()
+        if self.checkpoint is not None:
+            self.checkpoint.clear()
+        self.finished = True
+
     def close(self):
-        self.browser.close_browser()
+        try:
+            if not self.finished:
+                # Keep what was done for the next run of the work item.
+                self.save_checkpoint()
+            self.waiter.log_report()
+            if self.enricher is not None:
+                self.enricher.close()
+            self.excel.close()
+            if self.index is not None:
+                self.index.close()
+            if self.archive is not None:
+                self.archive.close()
+            if self.owns_images:
+                self.images.close(complete=self.finished)
+            if self.owns_cache:
+                self.cache.report()
+                self.cache.close()
+        finally:
+            # Whatever failed above, the browser must not outlive the run.
+            self._close_transport()
+
+    def _close_transport(self):
+        if self.owns_browser:
+            self.browser.close_browser()
@@ -0,0 +1,237 @@
+"""Records search results pages of nypost.com and serves them back offline.
+
+    python replay.py record fixtures/trump-news --phrase trump --section News --pages 5
+    python replay.py serve fixtures/trump-news --port 8000
+"""
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import urlsplit
+
+from directories import OutputDirs
+from http_engine import HttpNyPosts
+from logger import logger
+from story_parser import parse_results
+
+
+MANIFEST = "manifest.json"
+CASE = "case.json"
+
+
+def request_key(url: str) -> str:
+    """Returns the path and query of a URL, the key recordings are looked up by.
+    """
+    parts = urlsplit(url)
+    return f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+
+
+class Recording:
+    """A directory of recorded responses with a manifest mapping request keys to files.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.manifest = {}
+        path = os.path.join(directory, MANIFEST)
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.manifest = json.load(file)
+
+    def add(self, key: str, content: bytes, content_type: str) -> str:
+        """Stores a response body under the request key.
+        """
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        extension = mimetypes.guess_extension(content_type.split(";")[0]) or ""
+        filename = f"{name}{extension}"
+        with open(os.path.join(self.directory, filename), "wb") as file:
+            file.write(content)
+        self.manifest[key] = {"file": filename, "type": content_type}
+        return filename
+
+    def get(self, key: str):
+        """Returns the body and content type recorded for the request key, None if there is none.
+        """
+        entry = self.manifest.get(key)
+        if entry is None:
+            return None
+        with open(os.path.join(self.directory, entry["file"]), "rb") as file:
+            return file.read(), entry["type"]
+
+    def save(self) -> None:
+        with open(os.path.join(self.directory, MANIFEST), "w", encoding="utf-8") as file:
+            json.dump(self.manifest, file, indent=2, sort_keys=True)
+
+
+def record(directory: str, phrase: str, section: str = "", pages: int = 1, base_url: str = HttpNyPosts.BASE_URL) -> None:
+    """Records the home page, the search and its first results pages along with their images.
+
+    The site URLs in the recorded pages are made relative and the images are
+    served under /replay-images/, so the recording works from any base URL.
+    The case file keeps the date window of the recorded news, which the replay
+    uses instead of the months before the current day.
+        Args:
+            directory (str): Directory of the recording.
+            phrase (str): The search phrase.
+            section (str): The section work item value.
+            pages (int): Number of results pages to record.
+            base_url (str): The site to record.
+    """
+    os.makedirs(directory, exist_ok=True)
+    recording = Recording(directory)
+    # Every page has to come from the site, and nothing of the recording run is kept.
+    workitem = {"phrase": phrase, "section": section, "months": 0, "base_url": base_url,
+                "http_cache": False, "resume": False, "news_archive": False}
+    days = []
+    posts = HttpNyPosts(workitem, OutputDirs(tempfile.mkdtemp()))
+    try:
+        # The home page and the unfiltered search come before the filters are applied.
+        urls = [f"{posts.base_url}/", posts.results_url()]
+        posts.sort_by()
+        posts.select_sections()
+        urls += [posts.results_url(page) for page in range(1, pages + 1)]
+        for url in urls:
+            html = posts.fetch(url)
+            for story in parse_results(html, url).stories:
+                found = re.findall(r"[A-Za-z]+\s\d{1,2},\s\d{4}", story.date)
+                if found:
+                    days.append(datetime.strptime(found[0], '%B %d, %Y').date())
+                if not story.image_src:
+                    continue
+                response = posts.session.get(story.image_src, timeout=30)
+                if not response.ok:
+                    continue
+                key = f"/replay-images/{hashlib.sha1(story.image_src.encode('utf-8')).hexdigest()}"
+                recording.add(key, response.content,
+                              response.headers.get("Content-Type", "image/jpeg"))
+                for src in (story.image_src, story.image_src.replace("&", "&amp;")):
+                    html = html.replace(src, key)
+            html = html.replace(posts.base_url, "")
+            recording.add(request_key(url), html.encode("utf-8"),
+                          "text/html; charset=utf-8")
+            logger.info(f"Recorded {url}")
+    finally:
+        posts.close()
+
+    recording.save()
+    with open(os.path.join(directory, CASE), "w", encoding="utf-8") as file:
+        # The window of the recorded news, so the replay does not depend on the current day.
+        case = {"phrase": phrase, "section": section, "pages": pages}
+        if days:
+            case.update(window_start=min(days).isoformat(), window_end=max(days).isoformat())
+        json.dump(case, file, indent=2)
+
+
+class ReplayServer:
+    """Serves a recording over HTTP on localhost from a background thread.
+
+    The responses carry an ETag and requests counts everything that was asked,
+    paths the same by request key, not_modified the conditional requests
+    answered with 304 and peak_concurrency the most requests served at once.
+    Every response can be delayed by `latency` seconds, like a remote site.
+    """
+
+    def __init__(self, directory: str, port: int = 0, latency: float = 0) -> None:
+        recording = Recording(directory)
+        self.latency = latency
+        self.bytes_served = 0
+        self.requests = 0
+        self.paths = Counter()
+        self.not_modified = 0
+        self.concurrency = 0
+        self.peak_concurrency = 0
+        self.first_request_at: Optional[float] = None
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                    server.paths[request_key(self.path)] += 1
+                    if server.first_request_at is None:
+                        server.first_request_at = time.time()
+                    server.concurrency += 1
+                    server.peak_concurrency = max(server.peak_concurrency, server.concurrency)
+                try:
+                    if server.latency:
+                        time.sleep(server.latency)
+                    self.respond()
+                finally:
+                    with server._lock:
+                        server.concurrency -= 1
+
+            def respond(self):
+                found = recording.get(request_key(self.path)) or recording.get(
+                    urlsplit(self.path).path)
+                if found is None:
+                    self.send_error(404)
+                    return
+                body, content_type = found
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with server._lock:
+                        server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_served += len(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.thread = threading.Thread(
+            target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "ReplayServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="record a search")
+    record_parser.add_argument("directory")
+    record_parser.add_argument("--phrase", required=True)
+    record_parser.add_argument("--section", default="")
+    record_parser.add_argument("--pages", type=int, default=1)
+    record_parser.add_argument("--base-url", default=HttpNyPosts.BASE_URL)
+    serve_parser = commands.add_parser("serve", help="serve a recording")
+    serve_parser.add_argument("directory")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.directory, args.phrase, args.section, args.pages, args.base_url)
+    else:
+        with ReplayServer(args.directory, args.port) as replay:
+            print(f"Serving {args.directory} on {replay.base_url}")
+            replay.thread.join()
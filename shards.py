@@ -0,0 +1,131 @@
+import re
+import threading
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import RunConfig
+from date_window import DateWindow
+from news_model import NewsRecord, batched
+from nyposts import split_sections, story_date
+from story_parser import ResultsPage
+
+
+def plan_shards(config: RunConfig) -> List[dict]:
+    """Splits a work item into independent shards, one per section and month window.
+        Args:
+            config (RunConfig): The config of the work item.
+        Returns:
+            List[dict]: One work item per shard, restricted to a single section and month.
+    """
+    sections = split_sections(config.section) or [""]
+    if config.window_start:
+        window = DateWindow.from_isoformat(config.window_start, config.window_end)
+    else:
+        window = DateWindow.from_months(config.months)
+    windows = window.split_months()
+
+    shards = []
+    for section in sections:
+        slug = re.sub(r"\W+", "-", section.lower()).strip("-") or "all"
+        for window in windows:
+            shards.append(dict(
+                config.workitem,
+                section=section,
+                window_start=window.start.isoformat(),
+                window_end=window.end.isoformat(),
+                shard=f"{slug}-{window.start:%Y-%m}",
+            ))
+    return shards
+
+
+class PageIndex:
+    """The results pages of one search, probed by its month shards to find the page their month starts on.
+
+    The results URLs have no date filter, so a month shard starting on the first
+    page would read all the newer news before reaching its month. The page is
+    found by a binary search on the oldest story of the pages instead, and the
+    probed pages are kept for the other shards of the search.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.pages: Dict[int, Tuple[str, ResultsPage]] = {}
+
+    def get(self, page: int) -> Optional[Tuple[str, ResultsPage]]:
+        """Returns the HTML and the parsed results of a probed page, None if no shard probed it.
+        """
+        with self._lock:
+            return self.pages.get(page)
+
+    def first_page(self, end: date, load: Callable[[int], Tuple[str, ResultsPage]]) -> int:
+        """Finds the first results page with news published on the last day of a window or before.
+            Args:
+                end (date): The last day of the window.
+                load: Fetches and parses a results page by its number, for the pages not probed yet.
+            Returns:
+                int: The number of the page, past the last page if all the news is newer.
+        """
+        with self._lock:
+            def reaches(page: int) -> bool:
+                if page not in self.pages:
+                    self.pages[page] = load(page)
+                dates = [story_date(story.date) for story in self.pages[page][1].stories]
+                dates = [day for day in dates if day is not None]
+                # An empty page is past the last one.
+                return not dates or dates[-1].date() <= end
+
+            if reaches(1):
+                return 1
+            low, high = 1, 2
+            while not reaches(high):
+                low, high = high, high * 2
+            while high - low > 1:
+                middle = (low + high) // 2
+                if reaches(middle):
+                    high = middle
+                else:
+                    low = middle
+            return high
+
+
+class ShardCollector:
+    """Collects the news of concurrently running shards, once per article URL.
+
+    It takes the place of the Excel workbook of every shard and writes the merged
+    news, newest first, once all the shards are done.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.records: Dict[str, NewsRecord] = {}
+
+    def append(self, records: List[NewsRecord], index) -> None:
+        """Adds a batch of news records of a shard, skipping the articles already collected.
+            Args:
+                records: The news records.
+                index: Number of the results page.
+            Returns:
+                None.
+        """
+        with self._lock:
+            for record in records:
+                key = record.url or f'{record.title}|{record.date}'
+                self.records.setdefault(key, record)
+
+    def close(self) -> None:
+        # The merged news is only written by write_to().
+        pass
+
+    def write_to(self, excel, batch_size: int = 50) -> int:
+        """Appends the merged news to a workbook, newest first.
+            Args:
+                excel: The Excel workbook to append the news to.
+                batch_size: Number of records appended at a time.
+            Returns:
+                int: Number of articles written.
+        """
+        records = sorted(self.records.values(), reverse=True,
+                         key=lambda record: datetime.strptime(record.date, '%B %d, %Y'))
+        for batch in batched(records, batch_size):
+            excel.append(batch, 1)
+        return len(records)
@@ -0,0 +1,217 @@
+from html.parser import HTMLParser
+from typing import List, NamedTuple, Optional
+from urllib.parse import urljoin
+
+
+STORY_CLASS = "search-results__story"
+
+
+class StoryCard(NamedTuple):
+    title: str
+    date: str
+    description: str
+    image_src: str
+    url: str
+
+
+class ResultsPage(NamedTuple):
+    stories: List[StoryCard]
+    next_url: str
+    total: int
+    no_results: bool
+
+
+def _clean(text: str) -> str:
+    return " ".join(text.split())
+
+
+class StoryParser(HTMLParser):
+    """Collects every search result story of a page in a single pass over its HTML.
+    """
+
+    def __init__(self, base_url: str = "") -> None:
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.stories: List[StoryCard] = []
+        self._depth = 0
+        self.next_url = ""
+        self.total = 0
+        self.no_results = False
+        self._link: Optional[str] = None
+        self._outer_text: List[str] = []
+        self._outer_tag: Optional[str] = None
+        self._reset_story()
+
+    def _reset_story(self) -> None:
+        self._current = {"title": [], "date": [], "description": []}
+        self._image_src = ""
+        self._url = ""
+        # A field left open, like a <p> without its end tag, ends with its story.
+        self._field = None
+        self._field_tag = None
+        self._field_nesting = 0
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+
+        if not self._depth:
+            if tag == "div" and STORY_CLASS in classes:
+                self._depth = 1
+                self._reset_story()
+            elif tag == "a":
+                self._link = attrs.get("href") or ""
+                self._outer_tag = tag
+                self._outer_text = []
+            elif tag in ("h2", "em") and self._outer_tag != "a":
+                self._outer_tag = tag
+                self._outer_text = []
+            return
+
+        if tag == "div":
+            self._depth += 1
+        if self._field:
+            if tag == self._field_tag:
+                self._field_nesting += 1
+            if self._field == "title" and tag == "a" and not self._url:
+                self._url = self._absolute(attrs.get("href"))
+            return
+
+        if tag == "img" and not self._image_src:
+            self._image_src = self._absolute(attrs.get("src"))
+        elif tag == "span" and not self._current["date"]:
+            self._start_field("date", tag)
+        elif tag == "h3" and not self._current["title"]:
+            self._start_field("title", tag)
+        elif tag == "p" and not self._current["description"]:
+            self._start_field("description", tag)
+
+    def _start_field(self, field: str, tag: str) -> None:
+        self._field = field
+        self._field_tag = tag
+        self._field_nesting = 0
+
+    def _absolute(self, url: Optional[str]) -> str:
+        return urljoin(self.base_url, url) if url else ""
+
+    def handle_endtag(self, tag):
+        if not self._depth:
+            if tag == self._outer_tag:
+                self._end_outer(tag, _clean("".join(self._outer_text)))
+            return
+        if self._field and tag == self._field_tag:
+            if self._field_nesting:
+                self._field_nesting -= 1
+            else:
+                self._field = None
+                self._field_tag = None
+        if tag == "div":
+            self._depth -= 1
+            if not self._depth:
+                self.stories.append(StoryCard(
+                    title=_clean("".join(self._current["title"])),
+                    date=_clean("".join(self._current["date"])),
+                    description=_clean("".join(self._current["description"])),
+                    image_src=self._image_src,
+                    url=self._url,
+                ))
+                self._reset_story()
+
+    def _end_outer(self, tag: str, text: str) -> None:
+        self._outer_tag = None
+        if tag == "a":
+            if text == "See More Stories":
+                self.next_url = self._absolute(self._link)
+            self._link = None
+        elif tag == "em" and not self.total and text.replace(",", "").isdigit():
+            self.total = int(text.replace(",", ""))
+        elif tag == "h2" and "No Articles Found" in text:
+            self.no_results = True
+
+    def handle_data(self, data):
+        if self._depth and self._field:
+            self._current[self._field].append(data)
+        elif not self._depth and self._outer_tag:
+            self._outer_text.append(data)
+
+
+def parse_stories(html: str, base_url: str = "") -> List[StoryCard]:
+    """Parses all the search result stories out of a results page.
+        Args:
+            html (str): The page source of a search results page.
+            base_url (str): URL of the page, the links are resolved against it.
+        Returns:
+            List[StoryCard]: The stories in page order.
+    """
+    return parse_results(html, base_url).stories
+
+
+def parse_results(html: str, base_url: str = "") -> ResultsPage:
+    """Parses a whole search results page.
+        Args:
+            html (str): The page source of a search results page.
+            base_url (str): URL of the page, the links are resolved against it.
+        Returns:
+            ResultsPage: The stories along with the "See More Stories" link, the result count and whether nothing was found.
+    """
+    parser = StoryParser(base_url)
+    parser.feed(html)
+    parser.close()
+    return ResultsPage(parser.stories, parser.next_url, parser.total, parser.no_results)
+
+
+# Classes of the element holding the body of an article page.
+ARTICLE_BODY_CLASSES = {"single__content", "entry-content"}
+
+
+class ArticleParser(HTMLParser):
+    """Collects the paragraphs of an article page, those of its body if it can be found.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self.body: List[str] = []
+        self.paragraphs: List[str] = []
+        self._body_depth = 0
+        self._paragraph: Optional[List[str]] = None
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._skip += 1
+        elif self._body_depth:
+            if tag in ("div", "article"):
+                self._body_depth += 1
+        elif tag in ("div", "article") and ARTICLE_BODY_CLASSES & set(
+                (dict(attrs).get("class") or "").split()):
+            self._body_depth = 1
+        if tag == "p":
+            self._paragraph = []
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._skip = max(0, self._skip - 1)
+        elif tag == "p" and self._paragraph is not None:
+            text = _clean("".join(self._paragraph))
+            if text:
+                (self.body if self._body_depth else self.paragraphs).append(text)
+            self._paragraph = None
+        elif tag in ("div", "article") and self._body_depth:
+            self._body_depth -= 1
+
+    def handle_data(self, data):
+        if self._paragraph is not None and not self._skip:
+            self._paragraph.append(data)
+
+
+def parse_article_text(html: str) -> str:
+    """Extracts the body text of an article page.
+        Args:
+            html (str): The page source of an article.
+        Returns:
+            str: The paragraphs of the article body, of the whole page if no body element is found.
+    """
+    parser = ArticleParser()
+    parser.feed(html)
+    parser.close()
+    return "\n".join(parser.body or parser.paragraphs)
@@ -1,28 +1,67 @@
-import shutil
+import argparse
+import json
+import multiprocessing
+import queue
+import re
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple, Union
+from config import RunConfig
 from nyposts import NyPosts
-from directories import DIRS
+from http_engine import BlockedError, HttpNyPosts
+from directories import DIRS, HTTP_CACHE_DIR, OutputDirs
+from excel import Excel
+from http_cache import HttpCache
+from images import ImageDownloader
+from shards import PageIndex, ShardCollector, plan_shards
 from logger import logger
-from workitems import workitems
+from metrics import metrics
+from workitems import WorkItemQueue
 
 
 class ProcessFlow:
-    def __init__(self) -> None:
-        self.workitems = workitems()
+    def __init__(self, workitem: Union[None, dict, RunConfig] = None, dirs: OutputDirs = DIRS, browser=None) -> None:
+        """
+        Args:
+            workitem: The run config or the work item data, read from the input work item if not given.
+            dirs: The output directories of the run.
+            browser: A warm browser session to reuse instead of starting one.
+        """
+        self.config = RunConfig.of(workitem)
+        self.dirs = dirs
+        self.browser = browser
 
     def make_dirs(self) -> None:
         """
         Builds required DIRS.
         """
-        if not os.path.exists(DIRS.OUTPUT):
-            os.mkdir(DIRS.OUTPUT)
-        if not os.path.exists(DIRS.IMAGE_DIR):
-            os.mkdir(DIRS.IMAGE_DIR)
+        if not os.path.exists(self.dirs.OUTPUT):
+            os.makedirs(self.dirs.OUTPUT)
 
     def run_process(self):
+        """
+        Runs the process with the engine selected by the work item, falling back
+        to the browser if the HTTP engine gets an anti-bot page.
+        """
+        if self.config.shard_workers > 1:
+            shards = plan_shards(self.config)
+            if len(shards) > 1:
+                self.run_shards(shards, self.config.shard_workers)
+                return
+
+        if self.config.engine == "http":
+            try:
+                self.run_posts(HttpNyPosts(self.config, self.dirs))
+                return
+            except BlockedError as e:
+                logger.info(f'{e}, falling back to the browser.')
+
+        self.run_posts(NyPosts(self.config, self.dirs, self.browser))
+
+    def run_posts(self, posts: NyPosts):
 
         try:
-            posts = NyPosts()
             flag = False
 
             logger.info('Opens the Website.')
@@ -54,28 +93,251 @@ class ProcessFlow:
                 logger.info(
                     'Intializing the fetching all data and uploading all the news in the excel file.')
                 posts.get_required_data()
+                posts.finish()
+                failed_images = posts.images.join()
+                if failed_images:
+                    logger.info(f'{failed_images} images could not be downloaded.')
                 logger.info(
                     'The news is successfully uploaded in the excel file.')
                 logger.info("Ending the process.")
-                shutil.make_archive(DIRS.ARCH_Path,
-                                    'zip', DIRS.IMAGE_DIR)
-                shutil.rmtree(DIRS.IMAGE_DIR)
                 posts.close()
 
             else:
                 logger.info('Applying filters not successful.')
                 logger.info('Ending the process.')
                 posts.close()
-                posts.close()
 
         except Exception as e:
-            posts.browser.screenshot(
-                filename=DIRS.ERROR_SCREENSHOT_PATH)
-            posts.close()
+            posts.save_error_evidence()
+            self.close_after_failure(posts)
             raise e
 
+    @staticmethod
+    def close_after_failure(posts: NyPosts) -> None:
+        """
+        Closes the scraper of a failed run without letting an error of the
+        teardown replace the one the run failed with.
+        """
+        try:
+            posts.close()
+        except Exception as e:
+            logger.info(f'Could not close after the failure: {e}')
+
+    def run_shards(self, shards: List[dict], workers: int) -> None:
+        """
+        Runs the shards of the work item concurrently and writes their news,
+        merged by article URL, into a single worksheet.
+        """
+        logger.info(f'Running {len(shards)} shards on {workers} workers.')
+        collector = ShardCollector()
+        # The month shards of a search share the results pages probed for their first page.
+        indexes = {shard["section"]: PageIndex() for shard in shards}
+        cache = HttpCache(
+            HTTP_CACHE_DIR, self.config.http_cache_ttl, self.config.http_cache_mb * 2 ** 20
+        ) if self.config.http_cache else None
+        images = ImageDownloader(
+            self.dirs.ARCH_Path,
+            workers=self.config.image_workers,
+            per_host=self.config.image_workers_per_host,
+            checkpoint_every=self.config.image_checkpoint_every,
+            cache=cache)
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(
+                    lambda shard: self.run_shard(
+                        shard, collector, images, cache, indexes[shard["section"]]), shards))
+            failed_images = images.join()
+            if failed_images:
+                logger.info(f'{failed_images} images could not be downloaded.')
+        finally:
+            images.close()
+            if cache is not None:
+                cache.report()
+                cache.close()
+
+        excel = Excel(self.dirs.File_Path, layout="single", articles=self.config.enrich_articles)
+        articles = collector.write_to(excel)
+        excel.close()
+        logger.info(f'{articles} articles merged from {len(shards)} shards.')
+
+    def run_shard(self, shard: dict, collector: ShardCollector, images: ImageDownloader,
+                  cache: Optional[HttpCache] = None, page_index: Optional[PageIndex] = None) -> None:
+        """
+        Scrapes the news of one shard into the collector.
+        """
+        if shard.get("engine", "browser") == "http":
+            try:
+                self.scrape_shard(HttpNyPosts(
+                    shard, self.dirs, excel=collector, images=images, cache=cache,
+                    page_index=page_index))
+                return
+            except BlockedError as e:
+                logger.info(f'{e}, falling back to the browser.')
+
+        self.scrape_shard(NyPosts(
+            shard, self.dirs, excel=collector, images=images, cache=cache, page_index=page_index))
+
+    def scrape_shard(self, posts: NyPosts) -> None:
+        try:
+            posts.open_website()
+            news_available, message = posts.phrase_search()
+            if news_available:
+                posts.set_dates()
+                posts.sort_by()
+                posts.select_sections()
+                posts.get_required_data()
+                posts.finish()
+                logger.info(f'Shard {posts.shard} done.')
+            else:
+                logger.info(f'Shard {posts.shard}: {message}')
+        except Exception:
+            posts.save_error_evidence()
+            self.close_after_failure(posts)
+            raise
+        posts.close()
+
     def start_process(self) -> None:
-        self.run_process()
+        if self.config.metrics or os.environ.get("ROBOT_METRICS"):
+            metrics.enable()
+        metrics.reset()
+        try:
+            with metrics.span("run"):
+                self.make_dirs()
+                self.run_process()
+        finally:
+            metrics.write(self.dirs.OUTPUT)
+
+    @staticmethod
+    def run_batch(workers: int) -> List[dict]:
+        """
+        Drains all the pending input work items and runs them on a pool of worker
+        processes, each one reusing its browser session across work items.
+        Every work item gets its own output directory with a status record.
+        """
+        workitems = WorkItemQueue()
+        items = workitems.reserve_all()
+        try:
+            statuses = ProcessFlow.run_items(items, workers, workitems.release)
+        finally:
+            workitems.release_remaining("The batch stopped before the work item ran.")
+
+        with open(DIRS.STATUS_PATH, "w", encoding="utf-8") as file:
+            json.dump(statuses, file, indent=2)
+        failed = [status["id"] for status in statuses if status["state"] != "DONE"]
+        if failed:
+            logger.info(f'Failed work items: {", ".join(failed)}')
+        return statuses
+
+    @staticmethod
+    def run_items(items: List[Tuple[str, dict]], workers: int, release: Callable[[dict], None]) -> List[dict]:
+        """
+        Runs work items on worker processes and hands every status record to
+        `release` as soon as its work item is done.
+        Returns:
+            The status records, in the order of the work items.
+        """
+        logger.info(f'Running {len(items)} work items on {workers} workers.')
+        os.makedirs(DIRS.OUTPUT, exist_ok=True)
+
+        pending = multiprocessing.Queue()
+        done = multiprocessing.Queue()
+        for item in items:
+            pending.put(item)
+        processes = []
+        for _ in range(max(1, min(workers, len(items)))):
+            pending.put(None)
+            process = multiprocessing.Process(
+                target=batch_worker, args=(pending, done))
+            process.start()
+            processes.append(process)
+
+        reported = {}
+        while len(reported) < len(items):
+            try:
+                status = done.get(timeout=1)
+            except queue.Empty:
+                # Once every worker is gone, nothing else is coming.
+                if any(process.is_alive() for process in processes):
+                    continue
+                break
+            reported[status["id"]] = status
+            release(status)
+        for process in processes:
+            process.join()
+
+        statuses = []
+        for item in items:
+            status = reported.get(item[0])
+            if status is None:
+                logger.info(f'Work item {item[0]} never reported back, its worker exited.')
+                status = item_status(item, "FAILED", "The worker process running it exited.")
+                write_status(item, status)
+                release(status)
+            statuses.append(status)
+        return statuses
+
+
+def item_dirs(item_id: str) -> OutputDirs:
+    """
+    Returns the output directories of a work item of a batch.
+    """
+    return DIRS.for_item(re.sub(r"[^\w.-]", "_", item_id))
+
+
+def item_status(item: Tuple[str, dict], state: str = "DONE", error: str = "") -> dict:
+    item_id, workitem = item
+    return {"id": item_id, "workitem": workitem, "output": item_dirs(item_id).OUTPUT,
+            "state": state, "error": error}
+
+
+def write_status(item: Tuple[str, dict], status: dict) -> None:
+    dirs = item_dirs(item[0])
+    os.makedirs(dirs.OUTPUT, exist_ok=True)
+    with open(dirs.STATUS_PATH, "w", encoding="utf-8") as file:
+        json.dump(status, file, indent=2)
+
+
+def run_item(item: Tuple[str, dict], browser) -> dict:
+    """
+    Runs one work item of a batch into its own output directory.
+    Returns:
+        The status record of the work item.
+    """
+    item_id, workitem = item
+    status = item_status(item)
+    started = time.time()
+    try:
+        ProcessFlow(workitem, item_dirs(item_id), browser).start_process()
+    except Exception as e:
+        logger.info(f'Work item {item_id} failed: {e}')
+        status["state"] = "FAILED"
+        status["error"] = repr(e)
+    status["seconds"] = round(time.time() - started, 3)
+
+    write_status(item, status)
+    return status
+
+
+def batch_worker(pending, done) -> None:
+    """
+    Worker process of a batch, runs work items until it gets None.
+    The browser library is only loaded once a work item needs the browser.
+    """
+    browser = None
+    try:
+        for item in iter(pending.get, None):
+            if browser is None and item[1].get("engine", "browser") != "http":
+                try:
+                    from RPA.Browser.Selenium import Selenium
+
+                    browser = Selenium()
+                except Exception as e:
+                    # The item fails on its own browser instead of taking the worker down.
+                    logger.info(f'Could not start the shared browser: {e}')
+            done.put(run_item(item, browser))
+    finally:
+        if browser is not None:
+            browser.close_all_browsers()
 
 
 def tasks():
@@ -88,6 +350,17 @@ def tasks():
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", action="store_true",
+                        help="run all the pending work items")
+    parser.add_argument("--workers", type=int,
+                        default=int(os.environ.get("BATCH_WORKERS", 2)),
+                        help="number of worker processes in batch mode")
+    args = parser.parse_args()
+
     logger.info('Initializing the Process')
-    tasks()
+    if args.batch:
+        ProcessFlow.run_batch(args.workers)
+    else:
+        tasks()
     logger.info("Done.")
@@ -0,0 +1,43 @@
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, "fixtures")
+sys.path.insert(0, ROOT)
+
+from replay import CASE, Recording  # noqa: E402
+
+
+def case_dir(name: str) -> str:
+    return os.path.join(FIXTURES, name)
+
+
+def load_case(name: str) -> dict:
+    with open(os.path.join(case_dir(name), CASE), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def recorded_page(name: str, key: str) -> str:
+    """Returns the recorded HTML of a request key, like "/search/trump/?orderby=date".
+    """
+    body, _ = Recording(case_dir(name)).get(key)
+    return body.decode("utf-8")
+
+
+@pytest.fixture
+def state_dir(tmp_path, monkeypatch):
+    """Points the directories kept between runs at a temporary one.
+    """
+    import nyposts
+    import task
+
+    state = tmp_path / "state"
+    monkeypatch.setattr(nyposts, "STATE_DIR", str(state))
+    monkeypatch.setattr(nyposts, "HTTP_CACHE_DIR", str(state / "http-cache"))
+    monkeypatch.setattr(nyposts, "CHECKPOINT_DIR", str(state / "checkpoints"))
+    monkeypatch.setattr(nyposts, "NEWS_ARCHIVE_PATH", str(state / "news.sqlite3"))
+    monkeypatch.setattr(task, "HTTP_CACHE_DIR", str(state / "http-cache"))
+    return state
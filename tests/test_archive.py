@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import zipfile
+
+from conftest import ROOT
+
+from archive import ZipArchiveSink
+
+
+WRITER = """
+import os, sys
+from archive import ZipArchiveSink
+sink = ZipArchiveSink(sys.argv[1], checkpoint_every=5)
+for i in range(12):
+    sink.write(f"image-{i}.png", b"\\x89PNG" + bytes([i]) * 5000)
+# Killed in the middle of the third part, before close().
+os._exit(1)
+"""
+
+
+def image(i: int) -> bytes:
+    return b"\x89PNG" + bytes([i]) * 5000
+
+
+def test_killed_writer_is_restored_to_its_last_checkpoint(tmp_path):
+    path = str(tmp_path / "images.zip")
+    subprocess.run([sys.executable, "-c", WRITER, path], cwd=ROOT, check=False)
+    assert os.path.exists(path + ".checkpoint")
+
+    sink = ZipArchiveSink(path, append=True, checkpoint_every=5)
+    # The images up to the last checkpoint.
+    assert sink.names == {f"image-{i}.png" for i in range(10)}
+    for i in range(8, 14):
+        sink.write(f"image-{i}.png", image(i))
+    sink.close()
+
+    assert os.listdir(tmp_path) == ["images.zip"]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == [f"image-{i}.png" for i in range(14)]
+        assert archive.read("image-12.png") == image(12)
+
+
+def test_new_archive_drops_the_interrupted_one(tmp_path):
+    path = str(tmp_path / "images.zip")
+    subprocess.run([sys.executable, "-c", WRITER, path], cwd=ROOT, check=False)
+
+    sink = ZipArchiveSink(path, checkpoint_every=5)
+    sink.write("image-20.png", image(20))
+    sink.close()
+
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == ["image-20.png"]
+
+
+def test_checkpoints_never_rewrite_the_written_images(tmp_path):
+    path = str(tmp_path / "images.zip")
+    sink = ZipArchiveSink(path, checkpoint_every=5)
+    written = []
+    for i in range(15):
+        sink.write(f"image-{i}.png", image(i))
+        if i % 5 == 4:
+            with zipfile.ZipFile(path) as archive:
+                end = archive.start_dir
+            with open(path, "rb") as file:
+                written.append(file.read(end))
+    sink.close()
+
+    with open(path, "rb") as file:
+        content = file.read()
+    # Each checkpoint only appended to the images of the one before.
+    for before, after in zip(written, written[1:] + [content]):
+        assert after.startswith(before)
+    assert len(written[-1]) < 15 * (5004 + 100)
+
+
+def test_close_writes_one_archive(tmp_path):
+    path = str(tmp_path / "images.zip")
+    sink = ZipArchiveSink(path, checkpoint_every=5)
+    for i in range(12):
+        sink.write(f"image-{i}.png", image(i))
+    sink.write("notes.txt", b"text " * 1000)
+    assert sink.size() == 12 * 5004 + 5000
+    sink.close()
+    sink.close()
+
+    assert os.listdir(tmp_path) == ["images.zip"]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert len(archive.namelist()) == 13
+        assert archive.getinfo("notes.txt").compress_type == zipfile.ZIP_DEFLATED
+        assert archive.getinfo("image-0.png").compress_type == zipfile.ZIP_STORED
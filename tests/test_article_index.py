@@ -0,0 +1,83 @@
+import os
+from datetime import date
+
+import openpyxl
+from conftest import case_dir, load_case
+
+from article_index import ArticleIndex
+from directories import OutputDirs
+from replay import ReplayServer
+from task import ProcessFlow
+
+
+def test_mark_applies_only_to_the_windows_it_covered(tmp_path):
+    path = str(tmp_path / "articles.sqlite3")
+    index = ArticleIndex(path, "trump", "")
+    index.open_window(date(2025, 10, 1))
+    index.record("https://nypost.com/a/", date(2025, 10, 10), "1")
+    index.finish()
+    index.close()
+
+    index = ArticleIndex(path, "Trump ", "")
+    # A longer window reaches months the run never read.
+    assert index.open_window(date(2025, 7, 1)) is None
+    assert index.open_window(date(2025, 10, 1)) == date(2025, 10, 10)
+    assert index.open_window(date(2025, 11, 1)) == date(2025, 10, 10)
+    assert index.status("https://nypost.com/a/", "1") == ArticleIndex.SEEN
+    assert index.status("https://nypost.com/a/", "2") == ArticleIndex.CHANGED
+    index.close()
+
+
+def test_failed_run_leaves_the_index_as_it_was(tmp_path):
+    path = str(tmp_path / "articles.sqlite3")
+    index = ArticleIndex(path, "trump", "")
+    index.open_window(date(2025, 10, 1))
+    index.record("https://nypost.com/a/", date(2025, 10, 10), "1")
+    index.close()
+
+    index = ArticleIndex(path, "trump", "")
+    assert index.open_window(date(2025, 10, 1)) is None
+    assert index.status("https://nypost.com/a/", "1") == ArticleIndex.NEW
+    index.close()
+
+
+def test_shards_do_not_wait_for_each_other(tmp_path):
+    path = str(tmp_path / "articles.sqlite3")
+    shards = [ArticleIndex(path, "trump", "") for _ in range(2)]
+    for month, index in zip((9, 10), shards):
+        index.open_window(date(2025, month, 1))
+        index.record(f"https://nypost.com/{month}/", date(2025, month, 10), str(month))
+
+    # The October shard finishes while the September one is still crawling.
+    shards[1].finish()
+    shards[0].finish()
+    for index in shards:
+        index.close()
+
+    index = ArticleIndex(path, "trump", "")
+    assert index.open_window(date(2025, 9, 1)) == date(2025, 9, 10)
+    assert index.open_window(date(2025, 10, 1)) == date(2025, 10, 10)
+    index.close()
+
+
+def run(tmp_path, name, replay, **settings) -> int:
+    dirs = OutputDirs(str(tmp_path / name))
+    flow = ProcessFlow(dict(load_case("trump-5pages"), engine="http", base_url=replay.base_url,
+                            news_archive=False, http_cache=False, resume=False, incremental=True, page_workers=1,
+                            excel_layout="single", **settings), dirs)
+    flow.make_dirs()
+    flow.run_process()
+    if not os.path.exists(dirs.File_Path):
+        return 0
+    return openpyxl.load_workbook(dirs.File_Path)["News"].max_row - 1
+
+
+def test_incremental_runs_collect_only_new_articles(tmp_path, state_dir):
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        assert run(tmp_path, "october", replay, window_start="2025-10-01") == 9
+        # The earlier run did not cover July to September.
+        assert run(tmp_path, "full", replay) == 41
+        requests = replay.requests
+        assert run(tmp_path, "again", replay) == 0
+        # Stopped on the first results page.
+        assert replay.requests - requests == 3
@@ -0,0 +1,126 @@
+import json
+import multiprocessing
+import os
+import sys
+import types
+
+import pytest
+from conftest import case_dir, load_case
+
+import task
+from directories import OutputDirs
+from replay import ReplayServer
+from workitems import LOCAL_WORKITEMS_ENV
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch, state_dir):
+    """Writes a local work item file and points the batch output at a temporary directory.
+    """
+    monkeypatch.setattr(task, "DIRS", OutputDirs(str(tmp_path / "output")))
+
+    def write(items):
+        path = tmp_path / "items.json"
+        path.write_text(json.dumps(items), encoding="utf-8")
+        monkeypatch.setenv(LOCAL_WORKITEMS_ENV, str(path))
+    return write
+
+
+def test_batch_runs_every_item(batch):
+    with ReplayServer(case_dir("trump-1page")) as replay:
+        http = dict(load_case("trump-1page"), engine="http", base_url=replay.base_url,
+                    http_cache=False, news_archive=False)
+        # The browser library is not installed here, the item fails on its own.
+        browser = dict(http, engine="browser")
+        batch([{"id": "http", "payload": http}, {"id": "browser", "payload": browser}])
+        statuses = task.ProcessFlow.run_batch(2)
+
+    assert [(status["id"], status["state"]) for status in statuses] == [
+        ("http", "DONE"), ("browser", "FAILED")]
+    assert os.path.exists(os.path.join(statuses[0]["output"], "Fresh News.xlsx"))
+    with open(os.path.join(statuses[1]["output"], "status.json"), encoding="utf-8") as file:
+        assert json.load(file)["state"] == "FAILED"
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the patched function only reaches forked workers")
+def test_dead_worker_does_not_hang_the_batch(batch, monkeypatch):
+    def crash(item, browser):
+        os._exit(3)
+
+    # The workers are forked, they inherit the patched function.
+    monkeypatch.setattr(task, "run_item", crash)
+    batch([{"id": "a", "payload": {"phrase": "trump"}}, {"id": "b", "payload": {"phrase": "trump"}}])
+    statuses = task.ProcessFlow.run_batch(1)
+
+    assert [status["state"] for status in statuses] == ["FAILED", "FAILED"]
+    assert "exited" in statuses[0]["error"]
+
+
+class FakeWorkItems:
+    """Stands in for RPA.Robocorp.WorkItems, keeping track of reservations and releases.
+    """
+
+    events = []
+    queue = []
+
+    class EmptyQueue(IndexError):
+        pass
+
+    class State:
+        DONE = "DONE"
+        FAILED = "FAILED"
+
+    class Error:
+        APPLICATION = "APPLICATION"
+
+    class Item:
+        def __init__(self, item_id, payload):
+            self.id = item_id
+            self.payload = payload
+
+    def __init__(self, auto_release=True):
+        assert not auto_release
+        self.current = None
+
+    def get_input_work_item(self):
+        if not FakeWorkItems.queue:
+            raise FakeWorkItems.EmptyQueue()
+        self.current = FakeWorkItems.Item(*FakeWorkItems.queue.pop(0))
+        FakeWorkItems.events.append(("reserve", self.current.id))
+        return self.current
+
+    def get_work_item_variables(self):
+        return self.current.payload
+
+    def set_current_work_item(self, item):
+        self.current = item
+
+    def release_input_work_item(self, state, exception_type=None, code=None, message=None):
+        FakeWorkItems.events.append(("release", self.current.id, state, message))
+
+
+def test_work_items_are_released_with_their_state(batch, monkeypatch, tmp_path):
+    module = types.ModuleType("RPA.Robocorp.WorkItems")
+    for name in ("EmptyQueue", "State", "Error"):
+        setattr(module, name, getattr(FakeWorkItems, name))
+    module.WorkItems = FakeWorkItems
+    for name in ("RPA", "RPA.Robocorp"):
+        monkeypatch.setitem(sys.modules, name, types.ModuleType(name))
+    monkeypatch.setitem(sys.modules, "RPA.Robocorp.WorkItems", module)
+    monkeypatch.delenv(LOCAL_WORKITEMS_ENV, raising=False)
+
+    with ReplayServer(case_dir("trump-1page")) as replay:
+        good = dict(load_case("trump-1page"), engine="http", base_url=replay.base_url,
+                    http_cache=False, news_archive=False)
+        FakeWorkItems.events = []
+        FakeWorkItems.queue = [("good", good), ("bad", {"phrase": ""})]
+        statuses = task.ProcessFlow.run_batch(2)
+
+    assert [status["state"] for status in statuses] == ["DONE", "FAILED"]
+    # Both items stay reserved until they have run, then each one is released once.
+    assert FakeWorkItems.events[:2] == [("reserve", "good"), ("reserve", "bad")]
+    releases = {event[1]: event[2:] for event in FakeWorkItems.events[2:]}
+    assert len(FakeWorkItems.events) == 4
+    assert releases["good"] == ("DONE", None)
+    assert releases["bad"][0] == "FAILED" and "search phrase" in releases["bad"][1]
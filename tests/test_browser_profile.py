@@ -0,0 +1,118 @@
+import fnmatch
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from conftest import case_dir
+
+import nyposts
+from bench import process_tree_rss_mb, run_browser
+from browser_profile import BLOCKED_URL_PATTERNS, lean_profile_dir
+from directories import OutputDirs
+from nyposts import NyPosts
+
+
+class FakeDriver:
+    def __init__(self) -> None:
+        self.commands = []
+
+    def execute_cdp_cmd(self, command, params):
+        self.commands.append((command, params))
+
+
+class FakeBrowser:
+    """Records the launch calls of RPA.Browser.Selenium.
+    """
+
+    def __init__(self, browser_ids=()) -> None:
+        self.browser_ids = list(browser_ids)
+        self.driver = FakeDriver()
+        self.calls = []
+
+    def get_browser_ids(self):
+        return self.browser_ids
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self.calls.append((name, args, kwargs))
+
+
+def launch(tmp_path, browser, profile) -> None:
+    (tmp_path / "output").mkdir(exist_ok=True)
+    posts = NyPosts(dict(phrase="trump", browser_profile=profile, http_cache=False, resume=False,
+                         news_archive=False), OutputDirs(str(tmp_path / "output")), browser=browser)
+    try:
+        posts.launch_browser("https://nypost.com/")
+    finally:
+        posts.close()
+
+
+def blocked(url: str) -> bool:
+    return any(fnmatch.fnmatch(url, pattern) for pattern in BLOCKED_URL_PATTERNS)
+
+
+def test_lean_launch_is_headless_and_blocks_resources(tmp_path, state_dir, monkeypatch):
+    monkeypatch.setattr(nyposts, "lean_chrome_options", lambda user_data_dir: ("options", user_data_dir))
+    browser = FakeBrowser()
+    launch(tmp_path, browser, "lean")
+
+    assert browser.calls == [
+        ("open_available_browser", (), dict(browser_selection="chrome", headless=True,
+                                            options=("options", lean_profile_dir("")))),
+        ("go_to", ("https://nypost.com/",), {}),
+    ]
+    assert browser.driver.commands == [
+        ("Network.enable", {}),
+        ("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}),
+    ]
+
+
+def test_full_launch_and_warm_browser(tmp_path, state_dir):
+    browser = FakeBrowser()
+    launch(tmp_path, browser, "full")
+    assert [call[0] for call in browser.calls] == ["open_chrome_browser", "maximize_browser_window"]
+
+    warm = FakeBrowser(browser_ids=[1])
+    launch(tmp_path, warm, "lean")
+    assert warm.calls == [("go_to", ("https://nypost.com/",), {})]
+
+
+def test_blocked_urls():
+    assert blocked("https://securepubads.g.doubleclick.net/tag/js/gpt.js")
+    assert blocked("https://www.googletagmanager.com/gtm.js?id=GTM-1")
+    assert blocked("https://nypost.com/wp-content/themes/nypost-2016/static/fonts/lato.woff2")
+    assert blocked("https://cdn.jwplayer.com/videos/clip.mp4")
+    # The pages and the image URLs the scraping reads stay reachable.
+    assert not blocked("https://nypost.com/search/trump/page/2/?orderby=date")
+    assert not blocked("https://nypost.com/wp-content/uploads/sites/2/2025/10/story.jpg")
+
+
+def test_profile_dir_per_process_and_shard():
+    assert lean_profile_dir("") != lean_profile_dir("business-2025-10")
+    assert os.path.basename(lean_profile_dir("business-2025-10")) == "MainProcess-business-2025-10"
+
+
+def test_rss_includes_the_child_processes():
+    if process_tree_rss_mb() is None:
+        pytest.skip("no /proc")
+    before = process_tree_rss_mb()
+    child = subprocess.Popen([sys.executable, "-c",
+                              "import time; x = bytearray(100 * 2 ** 20); time.sleep(5)"])
+    try:
+        deadline = time.monotonic() + 5
+        while process_tree_rss_mb() - before < 80 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert process_tree_rss_mb() - before >= 80
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_benchmark_full_and_lean_profiles():
+    pytest.importorskip("RPA.Browser.Selenium")
+    results = run_browser(case_dir("trump-1page"), repeat=1)
+
+    assert [result["profile"] for result in results] == ["full", "lean"]
+    # The lean profile does not download the images.
+    assert results[1]["served_kb_per_run"] < results[0]["served_kb_per_run"]
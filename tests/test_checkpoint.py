@@ -0,0 +1,146 @@
+import json
+import os
+import sqlite3
+import zipfile
+from datetime import date
+
+import openpyxl
+import pytest
+from conftest import case_dir, load_case
+
+import nyposts
+from checkpoint import Checkpoint
+from directories import OutputDirs
+from http_engine import HttpNyPosts
+from news_model import NewsRecord
+from replay import ReplayServer
+from task import ProcessFlow
+
+
+def record(page: int, i: int) -> NewsRecord:
+    return NewsRecord(f"Title {page}.{i}", "Description", "October 17, 2025",
+                      f"https://nypost.com/{page}/{i}/")
+
+
+def test_torn_last_line_is_dropped(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path), "key")
+    checkpoint.add([record(1, i) for i in range(3)], 1)
+    checkpoint.save({"page": 1, "done": False})
+    # Killed while journaling the next page.
+    with open(checkpoint.journal_path, "a", encoding="utf-8") as file:
+        file.write('{"title": "Title 2.0", "descr')
+
+    for _ in range(2):
+        checkpoint = Checkpoint(str(tmp_path), "key")
+        assert checkpoint.load() == {"page": 1, "done": False}
+        assert [(page, item.title) for page, item in checkpoint.records()] == [
+            (1, "Title 1.0"), (1, "Title 1.1"), (1, "Title 1.2")]
+
+
+def test_records_after_the_saved_page_are_dropped(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path), "key")
+    for page in (1, 2):
+        checkpoint.add([record(page, i) for i in range(2)], page)
+        checkpoint.save({"page": page, "done": False})
+    checkpoint.add([record(3, 0)], 3)
+    checkpoint.save({"page": 2, "done": False})
+
+    checkpoint = Checkpoint(str(tmp_path), "key")
+    assert checkpoint.load()["page"] == 2
+    assert [(page, [item.title for item in batch]) for page, batch in checkpoint.batches(50)] == [
+        (1, ["Title 1.0", "Title 1.1"]), (2, ["Title 2.0", "Title 2.1"])]
+    checkpoint.clear()
+    assert os.listdir(tmp_path) == []
+
+
+def stored_images(output) -> set:
+    """The file names of the images of a run, stored or pointing at a stored duplicate."""
+    names = {}
+    if os.path.exists(str(output / "images.names.json")):
+        with open(str(output / "images.names.json"), encoding="utf-8") as file:
+            names = json.load(file)
+    with zipfile.ZipFile(str(output / "images.zip")) as archive:
+        assert archive.testzip() is None
+        stored = set(archive.namelist())
+    assert set(names.values()) <= stored
+    return stored | set(names)
+
+
+def run(tmp_path, name, replay, **settings) -> int:
+    dirs = OutputDirs(str(tmp_path / name))
+    flow = ProcessFlow(dict(load_case("trump-5pages"), engine="http", base_url=replay.base_url,
+                            news_archive=False, http_cache=False, page_workers=1,
+                            excel_layout="single", **settings), dirs)
+    flow.make_dirs()
+    flow.run_process()
+    if not os.path.exists(dirs.File_Path):
+        return 0
+    return openpyxl.load_workbook(dirs.File_Path)["News"].max_row - 1
+
+
+def fail_on_page(monkeypatch, failing: int) -> None:
+    fetch_page = HttpNyPosts.fetch_page
+
+    def fetch(self, page):
+        if page == failing:
+            raise ConnectionError(f"page {failing} is down")
+        return fetch_page(self, page)
+    monkeypatch.setattr(HttpNyPosts, "fetch_page", fetch)
+
+
+def test_resume_from_the_failed_page_then_clear(tmp_path, state_dir, monkeypatch):
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        with monkeypatch.context() as patch:
+            fail_on_page(patch, 3)
+            with pytest.raises(ConnectionError):
+                run(tmp_path, "failed", replay)
+        assert len(os.listdir(nyposts.CHECKPOINT_DIR)) == 2
+
+        requests = dict(replay.paths)
+        assert run(tmp_path, "resumed", replay) == 50
+        fetched = {key: count - requests.get(key, 0) for key, count in replay.paths.items()}
+        # Straight to page 3, pages 1 and 2 come from the checkpoint.
+        assert not fetched.get("/search/trump/page/2/?orderby=date")
+        assert fetched["/search/trump/page/3/?orderby=date"] == 1
+
+    assert os.listdir(nyposts.CHECKPOINT_DIR) == []
+
+
+def test_resume_keeps_the_images_of_the_failed_run(tmp_path, state_dir, monkeypatch):
+    def images(requests) -> set:
+        return {key for key, count in requests.items() if key.startswith("/replay-images/") and count}
+
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        assert run(tmp_path, "complete", replay, resume=False) == 50
+        complete = dict(replay.paths)
+        with monkeypatch.context() as patch:
+            fail_on_page(patch, 3)
+            with pytest.raises(ConnectionError):
+                run(tmp_path, "output", replay)
+        failed = dict(replay.paths)
+        assert run(tmp_path, "output", replay) == 50
+        resumed = dict(replay.paths)
+
+    stored = images({key: count - complete.get(key, 0) for key, count in failed.items()})
+    fetched = images({key: count - failed.get(key, 0) for key, count in resumed.items()})
+    # Only the images of the pages the failed run did not get to.
+    assert stored and fetched and not stored & fetched
+    assert stored | fetched == images(complete)
+    assert not os.path.exists(str(tmp_path / "output" / "images.zip.checkpoint"))
+    assert stored_images(tmp_path / "output") == stored_images(tmp_path / "complete")
+
+
+def test_resumed_articles_are_in_the_incremental_index(tmp_path, state_dir, monkeypatch):
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        with monkeypatch.context() as patch:
+            fail_on_page(patch, 3)
+            with pytest.raises(ConnectionError):
+                run(tmp_path, "failed", replay, incremental=True)
+        assert run(tmp_path, "resumed", replay, incremental=True) == 50
+        assert run(tmp_path, "again", replay, incremental=True) == 0
+
+    connection = sqlite3.connect(os.path.join(nyposts.STATE_DIR, "articles.sqlite3"))
+    assert connection.execute("SELECT COUNT(*) FROM articles").fetchone() == (50,)
+    mark, = connection.execute("SELECT MAX(published) FROM high_water_marks").fetchone()
+    connection.close()
+    assert date.fromisoformat(mark) == date(2025, 10, 17)
@@ -0,0 +1,29 @@
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from bench import legacy_dates, run_dates
+from date_window import DateWindow
+
+
+@pytest.mark.parametrize("today", [date(2025, 1, 15), date(2024, 2, 29), date(2025, 12, 31)])
+def test_window_holds_the_days_set_dates_listed(today):
+    for months in range(25):
+        window = DateWindow.from_months(months, today)
+        days = {window.start + timedelta(days=i) for i in range((window.end - window.start).days + 1)}
+        assert days == {datetime.strptime(day, '%B %d, %Y').date() for day in legacy_dates(months, today)}
+        assert window.start - timedelta(days=1) not in window
+        assert window.is_newer(window.end + timedelta(days=1))
+        assert not window.is_newer(datetime.combine(window.end, datetime.max.time()))
+
+
+def test_negative_months_are_rejected():
+    with pytest.raises(ValueError):
+        DateWindow.from_months(-1)
+
+
+def test_benchmark_months_0_to_24():
+    results = run_dates(stories=30, today=date(2025, 10, 17))
+
+    assert [result["months"] for result in results] == list(range(25))
+    assert all(result["same_result"] for result in results)
@@ -0,0 +1,92 @@
+import types
+
+import openpyxl
+import pytest
+
+import enrichment
+from enrichment import ArticleEnricher
+from excel import Excel
+from news_model import NewsRecord
+from replay import Recording, ReplayServer
+from text_analytics import TextAnalyzer
+
+
+ARTICLE = """<html><body><p>Related: Trump news</p>
+<div class="single__content"><p>Trump said the $2 billion plan would pass.</p>
+<script>var trump = 1;</script><p>Critics of Trump disagreed.</p></div></body></html>"""
+
+
+@pytest.fixture
+def replay(tmp_path):
+    (tmp_path / "articles").mkdir()
+    recording = Recording(str(tmp_path / "articles"))
+    for i in range(6):
+        recording.add(f"/article-{i}/", ARTICLE.encode("utf-8"), "text/html; charset=utf-8")
+    recording.save()
+    with ReplayServer(recording.directory) as replay:
+        yield replay
+
+
+def records(replay: ReplayServer, numbers) -> list:
+    return [NewsRecord(f"Trump story {i}", "A teaser without the phrase", "October 17, 2025",
+                       f"{replay.base_url}/article-{i}/") for i in numbers]
+
+
+def enricher(**settings) -> ArticleEnricher:
+    return ArticleEnricher(TextAnalyzer(["trump"]), "trump", workers=2, **settings)
+
+
+def test_articles_fill_in_the_article_columns(tmp_path, replay):
+    articles = enricher()
+    enriched = list(articles.enrich(iter(records(replay, range(3)))))
+    articles.close()
+
+    assert [record.title for record in enriched] == ["Trump story 0", "Trump story 1", "Trump story 2"]
+    assert [record.article_row() for record in enriched] == [(12, 2, True, "article")] * 3
+    assert articles.stats == {"articles": 3}
+
+    path = str(tmp_path / "news.xlsx")
+    excel = Excel(path, layout="single", articles=True)
+    excel.append(enriched, 1)
+    excel.close()
+    rows = list(openpyxl.load_workbook(path)["News"].iter_rows(values_only=True))
+    assert rows[0][-4:] == Excel.ARTICLE_COLUMNS
+    assert rows[1][-4:] == (12, 2, True, "article")
+
+
+def test_the_budget_is_spent_over_the_whole_run(replay, monkeypatch):
+    clock = types.SimpleNamespace(now=100.0)
+    clock.monotonic = lambda: clock.now
+    monkeypatch.setattr(enrichment, "time", clock)
+    articles = enricher(budget=60)
+
+    first = list(articles.enrich(iter(records(replay, range(3)))))
+    clock.now += 61
+    # The next page comes after the budget of the run is spent.
+    second = list(articles.enrich(iter(records(replay, range(3, 6)))))
+    articles.close()
+
+    assert [record.article_source for record in first] == ["article"] * 3
+    assert [record.article_row() for record in second] == [(8, 1, False, "teaser")] * 3
+    assert replay.requests == 3
+    assert articles.stats == {"articles": 3, "teasers": 3}
+
+
+def test_slow_articles_fall_back_to_the_teaser(replay):
+    replay.latency = 1
+    articles = enricher(timeout=0.1)
+    enriched = list(articles.enrich(iter(records(replay, range(2)))))
+    articles.close()
+
+    assert [record.article_row() for record in enriched] == [(8, 1, False, "teaser")] * 2
+    assert articles.stats == {"teasers": 2, "timeouts": 2}
+
+
+def test_failed_articles_fall_back_to_the_teaser(replay):
+    articles = enricher()
+    missing = NewsRecord("Trump story 9", "A teaser", "October 17, 2025", f"{replay.base_url}/missing/")
+    enriched = list(articles.enrich(iter(records(replay, [0]) + [missing])))
+    articles.close()
+
+    assert [record.article_source for record in enriched] == ["article", "teaser"]
+    assert articles.stats == {"articles": 1, "teasers": 1, "failures": 1}
@@ -0,0 +1,98 @@
+import openpyxl
+
+from bench import run_workbook
+from excel import Excel
+from news_model import NewsRecord
+
+
+def records(page: int, count: int = 3):
+    records = []
+    for i in range(1, count + 1):
+        record = NewsRecord(f"Title {page}.{i}", f"Description {page}.{i}", "October 17, 2025",
+                            image_filename=f"page({page})_image-news({i}).png")
+        record.phrase_count = str(i)
+        records.append(record)
+    return records
+
+
+def values(sheet):
+    return [list(row) for row in sheet.iter_rows(values_only=True)]
+
+
+def test_pages_layout_gets_a_sheet_per_page(tmp_path):
+    path = str(tmp_path / "news.xlsx")
+    excel = Excel(path)
+    excel.append(records(1)[:2], 1)
+    excel.append(records(1)[2:], 1)
+    excel.append(records(2), 2)
+    excel.close()
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["Page-1", "Page-2"]
+    assert values(workbook["Page-1"]) == [list(Excel.COLUMNS)] + [
+        list(record.row()) for record in records(1)]
+
+
+def test_single_layout_with_the_article_columns(tmp_path):
+    path = str(tmp_path / "news.xlsx")
+    excel = Excel(path, layout="single", articles=True)
+    for page in (1, 2, 3):
+        excel.append(records(page), page)
+    excel.close()
+
+    workbook = openpyxl.load_workbook(path)
+    assert workbook.sheetnames == ["News"]
+    rows = values(workbook["News"])
+    assert rows[0] == list(Excel.COLUMNS + Excel.ARTICLE_COLUMNS)
+    assert [row[0] for row in rows[1:]] == [f"Title {page}.{i}" for page in (1, 2, 3) for i in (1, 2, 3)]
+
+
+def test_checkpoints_save_the_completed_pages(tmp_path):
+    path = str(tmp_path / "news.xlsx")
+    excel = Excel(path, checkpoint_every=2)
+    for page in (1, 2, 3):
+        excel.append(records(page), page)
+    # Saved once the third page started, the run could be killed here.
+    assert openpyxl.load_workbook(path).sheetnames == ["Page-1", "Page-2"]
+    excel.close()
+    assert openpyxl.load_workbook(path).sheetnames == ["Page-1", "Page-2", "Page-3"]
+
+
+def test_nothing_is_written_without_news(tmp_path):
+    path = tmp_path / "news.xlsx"
+    Excel(str(path)).close()
+    assert not path.exists()
+
+
+def test_benchmark_writes_the_same_workbook(tmp_path):
+    results = run_workbook(page_counts=(5, 20), stories=5, legacy_pages=20, directory=str(tmp_path))
+    seconds = {(result["writer"], result["pages"]): result["seconds"] for result in results}
+
+    assert set(seconds) == {(writer, pages) for pages in (5, 20)
+                            for writer in ("legacy", "pages", "single", "pages_checkpoint_10")}
+    legacy = openpyxl.load_workbook(tmp_path / "legacy-20.xlsx")
+    streamed = openpyxl.load_workbook(tmp_path / "pages-20.xlsx")
+    assert legacy.sheetnames == streamed.sheetnames == [f"Page-{page}" for page in range(1, 21)]
+    assert all(values(legacy[name]) == values(streamed[name]) for name in legacy.sheetnames)
+    single = values(openpyxl.load_workbook(tmp_path / "single-20.xlsx")["News"])
+    assert single[0] == list(Excel.COLUMNS)
+    assert len(single) == 101
+    assert single[1:] == [row for name in legacy.sheetnames for row in values(legacy[name])[1:]]
+
+
+def test_workbook_is_written_once_without_checkpoints(tmp_path, monkeypatch):
+    saves = []
+    save = openpyxl.Workbook.save
+    monkeypatch.setattr(openpyxl.Workbook, "save",
+                        lambda workbook, path: saves.append(path) or save(workbook, path))
+    path = str(tmp_path / "news.xlsx")
+    excel = Excel(path)
+    for page in range(1, 21):
+        excel.append(records(page), page)
+    # Streamed in write-only mode, the rows cannot be read back or changed.
+    assert excel.workbook.write_only
+    assert not (tmp_path / "news.xlsx").exists()
+    excel.close()
+
+    assert saves == [path]
+    assert openpyxl.load_workbook(path).sheetnames == [f"Page-{page}" for page in range(1, 21)]
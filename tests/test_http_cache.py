@@ -0,0 +1,110 @@
+import types
+
+import pytest
+import requests
+
+import http_cache
+from http_cache import HttpCache
+from replay import Recording, ReplayServer
+
+
+@pytest.fixture
+def recording(tmp_path):
+    (tmp_path / "recording").mkdir()
+    recording = Recording(str(tmp_path / "recording"))
+    for name in "abc":
+        recording.add(f"/{name}", name.encode() * 1000, "image/png")
+    recording.save()
+    return recording.directory
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A clock of the cache that only moves when the test moves it."""
+    clock = types.SimpleNamespace(now=1000.0)
+    clock.time = lambda: clock.now
+    monkeypatch.setattr(http_cache, "time", clock)
+    return clock
+
+
+def get(cache: HttpCache, session: requests.Session, replay: ReplayServer, name: str):
+    response, cached = cache.get(session, f"{replay.base_url}/{name}")
+    assert response.content == name.encode() * 1000
+    return cached
+
+
+def test_fresh_entries_are_served_without_a_request(tmp_path, recording, clock):
+    cache = HttpCache(str(tmp_path / "cache"), ttl=60)
+    with ReplayServer(recording) as replay, requests.Session() as session:
+        assert not get(cache, session, replay, "a")
+        clock.now += 30
+        assert get(cache, session, replay, "a")
+        assert get(cache, session, replay, "a")
+    cache.close()
+
+    assert replay.requests == 1
+    assert cache.stats == {"miss": 1, "hit": 2}
+
+
+def test_expired_entries_are_revalidated_with_their_etag(tmp_path, recording, clock):
+    cache = HttpCache(str(tmp_path / "cache"), ttl=60)
+    with ReplayServer(recording) as replay, requests.Session() as session:
+        get(cache, session, replay, "a")
+        clock.now += 61
+        assert not get(cache, session, replay, "a")
+        # The revalidation made the entry fresh again.
+        clock.now += 30
+        assert get(cache, session, replay, "a")
+    cache.close()
+
+    assert replay.requests == 2
+    assert replay.not_modified == 1
+    assert cache.stats == {"miss": 1, "revalidated": 1, "hit": 1}
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, recording, clock):
+    cache = HttpCache(str(tmp_path / "cache"), ttl=600, max_bytes=2500)
+    with ReplayServer(recording) as replay, requests.Session() as session:
+        for name in "aba":
+            clock.now += 1
+            get(cache, session, replay, name)
+        clock.now += 1
+        get(cache, session, replay, "c")
+        assert cache.size() == 2000
+        assert cache.stats["evicted"] == 1
+
+        clock.now += 1
+        assert get(cache, session, replay, "a")
+        assert not get(cache, session, replay, "b")
+    cache.close()
+
+    assert replay.paths["/b"] == 2
+    assert cache.stats == {"miss": 4, "hit": 2, "evicted": 2}
+
+
+def test_entries_are_shared_across_instances(tmp_path, recording, clock):
+    with ReplayServer(recording) as replay, requests.Session() as session:
+        cache = HttpCache(str(tmp_path / "cache"))
+        get(cache, session, replay, "a")
+        cache.close()
+        cache = HttpCache(str(tmp_path / "cache"))
+        assert get(cache, session, replay, "a")
+        cache.close()
+
+    assert replay.requests == 1
+
+
+def test_uncacheable_responses_are_not_stored(tmp_path, recording, clock):
+    cache = HttpCache(str(tmp_path / "cache"))
+    with ReplayServer(recording) as replay, requests.Session() as session:
+        for _ in range(2):
+            response, cached = cache.get(session, f"{replay.base_url}/a",
+                                         cacheable=lambda response: False)
+            assert not cached
+        assert cache.size() == 0
+        response, cached = cache.get(session, f"{replay.base_url}/missing")
+        assert response.status_code == 404
+    cache.close()
+
+    assert replay.requests == 3
+    assert cache.stats == {"miss": 3}
@@ -0,0 +1,142 @@
+import os
+import zipfile
+
+import openpyxl
+import pytest
+from conftest import case_dir, load_case, recorded_page
+
+import task
+from excel import Excel
+from directories import OutputDirs
+from http_engine import BlockedError, HttpNyPosts
+from replay import Recording, ReplayServer
+from story_parser import parse_results
+from task import ProcessFlow
+
+
+def workitem(case: str, replay: ReplayServer, **settings) -> dict:
+    return dict(load_case(case), engine="http", base_url=replay.base_url,
+                news_archive=False, **settings)
+
+
+def test_no_articles_found_with_cache(tmp_path, state_dir):
+    dirs = OutputDirs(str(tmp_path / "output"))
+    with ReplayServer(case_dir("no-results")) as replay:
+        flow = ProcessFlow(workitem("no-results", replay, http_cache=True), dirs)
+        flow.make_dirs()
+        flow.run_process()
+
+    assert not os.path.exists(dirs.File_Path)
+    assert replay.requests == 2
+
+
+def test_blocked_page_is_not_cached(tmp_path, state_dir):
+    (tmp_path / "blocked").mkdir()
+    (tmp_path / "output").mkdir()
+    recording = Recording(str(tmp_path / "blocked"))
+    recording.add("/", b'<html><body><div id="px-captcha"></div></body></html>',
+                  "text/html; charset=utf-8")
+    recording.save()
+
+    with ReplayServer(recording.directory) as replay:
+        for _ in range(2):
+            posts = HttpNyPosts(dict(phrase="trump", engine="http", base_url=replay.base_url,
+                                     news_archive=False), OutputDirs(str(tmp_path / "output")))
+            try:
+                with pytest.raises(BlockedError):
+                    posts.open_website()
+            finally:
+                posts.close()
+
+    # The second run asked the site again instead of replaying the captcha.
+    assert replay.requests == 2
+
+
+def test_scrapes_the_recorded_pages_in_newest_order(tmp_path, state_dir):
+    dirs = OutputDirs(str(tmp_path / "output"))
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        flow = ProcessFlow(workitem("trump-5pages", replay, http_cache=False, page_workers=3), dirs)
+        flow.make_dirs()
+        flow.run_process()
+
+    workbook = openpyxl.load_workbook(dirs.File_Path)
+    assert workbook.sheetnames == [f"Page-{page}" for page in range(1, 6)]
+    for page in range(1, 6):
+        key = "/search/trump/" + (f"page/{page}/" if page > 1 else "") + "?orderby=date"
+        stories = parse_results(recorded_page("trump-5pages", key)).stories
+        rows = list(workbook[f"Page-{page}"].iter_rows(min_row=2, values_only=True))
+        assert [row[0] for row in rows] == [story.title for story in stories]
+        assert all(row[4].startswith("Title: ") for row in rows)
+        assert any(not row[4].startswith("Title: 0") for row in rows)
+    with zipfile.ZipFile(dirs.ARCH_Path) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist()
+    # The relevance search, then every results page once, without a browser.
+    assert sum(count for key, count in replay.paths.items() if key.startswith("/search/")) == 6
+
+
+def test_sections_are_filtered_in_the_results_urls(tmp_path, state_dir):
+    dirs = OutputDirs(str(tmp_path / "output"))
+    with ReplayServer(case_dir("tariffs-business")) as replay:
+        flow = ProcessFlow(workitem("tariffs-business", replay, http_cache=False, excel_layout="single"),
+                           dirs)
+        flow.make_dirs()
+        flow.run_process()
+
+    pages = [key for key in replay.paths if "orderby=date" in key]
+    assert pages and all("section=business" in key for key in pages)
+    rows = list(openpyxl.load_workbook(dirs.File_Path)["News"].iter_rows(min_row=2, values_only=True))
+    assert len(rows) == sum(
+        len(parse_results(recorded_page("tariffs-business", key)).stories) for key in pages)
+
+
+def test_anti_bot_page_falls_back_to_the_browser(tmp_path, state_dir, monkeypatch):
+    (tmp_path / "blocked").mkdir()
+    recording = Recording(str(tmp_path / "blocked"))
+    recording.add("/", b'<html><body><div id="px-captcha"></div></body></html>',
+                  "text/html; charset=utf-8")
+    recording.save()
+    browser_runs = []
+    monkeypatch.setattr(task, "NyPosts", lambda config, dirs, browser=None: "browser posts")
+    run_posts = ProcessFlow.run_posts
+    monkeypatch.setattr(ProcessFlow, "run_posts", lambda self, posts: browser_runs.append(posts)
+                        if posts == "browser posts" else run_posts(self, posts))
+
+    dirs = OutputDirs(str(tmp_path / "output"))
+    with ReplayServer(recording.directory) as replay:
+        flow = ProcessFlow(dict(phrase="trump", engine="http", base_url=replay.base_url,
+                                news_archive=False), dirs)
+        flow.make_dirs()
+        flow.run_process()
+
+    assert browser_runs == ["browser posts"]
+    assert os.path.exists(dirs.ERROR_PAGE_PATH)
+
+
+def test_failed_teardown_closes_the_session_and_keeps_the_error(tmp_path, state_dir, monkeypatch):
+    fetch_page = HttpNyPosts.fetch_page
+
+    def fetch(self, page):
+        if page == 2:
+            raise ConnectionError("page 2 is down")
+        return fetch_page(self, page)
+
+    def close_excel(self):
+        excel_close(self)
+        raise OSError("disk full")
+    closed = []
+    excel_close = Excel.close
+    close_transport = HttpNyPosts._close_transport
+    monkeypatch.setattr(HttpNyPosts, "fetch_page", fetch)
+    monkeypatch.setattr(Excel, "close", close_excel)
+    monkeypatch.setattr(HttpNyPosts, "_close_transport",
+                        lambda self: closed.append(close_transport(self)))
+
+    dirs = OutputDirs(str(tmp_path / "output"))
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        flow = ProcessFlow(workitem("trump-5pages", replay, page_workers=1), dirs)
+        flow.make_dirs()
+        with pytest.raises(ConnectionError, match="page 2 is down"):
+            flow.run_process()
+
+    assert closed == [None]
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import zipfile
+from urllib.parse import urlsplit
+
+from conftest import case_dir, recorded_page
+
+from images import ImageDownloader
+from replay import ReplayServer
+from story_parser import parse_results
+
+
+def recorded_images(case: str, base_url: str, pages: int):
+    """Returns the image URLs of the recorded results pages and the file names the scraper gives them.
+    """
+    images = []
+    for page in range(1, pages + 1):
+        key = "/search/trump/" + (f"page/{page}/" if page > 1 else "") + "?orderby=date"
+        results = parse_results(recorded_page(case, key), base_url + key)
+        images += [(story.image_src, f"page({page})_image-news({var}).png")
+                   for var, story in enumerate(results.stories, start=1) if story.image_src]
+    return images
+
+
+def test_duplicate_images_are_stored_once(tmp_path):
+    path = str(tmp_path / "images.zip")
+    with ReplayServer(case_dir("trump-5pages")) as replay:
+        images = recorded_images("trump-5pages", replay.base_url, 5)
+        downloader = ImageDownloader(path, workers=4, checkpoint_every=10)
+        for url, filename in images:
+            downloader.queue(url, filename)
+        assert downloader.join() == 0
+        downloader.close()
+
+    with open(tmp_path / "images.names.json", encoding="utf-8") as file:
+        names = json.load(file)
+    assert names
+    with zipfile.ZipFile(path) as archive:
+        stored = archive.namelist()
+        digests = [hashlib.sha256(archive.read(name)).hexdigest() for name in stored]
+        assert len(set(digests)) == len(stored)
+        assert len(stored) + len(names) == len(images)
+        for duplicate, original in names.items():
+            assert duplicate not in stored
+            assert original in stored
+        # Every file name the workbook refers to is either stored or mapped.
+        assert {filename for _, filename in images} == set(stored) | set(names)
+
+
+def test_images_download_in_the_background_within_the_host_limit(tmp_path):
+    path = str(tmp_path / "images.zip")
+    with ReplayServer(case_dir("trump-5pages"), latency=0.05) as replay:
+        images = recorded_images("trump-5pages", replay.base_url, 2)
+        downloader = ImageDownloader(path, workers=8, per_host=3)
+        for url, filename in images + images:
+            downloader.queue(url, filename)
+        assert downloader.join() == 0
+        downloader.close()
+
+    assert len(images) > 10
+    assert replay.peak_concurrency <= 3
+    # Every image was fetched, and only once although it was queued twice.
+    assert {urlsplit(url).path: 1 for url, _ in images} == {
+        path: count for path, count in replay.paths.items() if path.startswith("/replay-images/")}
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert set(archive.namelist()) | set(downloader.duplicates) == {filename for _, filename in images}
+
+
+def test_a_url_is_downloaded_once(tmp_path):
+    with ReplayServer(case_dir("trump-1page")) as replay:
+        url, filename = recorded_images("trump-1page", replay.base_url, 1)[0]
+        downloader = ImageDownloader(str(tmp_path / "images.zip"))
+        assert downloader.queue(url, filename) == filename
+        assert downloader.queue(url, "another-name.png") == filename
+        assert downloader.join() == 0
+        downloader.close()
+
+    assert replay.requests == 1
+
+
+def test_failed_downloads_are_counted(tmp_path):
+    path = str(tmp_path / "images.zip")
+    with ReplayServer(case_dir("trump-1page")) as replay:
+        url, filename = recorded_images("trump-1page", replay.base_url, 1)[0]
+        downloader = ImageDownloader(path)
+        downloader.queue(url, filename)
+        downloader.queue(f"{replay.base_url}/replay-images/missing", "missing.png")
+        assert downloader.join() == 1
+        downloader.close()
+
+    with zipfile.ZipFile(path) as archive:
+        assert archive.namelist() == [filename]
@@ -0,0 +1,96 @@
+import json
+import types
+
+import pytest
+
+import metrics as metrics_module
+from metrics import Metrics, SpanStats, TracedBrowser
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A perf_counter that only moves when the test moves it."""
+    clock = types.SimpleNamespace(now=0.0)
+    clock.perf_counter = lambda: clock.now
+    monkeypatch.setattr(metrics_module, "time", clock)
+    return clock
+
+
+def test_nested_spans_are_recorded_under_their_path(clock):
+    metrics = Metrics()
+    metrics.enable()
+    with metrics.span("run"):
+        clock.now += 0.5
+        for _ in range(2):
+            with metrics.span("page"):
+                clock.now += 1
+                with metrics.span("driver.get_source"):
+                    clock.now += 0.25
+
+    spans = metrics.report()["spans"]
+    assert list(spans) == ["run", "run;page", "run;page;driver.get_source"]
+    assert spans["run"]["total_s"] == 3
+    assert spans["run;page"]["count"] == 2
+    assert spans["run;page"]["total_s"] == 2.5
+    assert spans["run;page;driver.get_source"]["mean_ms"] == 250
+
+
+def test_nothing_is_recorded_until_enabled(clock):
+    metrics = Metrics()
+
+    @metrics.timed("call")
+    def call():
+        return 42
+
+    with metrics.span("run"):
+        assert call() == 42
+    metrics.count("pages")
+    assert metrics.report() == {"counters": {}, "spans": {}}
+
+
+def test_histogram_percentiles():
+    stats = SpanStats()
+    for milliseconds in [3] * 90 + [40] * 8 + [700, 45000]:
+        stats.add(milliseconds / 1000)
+
+    report = stats.report()
+    assert report["histogram"] == {"<=5ms": 90, "<=50ms": 8, "<=1000ms": 1, ">30000ms": 1}
+    assert (report["p50_ms"], report["p95_ms"], report["p99_ms"]) == (5, 50, 1000)
+    assert report["max_ms"] == 45000
+
+    stats = SpanStats()
+    stats.add(0.0123)
+    # The bucket bound is capped by the longest span.
+    assert stats.report()["p99_ms"] == 12.3
+    assert SpanStats().report()["p50_ms"] == 0
+
+
+def test_metrics_json_and_folded_output(tmp_path, clock):
+    metrics = Metrics()
+    metrics.enable()
+
+    @metrics.timed("excel.append")
+    def append():
+        clock.now += 0.002
+
+    with metrics.span("run"):
+        clock.now += 0.001
+        append()
+        append()
+    metrics.count("pages", 3)
+    browser = TracedBrowser(types.SimpleNamespace(
+        title="News", get_source=lambda: "<html>"), metrics)
+    assert browser.title == "News"
+    assert browser.get_source() == "<html>"
+    metrics.write(str(tmp_path / "metrics"))
+
+    with open(tmp_path / "metrics" / "metrics.json", encoding="utf-8") as file:
+        report = json.load(file)
+    assert report["counters"] == {"pages": 3, "driver_calls": 1}
+    assert sorted(report["spans"]) == ["driver.get_source", "run", "run;excel.append"]
+    assert report["spans"]["run;excel.append"] == {
+        "count": 2, "total_s": 0.004, "mean_ms": 2.0, "max_ms": 2.0,
+        "p50_ms": 2.0, "p95_ms": 2.0, "p99_ms": 2.0, "histogram": {"<=2ms": 2}}
+    # Self times in microseconds, the parent without its children.
+    assert (tmp_path / "metrics" / "metrics.folded").read_text(encoding="utf-8") == (
+        "driver.get_source 0\nrun 1000\nrun;excel.append 4000\n")
@@ -0,0 +1,116 @@
+import sqlite3
+from datetime import date
+
+import openpyxl
+import pytest
+
+import news_archive
+from news_archive import NewsArchive, main
+from news_model import NewsRecord
+
+
+def record(title: str, description: str, day: str, url: str) -> NewsRecord:
+    record = NewsRecord(title, description, day, url)
+    record.phrase_count = "Title: 1; Description: 0"
+    return record
+
+
+def first_run():
+    return [record("Trump signs tariff order", "Steel and aluminum imports", "October 17, 2025",
+                   "https://nypost.com/tariff-order/"),
+            record("Trump visits New York", "A rally in Queens", "October 15, 2025",
+                   "https://nypost.com/new-york-rally/"),
+            record("Markets slide on trade fears", "Tariff talk weighs on stocks", "September 30, 2025",
+                   "https://nypost.com/markets-slide/")]
+
+
+@pytest.fixture
+def archive_path(tmp_path):
+    path = str(tmp_path / "archive" / "news.sqlite3")
+    archive = NewsArchive(path, "trump")
+    archive.append(first_run())
+    archive.close()
+    # A later run of another search finds one of the news again, with a new title.
+    archive = NewsArchive(path, "tariffs", ["Business"])
+    archive.append([record("Trump signs sweeping tariff order", "Steel and aluminum imports",
+                           "October 17, 2025", "https://nypost.com/tariff-order/"),
+                    record("Ports brace for tariffs", "Shipping costs climb", "October 16, 2025",
+                           "https://nypost.com/ports-brace/")])
+    archive.close()
+    return path
+
+
+def titles(records) -> list:
+    return [record.title for record in records]
+
+
+def test_full_text_index_follows_the_runs(archive_path):
+    archive = NewsArchive(archive_path)
+    assert archive.full_text
+    assert titles(archive.search("sweeping")) == ["Trump signs sweeping tariff order"]
+    # Updated in place, the old title is not indexed anymore.
+    assert titles(archive.search('"signs tariff"')) == []
+    assert titles(archive.search("tariff*")) == [
+        "Trump signs sweeping tariff order", "Ports brace for tariffs", "Markets slide on trade fears"]
+    assert archive.connection.execute("SELECT COUNT(*) FROM news").fetchone() == (4,)
+    archive.close()
+
+
+def test_search_is_newest_first_with_filters(archive_path):
+    archive = NewsArchive(archive_path)
+    assert titles(archive.search()) == [
+        "Trump signs sweeping tariff order", "Ports brace for tariffs",
+        "Trump visits New York", "Markets slide on trade fears"]
+    assert titles(archive.search(phrase="TRUMP")) == [
+        "Trump signs sweeping tariff order", "Trump visits New York", "Markets slide on trade fears"]
+    assert titles(archive.search(phrase="tariffs", section="business")) == [
+        "Trump signs sweeping tariff order", "Ports brace for tariffs"]
+    # The trump search was over all sections.
+    assert titles(archive.search(section="")) == titles(archive.search(phrase="trump"))
+    assert titles(archive.search(since=date(2025, 10, 1), until=date(2025, 10, 16))) == [
+        "Ports brace for tariffs", "Trump visits New York"]
+    assert titles(archive.search("trump", limit=1)) == ["Trump signs sweeping tariff order"]
+    archive.close()
+
+
+def test_cli_lists_and_writes_the_report(archive_path, tmp_path, capsys):
+    assert main(["tariff*", "--db", archive_path, "--since", "2025-10-01"]) is None
+    out = capsys.readouterr().out
+    assert "2025-10-17  Trump signs sweeping tariff order  https://nypost.com/tariff-order/" in out
+    assert "2 news found in" in out
+
+    report = str(tmp_path / "report.xlsx")
+    main(["--db", archive_path, "--phrase", "trump", "--excel", report])
+    assert "3 news written to" in capsys.readouterr().out
+    rows = list(openpyxl.load_workbook(report)["News"].iter_rows(values_only=True))
+    assert [row[0] for row in rows[1:]] == [
+        "Trump signs sweeping tariff order", "Trump visits New York", "Markets slide on trade fears"]
+
+
+@pytest.mark.parametrize("argv", [
+    ["--db", "missing.sqlite3"],
+    ['"unterminated'],
+    ["--since", "yesterday"],
+])
+def test_cli_errors_exit_with_status_2(archive_path, argv, capsys):
+    if "--db" not in argv:
+        argv = argv + ["--db", archive_path]
+    with pytest.raises(SystemExit) as exit:
+        main(argv)
+    assert exit.value.code == 2
+    assert "error:" in capsys.readouterr().err
+
+
+def test_archive_without_fts5(tmp_path, monkeypatch):
+    # The same error as a SQLite build without the module.
+    monkeypatch.setattr(news_archive, "FTS_SCHEMA", news_archive.FTS_SCHEMA.replace(
+        "USING fts5", "USING fts_unavailable"))
+    path = str(tmp_path / "news.sqlite3")
+    archive = NewsArchive(path, "trump")
+    archive.append(first_run())
+    assert not archive.full_text
+    assert titles(archive.search("tariff")) == ["Trump signs tariff order", "Markets slide on trade fears"]
+    archive.close()
+
+    with pytest.raises(sqlite3.OperationalError):
+        sqlite3.connect(path).execute("SELECT * FROM news_fts")
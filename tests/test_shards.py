@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+import openpyxl
+from conftest import case_dir, load_case
+
+from config import RunConfig
+from directories import OutputDirs
+from replay import ReplayServer
+from shards import PageIndex, plan_shards
+from story_parser import ResultsPage, StoryCard
+from task import ProcessFlow
+
+
+def results_page(days) -> ResultsPage:
+    stories = [StoryCard("title", f"{day:%B %d, %Y} | 10:00am", "", "", "") for day in days]
+    return ResultsPage(stories, "", 0, not stories)
+
+
+def test_plan_shards_splits_the_window_by_month():
+    shards = plan_shards(RunConfig.of(dict(
+        phrase="trump", section="Business, US News",
+        window_start="2025-07-11", window_end="2025-10-17")))
+
+    assert [shard["shard"] for shard in shards[:4]] == [
+        "business-2025-10", "business-2025-09", "business-2025-08", "business-2025-07"]
+    assert len(shards) == 8
+    assert (shards[0]["window_start"], shards[0]["window_end"]) == ("2025-10-01", "2025-10-17")
+    assert (shards[3]["window_start"], shards[3]["window_end"]) == ("2025-07-11", "2025-07-31")
+
+
+def test_page_index_finds_the_first_page_of_a_month():
+    # 100 pages of 10 stories, one a day, newest first from 2025-10-17.
+    newest = date(2025, 10, 17)
+    pages = {page: results_page(newest - timedelta(days=(page - 1) * 10 + i) for i in range(10))
+             for page in range(1, 101)}
+    loaded = []
+
+    def load(page):
+        loaded.append(page)
+        return "", pages.get(page, results_page([]))
+
+    index = PageIndex()
+    assert index.first_page(date(2025, 10, 31), load) == 1
+    # 2025-05-31 is the 140th story, the 10th of page 14.
+    assert index.first_page(date(2025, 5, 31), load) == 14
+    assert len(loaded) <= 10
+    # Past the oldest news, the first empty page.
+    assert index.first_page(date(2020, 1, 31), load) == 101
+    assert len(set(loaded)) == len(loaded)
+    assert index.get(14)[1] is pages[14]
+
+
+def test_month_shards_read_every_page_once(tmp_path, state_dir):
+    articles = {}
+    for shard_workers in (1, 4):
+        dirs = OutputDirs(str(tmp_path / f"output-{shard_workers}"))
+        with ReplayServer(case_dir("trump-5pages")) as replay:
+            flow = ProcessFlow(dict(
+                load_case("trump-5pages"), engine="http", base_url=replay.base_url,
+                news_archive=False, http_cache=False, page_workers=1,
+                shard_workers=shard_workers), dirs)
+            flow.make_dirs()
+            flow.run_process()
+        workbook = openpyxl.load_workbook(dirs.File_Path)
+        articles[shard_workers] = sum(sheet.max_row - 1 for sheet in workbook.worksheets)
+
+        pages = {key: count for key, count in replay.paths.items()
+                 if "orderby=date" in key}
+        assert len(pages) == 5
+        # No month shard pages through the newer news to reach its month.
+        assert set(pages.values()) == {1}
+
+    assert articles == {1: 50, 4: 50}
@@ -0,0 +1,73 @@
+from conftest import recorded_page
+
+from story_parser import parse_results, parse_stories
+
+BASE_URL = "http://127.0.0.1:8000"
+
+
+def test_results_page():
+    url = f"{BASE_URL}/search/trump/?orderby=date"
+    page = parse_results(recorded_page("trump-5pages", "/search/trump/?orderby=date"), url)
+
+    assert len(page.stories) == 10
+    assert page.total == 50
+    assert not page.no_results
+    assert page.next_url == f"{BASE_URL}/search/trump/page/2/?orderby=date"
+    first = page.stories[0]
+    assert first.date.startswith("October 17, 2025 |")
+    assert first.url.startswith(f"{BASE_URL}/2025/10/17/us-news/")
+    assert first.image_src.startswith(f"{BASE_URL}/replay-images/")
+    assert first.title.startswith("Trump ")
+    assert "&amp;" not in first.description and " & critics" in first.description
+
+
+def test_entities_are_decoded():
+    stories = parse_stories(recorded_page("trump-5pages", "/search/trump/?orderby=date"))
+    assert "— and it’s costing $2.5 million" in stories[3].title
+
+
+def test_story_without_image():
+    stories = parse_stories(recorded_page("trump-5pages", "/search/trump/?orderby=date"))
+    assert stories[4].image_src == ""
+    assert stories[4].date and stories[4].title
+
+
+def test_unclosed_paragraph_ends_with_its_story():
+    # Page 3 has a teaser without its </p>, as raw server HTML may have.
+    stories = parse_stories(recorded_page("trump-5pages", "/search/trump/page/3/?orderby=date"))
+
+    assert len(stories) == 10
+    assert all(story.date and story.title for story in stories)
+    assert stories[3].description.endswith("more is coming.")
+    assert stories[4].date.startswith("August 30, 2025")
+
+
+def test_unclosed_paragraph_minimal():
+    html = (
+        '<div class="search-results__story"><div><div></div><div>'
+        '<span>October 2, 2026</span><h3><a href="/a/">A</a></h3><p>Teaser'
+        '</div></div></div>'
+        '<div class="search-results__story"><div><div></div><div>'
+        '<span>October 1, 2026</span><h3><a href="/b/">B</a></h3><p>TD</p>'
+        '</div></div></div>'
+    )
+    first, second = parse_stories(html, BASE_URL)
+
+    assert (first.title, first.date, first.description) == ("A", "October 2, 2026", "Teaser")
+    assert (second.title, second.date, second.description) == ("B", "October 1, 2026", "TD")
+    assert second.url == f"{BASE_URL}/b/"
+
+
+def test_no_articles_found():
+    page = parse_results(recorded_page("no-results", "/search/qwertyuiop/?orderby=date"))
+    assert page.no_results
+    assert page.stories == []
+    assert page.next_url == ""
+
+
+def test_last_recorded_page_of_section():
+    page = parse_results(
+        recorded_page("tariffs-business", "/search/tariffs/page/2/?orderby=date&section=business"))
+    assert len(page.stories) == 10
+    assert page.next_url == ""
+    assert all("/business/" in story.url for story in page.stories)
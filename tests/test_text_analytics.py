@@ -0,0 +1,50 @@
+from bench import legacy_money_status, legacy_search_string_count, run_headlines, synthetic_headlines
+from text_analytics import PhraseMatcher, TextAnalyzer, tokenize
+
+
+def test_phrases_are_counted_wherever_they_start():
+    analyzer = TextAnalyzer(["new york", "york", "trump"])
+    stats = analyzer.analyze("In New York, the New York Post asks: Trump? TRUMP!")
+
+    assert stats.phrase_counts == {"new york": 2, "york": 2, "trump": 2}
+    assert stats.words == 10
+    # The old count only looked at the pairs of words starting at even positions.
+    assert legacy_search_string_count("In New York, the Post", "new york") == 0
+    assert analyzer.analyze("In New York, the Post").phrase_counts["new york"] == 1
+
+
+def test_overlapping_matches_are_all_counted():
+    matcher = PhraseMatcher(["ha ha", "ha ha ha"])
+    assert matcher.count(tokenize("Ha ha ha ha")) == {"ha ha": 3, "ha ha ha": 2}
+
+
+def test_duplicate_and_empty_phrases():
+    matcher = PhraseMatcher(["Trump", "trump", ""])
+    assert matcher.count(tokenize("trump")) == {"Trump": 1, "trump": 1, "": 0}
+
+
+def test_money_mentions():
+    analyzer = TextAnalyzer(["tax"])
+    assert analyzer.analyze("A $1,200.50 refund").money
+    assert analyzer.analyze("Fans paid 40 dollars").money
+    assert analyzer.analyze("It cost 15 USD").money
+    assert not analyzer.analyze("Route 66 reopens in 2025").money
+
+
+def test_benchmark_headlines():
+    results = run_headlines(count=5000)
+
+    assert results["money"] == results["legacy_money"]
+    # Single words were counted right before, phrases were missed off the stride.
+    assert results["counts"]["trump"] == results["legacy_counts"]["trump"]
+    assert results["counts"]["white house"] > results["legacy_counts"]["white house"]
+
+
+def test_analyzer_agrees_with_the_legacy_counts_per_headline():
+    analyzer = TextAnalyzer(["trump", "white house"])
+    for headline in synthetic_headlines(2000):
+        stats = analyzer.analyze(headline)
+        assert stats.money == bool(legacy_money_status(headline))
+        assert stats.phrase_counts["trump"] == legacy_search_string_count(headline, "trump")
+        # Wherever the old count found the phrase, so does the analyzer.
+        assert stats.phrase_counts["white house"] >= legacy_search_string_count(headline, "white house")
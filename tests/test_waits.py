@@ -0,0 +1,73 @@
+import pytest
+
+from waits import DomWaiter
+
+
+class FakeDriver:
+    """Answers the wait script after `latency` seconds, or times out if that is longer than its timeout.
+    """
+
+    def __init__(self) -> None:
+        self.latency = 0.1
+        self.timeouts = []
+
+    def set_script_timeout(self, seconds):
+        pass
+
+    def execute_async_script(self, script, xpaths, mode, count, timeout_ms):
+        self.timeouts.append(timeout_ms / 1000)
+        if self.latency * 1000 > timeout_ms:
+            return {"matched": -1, "elapsed": timeout_ms}
+        return {"matched": 0, "elapsed": self.latency * 1000}
+
+
+class FakeBrowser:
+    def __init__(self) -> None:
+        self.driver = FakeDriver()
+
+
+def warm_up(waiter: DomWaiter, name: str) -> None:
+    for _ in range(waiter.samples):
+        waiter.until(name, "//a", timeout=10)
+
+
+def test_timeout_adapts_after_samples():
+    waiter = DomWaiter(FakeBrowser())
+    warm_up(waiter, "see_more")
+    assert waiter.timeout_for("see_more", 10) == waiter.floor
+
+
+def test_optional_adaptive_wait_gives_up_early():
+    browser = FakeBrowser()
+    waiter = DomWaiter(browser)
+    warm_up(waiter, "see_more")
+
+    browser.driver.latency = 2.5
+    assert waiter.until("see_more", "//a", timeout=10, required=False) == -1
+    assert browser.driver.timeouts[-1] == waiter.floor
+
+
+def test_non_adaptive_wait_gets_the_full_timeout():
+    browser = FakeBrowser()
+    waiter = DomWaiter(browser)
+    warm_up(waiter, "see_more")
+
+    # A slow page is not mistaken for the last one.
+    browser.driver.latency = 2.5
+    assert waiter.until("see_more", "//a", timeout=10, required=False, adaptive=False) == 0
+    assert browser.driver.timeouts[-1] == 10
+
+
+def test_required_wait_gets_the_rest_of_the_timeout():
+    browser = FakeBrowser()
+    waiter = DomWaiter(browser)
+    warm_up(waiter, "results")
+
+    browser.driver.latency = 2.5
+    assert waiter.until("results", "//a", timeout=10) == 0
+    assert browser.driver.timeouts[-2:] == [waiter.floor, 10 - waiter.floor]
+
+    browser.driver.latency = 20
+    with pytest.raises(AssertionError):
+        waiter.until("results", "//a", timeout=10)
+    assert waiter.timeouts["results"] == 1
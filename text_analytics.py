@@ -0,0 +1,93 @@
+import re
+from typing import Dict, Iterable, List, NamedTuple
+
+
+MONEY_PATTERN = re.compile(
+    r'\$\d+(?:,\d+)*(?:\.\d+)?(?:\s*(?:dollars|USD))?\b|\b\d+\s*(?:dollars|USD)\b')
+# Punctuation dropped before the text is split into words.
+STRIP_PUNCTUATION = str.maketrans("", "", ".,;?!‘’")
+
+
+def tokenize(text: str) -> List[str]:
+    """Splits a text into lower case words without punctuation.
+    """
+    return text.lower().translate(STRIP_PUNCTUATION).split()
+
+
+class TextStats(NamedTuple):
+    phrase_counts: Dict[str, int]
+    money: bool
+    words: int
+
+
+class PhraseMatcher:
+    """Counts several phrases in one pass over the words of a text.
+
+    The phrases are compiled once into an Aho-Corasick automaton over words, so
+    every occurrence is counted, overlapping ones included, wherever it starts.
+    """
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self.phrases = list(dict.fromkeys(phrases))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+
+        for index, phrase in enumerate(self.phrases):
+            state = 0
+            for word in tokenize(phrase):
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            if state:
+                self._out[state].append(index)
+
+        # Breadth first, so the fail state of a parent is known before its children.
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for word, child in self._goto[state].items():
+                fail = self._fail[state]
+                while fail and word not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                queue.append(child)
+
+    def count(self, words: List[str]) -> Dict[str, int]:
+        """Counts the occurrences of every phrase in the words.
+            Args:
+                words (List[str]): The words of the text, as returned by tokenize().
+            Returns:
+                Dict[str, int]: The count of every phrase.
+        """
+        counts = [0] * len(self.phrases)
+        state = 0
+        for word in words:
+            while state and word not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(word, 0)
+            for index in self._out[state]:
+                counts[index] += 1
+        return dict(zip(self.phrases, counts))
+
+
+class TextAnalyzer:
+    """Runs the phrase counts and the money check on texts, with everything compiled once.
+    """
+
+    def __init__(self, phrases: Iterable[str]) -> None:
+        self.matcher = PhraseMatcher(phrases)
+
+    def analyze(self, text: str) -> TextStats:
+        """Analyzes a single text.
+            Args:
+                text (str): The text.
+            Returns:
+                TextStats: The phrase counts, whether money is mentioned and the number of words.
+        """
+        words = tokenize(text)
+        return TextStats(self.matcher.count(words),
+                         MONEY_PATTERN.search(text) is not None, len(words))
@@ -0,0 +1,169 @@
+import time
+from typing import Dict, List, Union
+
+from logger import logger
+from metrics import SpanStats, metrics
+
+
+# Resolves as soon as one of the XPaths matches, watching the DOM with a
+# MutationObserver instead of polling it from Python.
+WAIT_SCRIPT = """
+var xpaths = arguments[0], mode = arguments[1], count = arguments[2], timeout = arguments[3];
+var done = arguments[arguments.length - 1];
+var started = performance.now();
+var observer = null, timer = null, finished = false;
+
+function nodes(xpath) {
+    var result = document.evaluate(
+        xpath, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    var found = [];
+    for (var i = 0; i < result.snapshotLength; i++) {
+        found.push(result.snapshotItem(i));
+    }
+    return found;
+}
+function visible(element) {
+    return !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length)
+        && getComputedStyle(element).visibility !== "hidden";
+}
+function ready(element) {
+    return mode === "visible" ? visible(element) : !element.disabled;
+}
+function matched() {
+    for (var i = 0; i < xpaths.length; i++) {
+        var found = nodes(xpaths[i]);
+        if (mode === "count" ? found.length >= count : found.some(ready)) {
+            return i;
+        }
+    }
+    return -1;
+}
+function finish(index) {
+    if (finished) {
+        return;
+    }
+    finished = true;
+    if (observer) {
+        observer.disconnect();
+    }
+    clearTimeout(timer);
+    done({matched: index, elapsed: performance.now() - started});
+}
+
+var index = matched();
+if (index >= 0) {
+    finish(index);
+} else {
+    observer = new MutationObserver(function () {
+        var index = matched();
+        if (index >= 0) {
+            finish(index);
+        }
+    });
+    observer.observe(document.documentElement, {
+        childList: true, subtree: true, attributes: true,
+        attributeFilter: ["style", "class", "disabled", "hidden"]});
+    timer = setTimeout(function () { finish(-1); }, timeout);
+}
+"""
+COUNT_SCRIPT = """
+return document.evaluate(
+    arguments[0], document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null).snapshotLength;
+"""
+
+
+class DomWaiter:
+    """Waits for DOM conditions inside the page, returning as soon as they hold.
+
+    Every named wait keeps the latency it was observed to take. Once it has
+    `samples` of them, it times out after `factor` times the slowest one, within
+    [`floor`, the given timeout], so a wait for content that is not coming
+    gives up early. A required wait that times out early gets the rest of the
+    given timeout before it fails. Waits whose timeout decides where the crawl
+    ends are not adaptive, a slow page must not pass for the last one.
+    """
+
+    def __init__(self, browser, floor: float = 2.0, factor: float = 3.0, samples: int = 3) -> None:
+        """Initializes the waiter.
+            Args:
+                browser: The Selenium library the page is opened in.
+                floor (float): The shortest adaptive timeout in seconds.
+                factor (float): Multiple of the slowest observed latency the adaptive timeout is set to.
+                samples (int): Number of latencies observed before the timeout adapts.
+            Returns:
+                None.
+        """
+        self.browser = browser
+        self.floor = floor
+        self.factor = factor
+        self.samples = samples
+        self.stats: Dict[str, SpanStats] = {}
+        self.timeouts: Dict[str, int] = {}
+
+    def timeout_for(self, name: str, timeout: float) -> float:
+        """Returns the adaptive timeout of a wait, at most the given one.
+        """
+        stats = self.stats.get(name)
+        if stats is None or stats.count < self.samples:
+            return timeout
+        return min(timeout, max(self.floor, self.factor * stats.max))
+
+    def until(self, name: str, xpaths: Union[str, List[str]], mode: str = "visible", count: int = 1,
+              timeout: float = 10, required: bool = True, adaptive: bool = True) -> int:
+        """Waits until an element matches.
+            Args:
+                name (str): Name of the wait its latency is recorded under.
+                xpaths (Union[str, List[str]]): The XPath, or several of which the first one to match wins.
+                mode (str): "visible", "enabled", or "count" for at least `count` matching elements.
+                count (int): Number of elements of the "count" mode.
+                timeout (float): The longest the wait may take in seconds.
+                required (bool): Raise an AssertionError on timeout instead of returning -1.
+                adaptive (bool): Give up early after the adaptive timeout, False always waits the full timeout.
+                    An optional wait whose timeout means "there is no more" must not be adaptive.
+            Returns:
+                int: Index of the XPath that matched, -1 on timeout.
+        """
+        if isinstance(xpaths, str):
+            xpaths = [xpaths]
+        adaptive = self.timeout_for(name, timeout) if adaptive else timeout
+        started = time.perf_counter()
+        matched = self._wait(name, xpaths, mode, count, adaptive)
+        if matched < 0 and required and adaptive < timeout:
+            matched = self._wait(name, xpaths, mode, count, timeout - adaptive)
+        elapsed = time.perf_counter() - started
+
+        if matched >= 0:
+            self.stats.setdefault(name, SpanStats()).add(elapsed)
+            return matched
+        self.timeouts[name] = self.timeouts.get(name, 0) + 1
+        metrics.count("wait_timeouts")
+        if required:
+            raise AssertionError(
+                f"Element '{xpaths[0]}' not {mode} after {timeout} seconds.")
+        return -1
+
+    def _wait(self, name: str, xpaths: List[str], mode: str, count: int, timeout: float) -> int:
+        driver = self.browser.driver
+        driver.set_script_timeout(timeout + 5)
+        with metrics.span(f"wait.{name}"):
+            result = driver.execute_async_script(
+                WAIT_SCRIPT, xpaths, mode, count, int(timeout * 1000))
+        return result["matched"]
+
+    def count(self, xpath: str) -> int:
+        """Returns the number of elements matching the XPath.
+        """
+        return self.browser.driver.execute_script(COUNT_SCRIPT, xpath)
+
+    def report(self) -> dict:
+        """Returns the latency stats and the number of timeouts of every wait.
+        """
+        names = sorted(set(self.stats) | set(self.timeouts))
+        return {name: dict(self.stats.get(name, SpanStats()).report(),
+                           timeouts=self.timeouts.get(name, 0))
+                for name in names}
+
+    def log_report(self) -> None:
+        for name, stats in self.report().items():
+            logger.info(f"wait {name}: {stats['count']}x, mean {stats['mean_ms']} ms, "
+                        f"max {stats['max_ms']} ms, {stats['timeouts']} timeouts")
@@ -1,13 +1,96 @@
-from RPA.Robocorp.WorkItems import WorkItems
+import json
+import os
+from typing import List, Tuple
+
+
+LOCAL_WORKITEMS_ENV = "LOCAL_WORKITEMS"
+
+
+def local_workitems(path: str) -> List[Tuple[str, dict]]:
+    """ Reads the input work items from a local JSON file, for running offline.
+        The file holds a list of payloads, either bare or under a "payload" key
+        as written by the Robocorp file adapter.
+        Returns:
+            List of (work item id, workitem) tuples.
+    """
+    with open(path, encoding="utf-8") as file:
+        items = json.load(file)
+
+    return [
+        (str(item.get("id", index)), item.get("payload", item))
+        for index, item in enumerate(items, start=1)
+    ]
 
 
 def workitems() -> dict:
     """ Returns:
             workitems.
     """
+    path = os.environ.get(LOCAL_WORKITEMS_ENV)
+    if path:
+        return local_workitems(path)[0][1]
+
+    from RPA.Robocorp.WorkItems import WorkItems
 
     work_item = WorkItems()
     work_item.get_input_work_item()
     workitem = work_item.get_work_item_variables()
 
     return workitem
+
+
+class WorkItemQueue:
+    """ The pending input work items of a batch.
+        Every item stays reserved until it has run and is then released as
+        DONE or FAILED from its status record, so failed items can be retried.
+    """
+
+    def __init__(self) -> None:
+        self.library = None
+        self.reserved = {}
+
+    def reserve_all(self) -> List[Tuple[str, dict]]:
+        """ Reserves all the pending input work items.
+            Returns:
+                List of (work item id, workitem) tuples.
+        """
+        path = os.environ.get(LOCAL_WORKITEMS_ENV)
+        if path:
+            return local_workitems(path)
+
+        from RPA.Robocorp.WorkItems import EmptyQueue, WorkItems
+
+        # Without auto release, asking for the next item leaves the previous one reserved.
+        self.library = WorkItems(auto_release=False)
+        items = []
+        while True:
+            try:
+                item = self.library.get_input_work_item()
+            except EmptyQueue:
+                break
+            self.reserved[item.id] = item
+            items.append((item.id, self.library.get_work_item_variables()))
+        return items
+
+    def release(self, status: dict) -> None:
+        """ Releases a work item with the state and the error of its status record.
+        """
+        item = self.reserved.pop(status["id"], None)
+        if item is None:
+            return
+
+        from RPA.Robocorp.WorkItems import Error, State
+
+        self.library.set_current_work_item(item)
+        if status["state"] == "DONE":
+            self.library.release_input_work_item(State.DONE)
+        else:
+            self.library.release_input_work_item(
+                State.FAILED, exception_type=Error.APPLICATION,
+                code="WORK_ITEM_FAILED", message=status["error"] or "The work item failed.")
+
+    def release_remaining(self, error: str) -> None:
+        """ Fails the items still reserved, when the batch itself stops early.
+        """
+        for item_id in list(self.reserved):
+            self.release({"id": item_id, "state": "FAILED", "error": error})